@@ -0,0 +1,250 @@
+"""
+Synthetic fixtures for the benchmark suite. Generated files are cached under
+the fixtures directory, keyed by their parameters, so they are built once.
+"""
+import contextlib
+import json
+import os
+import random
+import time
+
+# Sizes per --scale. "full" matches production-sized hosts and needs several GB of disk
+SCALES = {
+    "quick": {"log_mb": 32, "tree_files": 5000, "processes": 2000, "queries": 50, "commands": 2000,
+              "history_hours": 6,
+              "cgroups": 100, "accounts": 5000},
+    "full": {"log_mb": 2048, "tree_files": 100000, "processes": 10000, "queries": 200, "commands": 20000,
+             "history_hours": 48,
+             "cgroups": 200, "accounts": 50000},
+}
+
+_USERS = ["root", "admin", "deploy", "alice", "bob", "postgres", "www-data"]
+_HOSTS = ["10.0.0.5", "10.0.3.17", "192.168.1.44", "203.0.113.9", "198.51.100.23"]
+
+
+def _log_lines(rng, count, start):
+    """Mixed syslog and auth.log traffic, including failed logins and sudo."""
+    for i in range(count):
+        stamp = time.strftime("%b %d %H:%M:%S", time.localtime(start + i))
+        pick = rng.random()
+        user, host = rng.choice(_USERS), rng.choice(_HOSTS)
+        if pick < 0.15:
+            line = f"sshd[{rng.randint(1000, 9999)}]: Failed password for {user} from {host} port {rng.randint(1024, 65535)} ssh2"
+        elif pick < 0.25:
+            line = f"sshd[{rng.randint(1000, 9999)}]: Accepted publickey for {user} from {host} port {rng.randint(1024, 65535)} ssh2"
+        elif pick < 0.30:
+            line = f"sudo: {user} : TTY=pts/0 ; PWD=/home/{user} ; USER=root ; COMMAND=/usr/bin/systemctl restart nginx"
+        elif pick < 0.60:
+            line = f"CRON[{rng.randint(1000, 9999)}]: (root) CMD (run-parts /etc/cron.hourly)"
+        else:
+            line = f"kernel: [{rng.random() * 1e5:.6f}] eth0: link up, 1000Mbps, full-duplex, rx {rng.randint(0, 10**9)}"
+        yield f"{stamp} bench-host {line}\n"
+
+
+def log_file(directory, size_mb, seed=1):
+    """A syslog-style file of about size_mb megabytes."""
+    path = os.path.join(directory, f"syslog-{size_mb}mb.log")
+    if os.path.exists(path) and os.path.getsize(path) >= size_mb * 1024 * 1024 * 0.99:
+        return path
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    # Generate one varied ~1MB block and repeat it; line statistics are what matter
+    block = "".join(_log_lines(rng, 9000, time.time() - 86400)).encode()
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        for _ in range(max(1, (size_mb * 1024 * 1024) // len(block) + 1)):
+            f.write(block)
+    os.replace(tmp, path)
+    return path
+
+
+def integrity_tree(directory, files, seed=2):
+    """
+    A tree of small files (100 per directory) and an integrity DB that
+    registers all of them, with one in a thousand tampered afterwards.
+    Returns the DB path.
+    """
+    root = os.path.join(directory, f"tree-{files}")
+    db_path = os.path.join(root, "integrity_db.json")
+    if os.path.exists(db_path):
+        return db_path
+    rng = random.Random(seed)
+    hashes = {}
+    import hashlib
+    for i in range(files):
+        sub = os.path.join(root, "files", f"{i // 100:05d}")
+        if i % 100 == 0:
+            os.makedirs(sub, exist_ok=True)
+        path = os.path.join(sub, f"f{i:07d}.conf")
+        data = rng.randbytes(rng.randint(512, 8192))
+        with open(path, "wb") as f:
+            f.write(data)
+        hashes[path] = hashlib.sha256(data).hexdigest()
+    for path in list(hashes)[::1000]:
+        with open(path, "ab") as f:
+            f.write(b"tampered")
+    tmp = db_path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(hashes, f)
+    os.replace(tmp, db_path)
+    return db_path
+
+
+def metric_history(directory, hours, seed=6):
+    """A metric store holding `hours` of 1s samples (plus rollups) ending now. Returns the store."""
+    from core.timeseries import TimeSeriesStore
+    root = os.path.join(directory, f"metrics-{hours}h")
+    marker = os.path.join(root, "complete")
+    store = TimeSeriesStore(root)
+    if os.path.exists(marker) and time.time() - os.path.getmtime(marker) < 3600:
+        return store
+    import shutil
+    shutil.rmtree(root, ignore_errors=True)
+    store = TimeSeriesStore(root)
+    store.acquire_writer()
+    rng = random.Random(seed)
+    start = int(time.time()) - hours * 3600
+    cpu = 20.0
+    for t in range(start, start + hours * 3600):
+        cpu = min(100.0, max(0.0, cpu + rng.uniform(-3, 3)))
+        store.append(t, {"cpu": cpu, "mem": 40 + cpu / 5, "disk": 55.0, "load": cpu / 25,
+                         "net_sent": rng.expovariate(1 / 5e4), "net_recv": rng.expovariate(1 / 2e5)})
+    store.close()
+    open(marker, "w").close()
+    return TimeSeriesStore(root)
+
+
+def cgroup_tree(directory, groups, seed=7):
+    """
+    A synthetic cgroup v2 hierarchy: system.slice services plus docker
+    scopes, each with cpu.stat, memory.current/max, io.stat, pids.current
+    and cgroup.procs. Returns the root. Counters can be advanced with
+    advance_cgroups().
+    """
+    root = os.path.join(directory, f"cgroup-{groups}")
+    if os.path.exists(os.path.join(root, "cgroup.controllers")):
+        return root
+    rng = random.Random(seed)
+    pid = 1000
+    for i in range(groups):
+        if i % 3 == 0:
+            path = os.path.join(root, "system.slice", f"docker-{rng.randbytes(32).hex()}.scope")
+        else:
+            path = os.path.join(root, "system.slice", f"svc{i:04d}.service")
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "cgroup.procs"), "w") as f:
+            f.write("".join(f"{pid + n}\n" for n in range(3)))
+        pid += 3
+        _write_cgroup(path, rng.randint(0, 10**9), rng.randint(10**6, 10**9), rng.randint(0, 10**9))
+        with open(os.path.join(path, "memory.max"), "w") as f:
+            f.write("max\n" if i % 2 else f"{2 * 10**9}\n")
+        with open(os.path.join(path, "pids.current"), "w") as f:
+            f.write("3\n")
+    with open(os.path.join(root, "cgroup.controllers"), "w") as f:
+        f.write("cpuset cpu io memory pids\n")
+    return root
+
+
+def _write_cgroup(path, usage_usec, memory, io_bytes):
+    # Rewritten in place (same inode), like the kernel updates them under open fds
+    with open(os.path.join(path, "cpu.stat"), "w") as f:
+        f.write(f"usage_usec {usage_usec}\nuser_usec {usage_usec // 2}\nsystem_usec {usage_usec // 2}\n"
+                f"nr_periods 0\nnr_throttled 0\nthrottled_usec 0\n")
+    with open(os.path.join(path, "memory.current"), "w") as f:
+        f.write(f"{memory}\n")
+    with open(os.path.join(path, "io.stat"), "w") as f:
+        f.write(f"8:0 rbytes={io_bytes} wbytes={io_bytes // 3} rios=10 wios=5 dbytes=0 dios=0\n")
+
+
+def advance_cgroups(root, seed=8):
+    """Adds random CPU time, memory and I/O to every group of a cgroup_tree()."""
+    rng = random.Random(seed)
+    for entry in os.scandir(os.path.join(root, "system.slice")):
+        with open(os.path.join(entry.path, "cpu.stat")) as f:
+            usage = int(f.readline().split()[1])
+        with open(os.path.join(entry.path, "io.stat")) as f:
+            io_bytes = int(f.read().split()[1].split("=")[1])
+        _write_cgroup(entry.path, usage + rng.randint(0, 2 * 10**6), rng.randint(10**6, 10**9),
+                      io_bytes + rng.randint(0, 10**7))
+
+
+def account_db(directory, users, seed=9):
+    """
+    passwd, group, shadow and a sparse lastlog for `users` accounts (plus
+    root and a few system accounts), in the layout UserInventory reads.
+    Returns the directory.
+    """
+    from core.user_manager import _LASTLOG
+    root = os.path.join(directory, f"accounts-{users}")
+    if os.path.exists(os.path.join(root, "lastlog")):
+        return root
+    os.makedirs(root, exist_ok=True)
+    rng = random.Random(seed)
+    today = int(time.time()) // 86400
+    names = [f"user{i:05d}" for i in range(users)]
+    with open(os.path.join(root, "passwd"), "w") as f:
+        f.write("root:x:0:0:root:/root:/bin/bash\ndaemon:x:1:1::/usr/sbin:/usr/sbin/nologin\n")
+        f.write("".join(f"{name}:x:{1000 + i}:{1000 + i % 50}::/home/{name}:{rng.choice(['/bin/bash', '/bin/zsh', '/usr/sbin/nologin'])}\n"
+                        for i, name in enumerate(names)))
+    with open(os.path.join(root, "group"), "w") as f:
+        f.write("root:x:0:\nsudo:x:27:" + ",".join(rng.sample(names, min(20, users))) + "\n")
+        f.write("".join(f"team{g:02d}:x:{1000 + g}:\n" for g in range(50)))
+    with open(os.path.join(root, "shadow"), "w") as f:
+        f.write(f"root:!:{today - 400}:0:99999:7:::\ndaemon:*:{today - 400}:0:99999:7:::\n")
+        f.write("".join(f"{name}:{rng.choice(['$6$salt$hash', '!$6$salt$hash'])}:{today - rng.randint(0, 400)}:0:"
+                        f"{rng.choice([90, 99999])}:7:::\n" for name in names))
+    with open(os.path.join(root, "lastlog"), "wb") as f:
+        for i in range(0, users, 2):
+            f.seek((1000 + i) * _LASTLOG.size)
+            f.write(_LASTLOG.pack((today - rng.randint(0, 300)) * 86400, b"pts/0", b"10.0.0.5"))
+    return root
+
+
+class _FakeProcess:
+    __slots__ = ("info",)
+
+    def __init__(self, info):
+        self.info = info
+
+
+def process_table(count, seed=3):
+    """Fake psutil processes carrying the .info dicts process_iter(attrs) would fill in."""
+    rng = random.Random(seed)
+    names = ["python3", "nginx", "postgres", "chrome", "sshd", "systemd", "java", "node", "kworker/0:1"]
+    return [_FakeProcess({
+        "pid": pid,
+        "name": rng.choice(names),
+        "cpu_percent": round(rng.expovariate(1 / 3.0), 1),
+        "memory_percent": rng.random() * 4,
+    }) for pid in range(1, count + 1)]
+
+
+@contextlib.contextmanager
+def patched_process_iter(processes):
+    """Makes psutil.process_iter yield the fake table."""
+    import psutil
+    original = psutil.process_iter
+    psutil.process_iter = lambda attrs=None, ad_value=None: iter(processes)
+    try:
+        yield
+    finally:
+        psutil.process_iter = original
+
+
+def queries(count, seed=4):
+    """Natural-language questions in the proportions the shell sees."""
+    rng = random.Random(seed)
+    pool = ["show me cpu usage", "how much memory is used", "check disk storage", "show active connections",
+            "network traffic right now", "which processes are running", "why is the system slow",
+            "list files in /var/log", "ping 8.8.8.8 and show memory"]
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def playbook_commands(count, seed=5):
+    """Playbook task lines, mostly valid with some forbidden and malformed ones."""
+    rng = random.Random(seed)
+    pool = ["ls -la /var/log", "systemctl status nginx", "echo 'deploy done'", "grep -i error /var/log/syslog",
+            "cp /etc/hosts /tmp/hosts.bak", "ping -c 1 10.0.0.1", "rm -rf / --no-preserve-root",
+            "curl -s http://localhost/health", "dd if=/dev/zero of=/dev/sda", "echo 'unterminated",
+            "wget http://example.com/x.sh", "find /etc -name '*.conf'"]
+    return [rng.choice(pool) for _ in range(count)]
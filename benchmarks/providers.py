@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Latency/throughput comparison of AI providers on NetMon-AI's real intent prompt.
+
+    python3 benchmarks/providers.py --stub                      # offline, against the stub server
+    python3 benchmarks/providers.py --providers groq,local -n 20
+
+Per provider: the first (cold) request, p50/p95 of sequential requests, and
+throughput of the same requests sent as one batch with --concurrency workers.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+QUESTIONS = [
+    "show me cpu usage",
+    "how much ram is used",
+    "is the disk full",
+    "show active connections",
+    "what is the network traffic",
+    "which processes are running",
+    "why is the system slow",
+    "list files in /tmp",
+]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def bench(provider, system_prompt, n, concurrency):
+    questions = [QUESTIONS[i % len(QUESTIONS)] for i in range(n)]
+    errors = 0
+
+    started = time.perf_counter()
+    reply = provider.get_completion(system_prompt, questions[0])
+    cold = time.perf_counter() - started
+    errors += str(reply).lower().startswith(("error", "api error"))
+
+    latencies = []
+    for question in questions:
+        started = time.perf_counter()
+        reply = provider.get_completion(system_prompt, question)
+        latencies.append(time.perf_counter() - started)
+        errors += str(reply).lower().startswith(("error", "api error"))
+
+    started = time.perf_counter()
+    replies = provider.get_completions([(system_prompt, q) for q in questions], max_workers=concurrency)
+    batch = time.perf_counter() - started
+    errors += sum(str(r).lower().startswith(("error", "api error")) for r in replies)
+
+    return {
+        "provider": provider.name,
+        "requests": 2 * n + 1,
+        "errors": errors,
+        "cold_ms": round(cold * 1000, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "sequential_rps": round(n / sum(latencies), 2),
+        "batched_rps": round(n / batch, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare AI provider latency and throughput.")
+    parser.add_argument("--providers", default="local", help="comma-separated: groq,local,llamacpp")
+    parser.add_argument("-n", type=int, default=16, help="requests per phase")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--stub", action="store_true", help="benchmark 'local' against an in-process stub server")
+    parser.add_argument("--stub-latency", type=float, default=0.05)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    if args.stub:
+        import stub_llm_server
+        server = stub_llm_server.start(latency=args.stub_latency, slots=args.concurrency)
+        os.environ["NETMON_AI_LOCAL_URL"] = server.url
+
+    from ai.providers import get_provider
+    from ai.nlp_interface import NLPInterface
+
+    nlp = NLPInterface()
+    system_prompt = nlp._get_system_prompt(os.getcwd())
+    results = []
+    for name in args.providers.split(","):
+        provider = get_provider(name.strip())
+        results.append(bench(provider, system_prompt, args.n, args.concurrency))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    header = f"{'provider':<10} {'cold ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'seq req/s':>10} {'batch req/s':>12} {'errors':>7}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['provider']:<10} {r['cold_ms']:>9} {r['p50_ms']:>9} {r['p95_ms']:>9} "
+              f"{r['sequential_rps']:>10} {r['batched_rps']:>12} {r['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,497 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for NetMon-AI's hot paths. Runs offline: logs, integrity
+trees and process tables are synthetic, and the AI is the stub LLM server.
+
+    python3 benchmarks/run.py                     # quick scale, compare with the baseline
+    python3 benchmarks/run.py --check             # CI gate: also fail when a benchmark has no baseline
+    python3 benchmarks/run.py --save              # record the best of 1 + --confirm passes as the baseline
+    python3 benchmarks/run.py --scale full        # 2GB log, 100k-file tree (slow, needs disk)
+    python3 benchmarks/run.py -k integrity --threshold 0.1 --llm-latency 0.2
+
+Each benchmark is timed --repeat times after one warm-up run, and more
+often when that takes under --min-time seconds, so millisecond benchmarks
+get enough runs to find their floor. The fastest run is compared with the
+baseline for the same scale (it is far less noisy than the median on
+shared machines), after correcting for the host's speed: a fixed probe
+workload is timed between runs, so a slow stretch on a shared host slows
+both. A benchmark regresses when it is more than --threshold slower, plus
+twice the run-to-run spread (median vs min) seen in the baseline or now,
+and stays so when re-measured --confirm more times; any regression fails
+the run (exit 1). Benchmarks missing from the baseline
+are reported as "new" with a warning, and fail the run under --check.
+The baseline records the machine it came from; on a different machine
+regressions are only reported (and --check fails), since the numbers are
+not comparable.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "src"))
+
+import fixtures
+
+BENCHMARKS = []
+
+
+def benchmark(name, unit):
+    """Registers fn(ctx) -> (callable, units per call); unit names the throughput."""
+    def wrap(fn):
+        BENCHMARKS.append((name, unit, fn))
+        return fn
+    return wrap
+
+
+class Context:
+    def __init__(self, scale, fixtures_dir):
+        self.scale = scale
+        self.sizes = fixtures.SCALES[scale]
+        self.dir = fixtures_dir
+
+    @property
+    def log(self):
+        return fixtures.log_file(self.dir, self.sizes["log_mb"])
+
+
+# --- COLLECTORS ---
+
+@benchmark("collectors.get_metrics", "calls")
+def bench_metrics(ctx):
+    from core.monitoring import SystemMonitor
+    monitor = SystemMonitor()
+
+    def run():
+        for _ in range(100):
+            monitor.get_metrics()
+    return run, 100
+
+
+@benchmark("collectors.process_snapshot", "procs")
+def bench_process_snapshot(ctx):
+    from core.records import ProcessTable
+    table = ProcessTable()
+    table.snapshot()
+    return table.snapshot, len(table.snapshot())
+
+
+@benchmark("collectors.process_top", "procs")
+def bench_process_top(ctx):
+    from core.records import ProcessTable
+    fake = fixtures.process_table(ctx.sizes["processes"])
+
+    def run():
+        # psutil fallback path over the fake table, then top-N
+        with fixtures.patched_process_iter(fake):
+            ProcessTable._snapshot_psutil().top(10)
+    return run, len(fake)
+
+
+@benchmark("collectors.filesystems", "calls")
+def bench_filesystems(ctx):
+    from core.filesystems import FilesystemMonitor
+    monitor = FilesystemMonitor()
+    monitor.io()
+
+    def run():
+        # What a recorder tick costs: cached mount list, statvfs per mount, I/O deltas
+        for _ in range(100):
+            monitor.usage()
+            monitor.io()
+    return run, 100
+
+
+@benchmark("collectors.cgroups", "groups")
+def bench_cgroups(ctx):
+    from core.cgroups import CgroupMonitor
+    root = fixtures.cgroup_tree(ctx.dir, ctx.sizes["cgroups"])
+    monitor = CgroupMonitor(root, rescan=3600, max_groups=ctx.sizes["cgroups"])
+    monitor.sample()
+    # Steady state: fds already open, one pread per stat file
+    return monitor.sample, len(monitor.groups)
+
+
+# --- METRIC HISTORY ---
+
+@benchmark("timeseries.append", "samples")
+def bench_timeseries_append(ctx):
+    import shutil
+    from core.timeseries import TimeSeriesStore
+    root = os.path.join(ctx.dir, "metrics-append")
+    shutil.rmtree(root, ignore_errors=True)
+    store = TimeSeriesStore(root)
+    store.acquire_writer()
+    values = {"cpu": 12.5, "mem": 40.0, "disk": 55.0, "load": 0.5, "net_sent": 1e4, "net_recv": 3e4}
+    clock = [int(time.time()) - 86400]
+
+    def run():
+        # One simulated second per sample, crossing minute (and hour) rollups
+        for _ in range(1000):
+            clock[0] += 1
+            store.append(clock[0], values)
+    return run, 1000
+
+
+@benchmark("timeseries.query", "points")
+def bench_timeseries_query(ctx):
+    store = fixtures.metric_history(ctx.dir, ctx.sizes["history_hours"])
+    now = time.time()
+
+    def run():
+        for _ in range(10):
+            store.query("cpu", now - 3600, now, resolution="1s")
+    return run, 36000
+
+
+@benchmark("timeseries.summary", "queries")
+def bench_timeseries_summary(ctx):
+    # What the AI context and a METRIC_HISTORY intent do: auto resolution over the whole history
+    store = fixtures.metric_history(ctx.dir, ctx.sizes["history_hours"])
+    hours = ctx.sizes["history_hours"]
+
+    def run():
+        for _ in range(10):
+            store.summary("cpu", time.time() - hours * 3600)
+    return run, 10
+
+
+@benchmark("anomaly.observe", "samples")
+def bench_anomaly_observe(ctx):
+    import random
+    from core.anomaly import AnomalyDetector
+    detector = AnomalyDetector(state_path=None)
+    rng = random.Random(7)
+    # One tick of per-process series on a busy host, pre-generated so only detection is timed
+    ticks = [{f"proc.p{i}.{i}.mem": rng.random() * 4 for i in range(ctx.sizes["processes"])} for _ in range(5)]
+    clock = [1.8e9]
+
+    def run():
+        for tick in ticks:
+            clock[0] += 1
+            detector.observe(tick, now=clock[0], seasonal=False)
+    return run, len(ticks) * len(ticks[0])
+
+
+# --- ACCOUNTS ---
+
+def _inventory(root):
+    from core.user_manager import UserInventory
+    return UserInventory(*(os.path.join(root, name) for name in ("passwd", "group", "shadow", "lastlog")),
+                         lastlog2=os.path.join(root, "lastlog2.db"), uid_min=1000)
+
+
+@benchmark("users.snapshot", "accounts")
+def bench_users_snapshot(ctx):
+    inventory = _inventory(fixtures.account_db(ctx.dir, ctx.sizes["accounts"]))
+
+    def run():
+        inventory._cache.clear()  # Cold: parse every file and rebuild the indexes
+        inventory.snapshot()
+    return run, ctx.sizes["accounts"]
+
+
+@benchmark("users.audit", "accounts")
+def bench_users_audit(ctx):
+    inventory = _inventory(fixtures.account_db(ctx.dir, ctx.sizes["accounts"]))
+    inventory.snapshot()
+    # Warm: unchanged files cost one stat each, then the checks themselves
+    return (lambda: inventory.snapshot().audit()), ctx.sizes["accounts"]
+
+
+# --- INTEGRITY ---
+
+@benchmark("integrity.calculate_hash", "MB")
+def bench_hash(ctx):
+    from core.integrity import IntegrityMonitor
+    monitor = IntegrityMonitor(db_path=os.path.join(ctx.dir, "unused_db.json"))
+    path = ctx.log
+    return (lambda: monitor.calculate_hash(path)), os.path.getsize(path) / 2**20
+
+
+@benchmark("integrity.verify_all", "files")
+def bench_verify(ctx):
+    from core.integrity import IntegrityMonitor
+    monitor = IntegrityMonitor(db_path=fixtures.integrity_tree(ctx.dir, ctx.sizes["tree_files"]))
+    return monitor.verify_all, len(monitor.hashes)
+
+
+@benchmark("integrity.verify_quick", "files")
+def bench_verify_quick(ctx):
+    from core.integrity import IntegrityMonitor
+    monitor = IntegrityMonitor(db_path=fixtures.integrity_tree(ctx.dir, ctx.sizes["tree_files"]))
+    monitor.verify_all()  # Learns stat and fingerprints (saved to the fixture's sidecar)
+    return (lambda: monitor.verify_all(quick=True)), len(monitor.hashes)
+
+
+@benchmark("integrity.fingerprint", "files")
+def bench_fingerprint(ctx):
+    from core.hashing import FileHasher
+    hasher = FileHasher()
+    path = ctx.log
+
+    def run():
+        # Constant-size sample of a large file: what a changed-size-free check costs
+        for _ in range(100):
+            hasher.fingerprint(path)
+    return run, 100
+
+
+# --- LOGS ---
+
+@benchmark("logs.read_logs", "MB")
+def bench_read_logs(ctx):
+    from core.log_viewer import LogViewer
+    path = ctx.log
+    return (lambda: LogViewer.read_logs(path, keyword="failed", limit=50)), os.path.getsize(path) / 2**20
+
+
+@benchmark("logs.analyze_file", "MB")
+def bench_analyze_file(ctx):
+    from ai.log_analyzer import LogAnalyzer
+    analyzer = LogAnalyzer()
+    path = ctx.log
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            analyzer.analyze_file(path, lines=200)
+    return run, os.path.getsize(path) / 2**20
+
+
+# --- AI & ROUTING ---
+
+@benchmark("ai.process_query", "queries")
+def bench_process_query(ctx):
+    from ai.nlp_interface import NLPInterface
+    with contextlib.redirect_stdout(io.StringIO()):
+        nlp = NLPInterface()
+    questions = fixtures.queries(ctx.sizes["queries"])
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            for q in questions:
+                nlp.process_query(q)
+    return run, len(questions)
+
+
+@benchmark("ai.validate_plan", "plans")
+def bench_validate_plan(ctx):
+    from ai.nlp_interface import NLPInterface
+    with contextlib.redirect_stdout(io.StringIO()):
+        nlp = NLPInterface()
+    plan = [{"id": i, "action": "MONITOR_CPU", "target": f"/var/log/app{i}", "value": "none",
+             "risk_level": "GREEN", "depends_on": list(range(1, i))} for i in range(1, nlp.MAX_PLAN_STEPS + 1)]
+
+    def run():
+        for _ in range(1000):
+            nlp._validate_plan(plan)
+    return run, 1000
+
+
+@benchmark("automation.validate_command", "commands")
+def bench_validate_command(ctx):
+    from core.automation import PlaybookEngine
+    engine = PlaybookEngine()
+    commands = fixtures.playbook_commands(ctx.sizes["commands"])
+
+    def run():
+        for command in commands:
+            engine._validate_command(command)
+    return run, len(commands)
+
+
+@benchmark("routing.parse_command", "commands")
+def bench_parse(ctx):
+    from core.registry import Registry
+    from handlers.builtin import register_builtins
+    registry = Registry()
+    register_builtins(registry)
+    lines = [["connections", "--state", "ESTABLISHED", "--port", "443", "--top", "5"],
+             ["audit-query", "--since", "7d", "--risk", "RED", "--limit", "20"],
+             ["pskill", "1234"], ["register", "/etc/passwd"]] * 250
+
+    def run():
+        for parts in lines:
+            registry.get_command(parts[0]).parse(parts[1:])
+    return run, len(lines)
+
+
+# --- RUNNER ---
+
+def probe():
+    """A fixed slice of interpreter and syscall work: how fast the host is right now."""
+    total = 0
+    for i in range(20000):
+        total += i * i
+    for _ in range(200):
+        os.stat(HERE)
+    return total
+
+
+def measure(fn, repeat, min_time=0.0):
+    fn()  # Warm-up: imports, page cache, lazy handlers
+    times, probes = [], []
+    while len(times) < repeat or (sum(times) < min_time and len(times) < repeat * 20):
+        started = time.perf_counter()
+        probe()
+        probes.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return {"median": statistics.median(times), "min": min(times), "runs": len(times), "probe": min(probes)}
+
+
+def ratio(timing, base):
+    """Slowdown vs the baseline, corrected for how fast the host was while each was measured."""
+    slowdown = timing["min"] / base["min"]
+    if base.get("probe") and timing.get("probe"):
+        slowdown /= timing["probe"] / base["probe"]
+    return slowdown
+
+
+def spread(timing):
+    """Relative run-to-run noise of a measurement: how far the median sits above the fastest run."""
+    return timing["median"] / timing["min"] - 1 if timing["min"] else 0.0
+
+
+def machine_info():
+    """What makes timings comparable: OS, CPU model and count, Python version."""
+    cpu = platform.processor()
+    try:
+        with open("/proc/cpuinfo") as f:
+            cpu = next((line.split(":", 1)[1].strip() for line in f if line.startswith("model name")), cpu)
+    except OSError:
+        pass
+    return {"system": platform.system(), "arch": platform.machine(), "cpu": cpu, "cpus": os.cpu_count(),
+            "python": ".".join(platform.python_version_tuple()[:2])}
+
+
+def machine_mismatch(recorded):
+    """['cpus: 1 != 4', ...] for every recorded machine property that differs from this machine."""
+    current = machine_info()
+    return [f"{key}: {recorded[key]} != {current[key]}" for key in current
+            if key in recorded and recorded[key] != current[key]]
+
+
+def load_baseline(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the NetMon-AI benchmark suite.")
+    parser.add_argument("--scale", choices=sorted(fixtures.SCALES), default="quick")
+    parser.add_argument("-k", dest="filter", help="only benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.5, help="keep timing short benchmarks for this many seconds")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument("--confirm", type=int, default=2, help="re-measurements a regression must survive")
+    parser.add_argument("--baseline", default=os.path.join(HERE, "baseline.json"))
+    parser.add_argument("--save", action="store_true", help="store results as the new baseline")
+    parser.add_argument("--check", action="store_true", help="fail when a benchmark has no baseline to compare with")
+    parser.add_argument("--fixtures", default=os.path.join(tempfile.gettempdir(), "netmon-ai-bench"),
+                        help="where generated fixtures are cached")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="simulated AI latency in seconds")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    # The AI layer talks to the stub server, never to Groq
+    import stub_llm_server
+    server = stub_llm_server.start(latency=args.llm_latency, slots=8)
+    os.environ["NETMON_AI_PROVIDER"] = "local"
+    os.environ["NETMON_AI_LOCAL_URL"] = server.url
+
+    ctx = Context(args.scale, args.fixtures)
+    selected = [b for b in BENCHMARKS if not args.filter or args.filter in b[0]]
+    baseline_doc = load_baseline(args.baseline)
+    baseline = baseline_doc.get(args.scale, {})
+    mismatch = machine_mismatch(baseline_doc.get("machine", {})) if baseline else []
+    if mismatch and not args.save:
+        print(f"WARNING: {args.baseline} was recorded on a different machine ({'; '.join(mismatch)}). "
+              f"Slowdowns are reported but do not fail the run; record a baseline here with --save.",
+              file=sys.stderr)
+
+    results, regressions, missing, runs = {}, [], [], {}
+    header = (f"{'benchmark':<30} {'median ms':>10} {'min ms':>10} {'throughput':>24} "
+              f"{'base min':>10} {'host':>6} {'change':>8}  status")
+
+    def judge(name):
+        timing, base = results[name], baseline.get(name)
+        fn, units, unit = runs[name]
+        timing["throughput"] = units / timing["median"] if timing["median"] else 0.0
+        timing["status"], change, host = "new", "", ""
+        if base:
+            if base.get("probe"):
+                host = f"x{timing['probe'] / base['probe']:.2f}"
+            slowdown = ratio(timing, base)
+            change = f"{(slowdown - 1) * 100:+.0f}%"
+            allowed = 1 + args.threshold + 2 * max(spread(base), spread(timing))
+            timing["status"] = "REGRESSED" if slowdown > allowed else "ok"
+        if not args.json:
+            throughput = f"{timing['throughput']:,.1f} {unit}/s"
+            base_ms = f"{base['min'] * 1000:.2f}" if base else "-"
+            print(f"{name:<30} {timing['median'] * 1000:>10.2f} {timing['min'] * 1000:>10.2f} "
+                  f"{throughput:>24} {base_ms:>10} {host:>6} {change:>8}  {timing['status']}")
+
+    if not args.json:
+        print(header)
+        print("-" * len(header))
+    for name, unit, setup in selected:
+        fn, units = setup(ctx)
+        runs[name] = (fn, units, unit)
+        results[name] = measure(fn, args.repeat, args.min_time)
+        judge(name)
+        if name not in baseline:
+            missing.append(name)
+
+    # A busy neighbour slows a stretch of the run; a real regression still shows
+    # when measured again after the rest of the suite. A baseline keeps the best
+    # of every pass, so it is not recorded during such a stretch either.
+    for attempt in range(args.confirm):
+        suspects = [name for name, timing in results.items() if args.save or timing["status"] == "REGRESSED"]
+        if not suspects:
+            break
+        if not args.json:
+            print(f"\nRe-measuring {len(suspects)} {'' if args.save else 'slow '}benchmark(s) "
+                  f"({attempt + 1}/{args.confirm}):")
+        for name in suspects:
+            again = measure(runs[name][0], args.repeat, args.min_time)
+            results[name] = min(results[name], again, key=lambda t: t["min"] / t["probe"])
+            judge(name)
+    regressions = [name for name, timing in results.items() if timing["status"] == "REGRESSED"]
+
+    server.shutdown()
+    if args.json:
+        print(json.dumps({"scale": args.scale, "results": results, "regressions": regressions, "missing": missing,
+                          "machine_mismatch": mismatch}, indent=2))
+    elif regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%} plus noise: {', '.join(regressions)}")
+    if missing and not args.save:
+        print(f"\nWARNING: {len(missing)} benchmark(s) have no {args.scale} baseline in {args.baseline} and were not "
+              f"checked: {', '.join(missing)}. Record one with --save.", file=sys.stderr)
+
+    if args.save:
+        baseline_doc.setdefault(args.scale, {}).update(
+            {name: {"median": r["median"], "min": r["min"], "probe": r["probe"]} for name, r in results.items()})
+        baseline_doc["machine"] = machine_info()
+        with open(args.baseline, "w") as f:
+            json.dump(baseline_doc, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if mismatch:
+        return 1 if args.check else 0
+    return 1 if regressions or (args.check and missing) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Stub OpenAI-compatible chat server for testing the local AI provider offline.
+Answers /v1/chat/completions with a canned NetMon-AI intent chosen from
+keywords in the user message, after a fixed simulated latency. --slots caps
+how many requests are "generated" at once, like llama.cpp's --parallel.
+
+    python3 benchmarks/stub_llm_server.py --port 8080 --latency 0.2 --slots 4
+    NETMON_AI_PROVIDER=local netmon-ai
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+INTENTS = [
+    (("cpu", "processor"), {"action": "MONITOR_CPU", "target": "none", "value": "none", "risk_level": "GREEN"}),
+    (("memory", "ram"), {"action": "MONITOR_MEM", "target": "none", "value": "none", "risk_level": "GREEN"}),
+    (("disk", "storage"), {"action": "MONITOR_DISK", "target": "none", "value": "none", "risk_level": "GREEN"}),
+    (("connection", "socket"), {"action": "CONNECTIONS", "target": "none", "value": "none", "risk_level": "GREEN"}),
+    (("bandwidth", "traffic"), {"action": "BANDWIDTH", "target": "none", "value": "none", "risk_level": "GREEN"}),
+    (("process",), {"action": "PROCESS_LIST", "target": "none", "value": "none", "risk_level": "GREEN"}),
+]
+FALLBACK = {"action": "UNKNOWN", "target": "none", "value": "none", "risk_level": "GREEN",
+            "message": "Stub server: no canned answer for this question."}
+
+
+def answer(question):
+    q = question.lower()
+    for keywords, intent in INTENTS:
+        if any(k in q for k in keywords):
+            return intent
+    return FALLBACK
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like real servers
+    disable_nagle_algorithm = True  # Headers and body go out in separate writes
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, doc):
+        body = json.dumps(doc).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send(200, {"object": "list", "data": [{"id": "stub", "object": "model"}]})
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length))
+            messages = request["messages"]
+        except (ValueError, KeyError):
+            self._send(400, {"error": "malformed request"})
+            return
+        server = self.server
+        with server.slots:
+            time.sleep(server.latency)
+        server.count += 1
+        question = messages[-1]["content"] if messages else ""
+        content = "ok" if request.get("max_tokens") == 1 else json.dumps(answer(question))
+        self._send(200, {
+            "id": f"stub-{server.count}",
+            "object": "chat.completion",
+            "model": request.get("model", "stub"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": sum(len(m["content"]) // 4 for m in messages),
+                      "completion_tokens": len(content) // 4},
+        })
+
+
+def start(port=0, latency=0.05, slots=4):
+    """Starts the stub in a background thread. Returns the server; its URL is server.url."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.slots = threading.BoundedSemaphore(slots)
+    server.count = 0
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per completion")
+    parser.add_argument("--slots", type=int, default=4, help="completions generated at once")
+    args = parser.parse_args()
+    server = start(args.port, args.latency, args.slots)
+    print(f"Stub LLM server on {server.url} (latency {args.latency}s, {args.slots} slots). Ctrl+C to stop.")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import os
+import time
+
+
+class ContextBuilder:
+    """
+    Builds the small system snapshot appended to the AI prompt: load, memory,
+    busy disks and full mounts, top processes and cgroups, the last hour's
+    trend, current anomalies and recent alerts. It only reads data that is
+    already cached or recorded (prefetched collector results, the last
+    filesystem and cgroup samples, the
+    metric history, the anomaly detector's state, the auditor's in-memory
+    alerts), so it never adds psutil calls to an ask, and it is capped at
+    max_chars.
+    """
+    def __init__(self, prefetcher, auditor, history=None, anomalies=None, filesystems=None, cgroups=None,
+                 max_chars=700, max_processes=5, max_alerts=3, max_anomalies=4, max_cgroups=4, wait=0.05):
+        self.prefetcher = prefetcher
+        self.auditor = auditor
+        self.history = history
+        self.anomalies = anomalies
+        self.filesystems = filesystems
+        self.cgroups = cgroups
+        self.max_cgroups = max_cgroups
+        self.max_anomalies = max_anomalies
+        self.max_chars = max_chars
+        self.max_processes = max_processes
+        self.max_alerts = max_alerts
+        # How long to wait for a prefetch that was just started (metrics take ~1ms)
+        self.wait = wait
+
+    @staticmethod
+    def _clip(text, limit=160):
+        return text if len(text) <= limit else text[:limit - 3] + "..."
+
+    def _load_line(self):
+        try:
+            one, five, fifteen = os.getloadavg()
+        except (AttributeError, OSError):
+            return None
+        return f"- Load average 1/5/15m: {one:.2f} {five:.2f} {fifteen:.2f} ({os.cpu_count() or '?'} CPUs)"
+
+    def _metrics_line(self):
+        stats = self.prefetcher.peek("metrics", wait=self.wait)
+        if not stats:
+            return None
+        return f"- Usage: CPU {stats['cpu']:.0f}%, memory {stats['mem']:.0f}%, disk {stats['disk']:.0f}%"
+
+    def _process_line(self):
+        procs = self.prefetcher.peek("processes", wait=self.wait)
+        if not procs:
+            return None
+        top = ", ".join(
+            f"{p.get('name') or '?'}({p['pid']}) {p.get('cpu_percent') or 0:.0f}%/{p.get('memory_percent') or 0:.1f}%"
+            for p in procs[:self.max_processes]
+        )
+        return self._clip(f"- Top processes cpu/mem: {top}", 240)
+
+    def _cgroup_line(self):
+        """Busiest containers / units; only when more than one group is tracked (else it is the host)."""
+        if self.cgroups is None or len(self.cgroups.last) < 2:
+            return None
+        top = ", ".join(f"{g.name} {g.cpu_percent:.0f}%/{(g.memory or 0) / 1048576:.0f}MB"
+                        for g in self.cgroups.last[:self.max_cgroups])
+        return self._clip(f"- Top cgroups cpu/mem: {top}", 240)
+
+    def _disk_line(self):
+        """Only disks that are busy or slow and mounts that are nearly full; silent otherwise."""
+        if self.filesystems is None:
+            return None
+        parts = [f"{d.disk} util {d.util or 0:.0f}% await {d.await_ms:.0f}ms "
+                 f"{d.read_iops + d.write_iops:.0f} IOPS"
+                 for d in self.filesystems.last_io if (d.util or 0) >= 50 or d.await_ms >= 20]
+        parts += [f"{m.mountpoint} {m.percent:.0f}% full"
+                  + (f" (inodes {m.inodes_percent:.0f}%)" if (m.inodes_percent or 0) >= 85 else "")
+                  for m in self.filesystems.last_usage if m.percent >= 85 or (m.inodes_percent or 0) >= 85]
+        return self._clip(f"- Disks: {'; '.join(parts)}", 240) if parts else None
+
+    def _history_line(self):
+        if self.history is None:
+            return None
+        parts = []
+        for metric, label in (("cpu", "CPU"), ("mem", "memory")):
+            summary = self.history.summary(metric, time.time() - 3600)
+            if summary:
+                peak = time.strftime("%H:%M", time.localtime(summary["peak_at"]))
+                parts.append(f"{label} avg {summary['avg']:.0f}% peak {summary['max']:.0f}% at {peak}")
+        return f"- Last hour: {'; '.join(parts)}" if parts else None
+
+    def _anomaly_line(self):
+        if self.anomalies is None:
+            return None
+        rows = self.anomalies.active()[:self.max_anomalies]
+        if not rows:
+            return None
+        unusual = ", ".join(f"{name} {value:.1f} (usual {expected:.1f}, {z:+.1f}sd)" for name, value, expected, z in rows)
+        return self._clip(f"- Unusual right now: {unusual}", 240)
+
+    def _alert_lines(self):
+        lines = []
+        for alert in reversed(self.auditor.recent_alerts(self.max_alerts)):
+            when = time.strftime("%H:%M:%S", time.localtime(alert.get("epoch", 0)))
+            detail = alert.get("message") or alert.get("status", "")
+            lines.append(self._clip(f"- Alert {when} {alert['risk']} {alert['event']}/{alert['action']}: {detail}"))
+        return lines
+
+    def build(self):
+        """Snapshot lines, most important first, dropping whole lines past max_chars."""
+        lines = [self._load_line(), self._metrics_line(), self._disk_line(), self._anomaly_line(),
+                 self._process_line(), self._cgroup_line(), self._history_line()] + self._alert_lines()
+        snapshot, size = [], 0
+        for line in lines:
+            if line is None:
+                continue
+            if size + len(line) + 1 > self.max_chars:
+                break
+            snapshot.append(line)
+            size += len(line) + 1
+        return "\n".join(snapshot)
@@ -3,12 +3,41 @@ import os
 import base64
 from dotenv import load_dotenv
 from pathlib import Path
+from ai.providers import CompletionProvider
+from utils.perf import timed
 
-class GroqAIClient:
+class GroqAIClient(CompletionProvider):
     """
     Handles communication with the Groq API.
     """
+    name = "groq"
+
     def __init__(self):
+        self.api_key = self.load_api_key()
+        
+        if not self.api_key:
+            self.client = None
+            print("=" * 60)
+            print("ERROR: GROQ_API_KEY not found!")
+            print("=" * 60)
+            print("For Development:")
+            print("  Create a .env file in the project root with:")
+            print("  GROQ_API_KEY=your_actual_api_key_here")
+            print()
+            print("For Production:")
+            print("  Reinstall the package or check /etc/netmon-ai/.env.b64")
+            print("  (or run offline with NETMON_AI_PROVIDER=local)")
+            print("=" * 60)
+        else:
+            try:
+                self.client = Groq(api_key=self.api_key)
+            except Exception as e:
+                self.client = None
+                print(f"Error initializing Groq client: {e}")
+
+    @staticmethod
+    def load_api_key():
+        """Returns the Groq API key from the packaged file (or .env in development), or None."""
         api_key = None
         
         # Try to load from base64-encoded file first (production)
@@ -58,27 +87,9 @@ class GroqAIClient:
 
             api_key = os.getenv("GROQ_API_KEY")
         
-        self.api_key = api_key
-        
-        if not self.api_key:
-            self.client = None
-            print("=" * 60)
-            print("ERROR: GROQ_API_KEY not found!")
-            print("=" * 60)
-            print("For Development:")
-            print("  Create a .env file in the project root with:")
-            print("  GROQ_API_KEY=your_actual_api_key_here")
-            print()
-            print("For Production:")
-            print("  Reinstall the package or check /etc/netmon-ai/.env.b64")
-            print("=" * 60)
-        else:
-            try:
-                self.client = Groq(api_key=self.api_key)
-            except Exception as e:
-                self.client = None
-                print(f"Error initializing Groq client: {e}")
+        return api_key
 
+    @timed("ai.groq")
     def get_completion(self, system_prompt, user_prompt, model="llama-3.3-70b-versatile"):
         """
         Sends a request to the Groq API and returns the text response.
@@ -1,9 +1,9 @@
-from ai.groq_client import GroqAIClient
+from ai.providers import get_provider
 from utils.colors import Colors
 
 class LogAnalyzer:
     def __init__(self):
-        self.ai = GroqAIClient()
+        self.ai = get_provider()
         self.security_prompt = """
         You are a Cybersecurity Expert. Analyze the following log lines for:
         1. Brute force attempts (repeated failures)
@@ -11,6 +11,23 @@ class LogAnalyzer:
         3. Suspicious IP addresses
         Provide a concise summary with 'CRITICAL', 'WARNING', or 'INFO' levels.
         """
+        self.incremental_prompt = self.security_prompt + """
+        You are continuing an ongoing analysis. The previous findings are given first,
+        followed by only the NEW log lines. Update the findings instead of repeating them.
+        """
+        # Running findings per source, so streamed batches build on each other
+        self.findings = {}
+
+    def analyze_text(self, log_text, source):
+        """Sends a block of log text to the AI and prints the analysis."""
+        print(f"{Colors.CYAN}AI is analyzing {source} for threats...{Colors.RESET}")
+        analysis = self.ai.get_completion(self.security_prompt, log_text)
+
+        print(f"\n{Colors.BOLD}🛡️ AI SECURITY ANALYSIS{Colors.RESET}")
+        print(f"{Colors.BLUE}Target:{Colors.RESET} {source}")
+        print("-" * 30)
+        print(analysis)
+        return analysis
 
     def analyze_file(self, file_path, lines=50):
         """Reads a log file and sends the tail to the AI for analysis."""
@@ -18,13 +35,38 @@ class LogAnalyzer:
             with open(file_path, 'r') as f:
                 content = f.readlines()[-lines:]
                 log_text = "".join(content)
-            
-            print(f"{Colors.CYAN}AI is analyzing {file_path} for threats...{Colors.RESET}")
-            analysis = self.ai.get_completion(self.security_prompt, log_text)
-            
-            print(f"\n{Colors.BOLD}🛡️ AI SECURITY ANALYSIS{Colors.RESET}")
-            print(f"{Colors.BLUE}Target:{Colors.RESET} {file_path}")
-            print("-" * 30)
-            print(analysis)
+            return self.analyze_text(log_text, file_path)
         except FileNotFoundError:
-            print(f"{Colors.FAIL}Error: Log file not found at {file_path}{Colors.RESET}")
\ No newline at end of file
+            print(f"{Colors.FAIL}Error: Log file not found at {file_path}{Colors.RESET}")
+
+    def analyze_stream(self, entries, source, batch_lines=200, formatter=str):
+        """
+        Incrementally analyzes a stream of log entries.
+        Entries are batched, and each batch is sent together with the findings
+        so far, so only new lines ever travel to the AI.
+        """
+        batch = []
+        for entry in entries:
+            batch.append(formatter(entry))
+            if len(batch) >= batch_lines:
+                self._analyze_batch(batch, source)
+                batch = []
+        if batch:
+            self._analyze_batch(batch, source)
+        elif source not in self.findings:
+            print(f"{Colors.WARNING}No new log entries to analyze for {source}.{Colors.RESET}")
+        return self.findings.get(source)
+
+    def _analyze_batch(self, lines, source):
+        previous = self.findings.get(source)
+        if previous:
+            prompt = f"PREVIOUS FINDINGS:\n{previous}\n\nNEW LOG LINES:\n" + "\n".join(lines)
+            analysis = self.ai.get_completion(self.incremental_prompt, prompt)
+        else:
+            analysis = self.ai.get_completion(self.security_prompt, "\n".join(lines))
+
+        self.findings[source] = analysis
+        print(f"\n{Colors.BOLD}🛡️ AI SECURITY ANALYSIS{Colors.RESET} ({len(lines)} new lines)")
+        print(f"{Colors.BLUE}Target:{Colors.RESET} {source}")
+        print("-" * 30)
+        print(analysis)
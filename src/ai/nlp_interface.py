@@ -1,14 +1,15 @@
 import json
 import re
 import os
-from ai.groq_client import GroqAIClient
+import time
+from ai.providers import get_provider
 from ai.nlp_utils import SynonymResolver
 from utils.colors import Colors
 
 
 class NLPInterface:
     def __init__(self):
-        self.ai = GroqAIClient()
+        self.ai = get_provider()
         self.resolver = SynonymResolver()
 
         # Define allowed actions (whitelist)
@@ -18,6 +19,9 @@ class NLPInterface:
             "MONITOR_DISK",
             "MONITOR_SUMMARY",
             "MONITOR_DASHBOARD",
+            "PROCESS_LIST",
+            "CGROUP_USAGE",
+            "METRIC_HISTORY",
             "LIST_FILES",
             "MOVE_DIR",
             "MOVE_AND_LIST",
@@ -31,25 +35,43 @@ class NLPInterface:
         }
 
         self.ALLOWED_RISK_LEVELS = {"GREEN", "YELLOW", "RED"}
+        self.MAX_PLAN_STEPS = 8
+        self._prefix = None
+        self._prefix_actions = None
 
-    def _get_system_prompt(self, current_dir):
-        """Generates a prompt injected with real-time system context."""
-        return f"""
+    def _prompt_prefix(self):
+        """
+        Static part of the system prompt. It only changes when the action
+        whitelist does, so providers with prompt caching can reuse it; the
+        actions are sorted because set order differs between runs.
+        """
+        actions = tuple(sorted(self.ALLOWED_ACTIONS))
+        if self._prefix_actions != actions:
+            self._prefix_actions = actions
+            self._prefix = f"""
         You are the NetMon-AI Lead Architect. Output ONLY valid JSON.
 
-        ### CURRENT CONTEXT:
-        - Operating System: {os.name}
-        - Current Directory: {current_dir}
-
         ### PROTOCOL:
         1. Assign a RISK_LEVEL: GREEN (Read-only/Safe), YELLOW (Non-destructive changes), RED (Critical/Destructive).
-        2. Handle multi-step commands: "Go to X and list files" -> action: "MOVE_AND_LIST".
+        2. Compound requests ("check cpu and ping X") -> return a PLAN (format below), one step per action.
         3. Sanitization: Do not include extra quotes or backslashes in paths.
-        4. ONLY use actions from this list: {', '.join(self.ALLOWED_ACTIONS)}
+        4. ONLY use actions from this list: {', '.join(actions)}
+        5. Questions the SYSTEM SNAPSHOT below already answers ("why is the box slow?") -> action UNKNOWN
+           with a short "message" explaining the answer from the snapshot.
+        6. Questions about the past ("what was CPU at 3am?") -> METRIC_HISTORY. target is one of cpu, mem,
+           disk, load, net_sent, net_recv; value is "START..END" in ISO local time (use the Local Time below)
+           or a lookback such as "6h", "30m", "2d".
+        7. Which container, pod, service or slice is using resources -> CGROUP_USAGE. value is "cpu" or
+           "memory" (what to rank by); target is a name filter ("nginx", "docker") or "none".
 
         ### REQUIRED JSON FORMAT:
         {{"action": "ACTION_NAME", "target": "target_path_or_name", "value": "value_or_none", "risk_level": "GREEN|YELLOW|RED"}}
 
+        ### PLAN FORMAT (only for compound requests):
+        {{"plan": [{{"id": 1, "action": "ACTION_NAME", "target": "...", "value": "...", "risk_level": "...", "depends_on": []}}, ...]}}
+        - depends_on lists earlier step ids that must finish first; steps without dependencies run in parallel.
+        - At most {self.MAX_PLAN_STEPS} steps.
+
         ### EXAMPLES:
         User: "Show me CPU usage"
         Response: {{"action": "MONITOR_CPU", "target": "none", "value": "none", "risk_level": "GREEN"}}
@@ -59,6 +81,32 @@ class NLPInterface:
 
         User: "Kill process 1234"
         Response: {{"action": "KILL_PROC", "target": "1234", "value": "none", "risk_level": "RED"}}
+
+        User: "How was memory over the last 6 hours?"
+        Response: {{"action": "METRIC_HISTORY", "target": "mem", "value": "6h", "risk_level": "GREEN"}}
+
+        User: "Which container is eating memory?"
+        Response: {{"action": "CGROUP_USAGE", "target": "none", "value": "memory", "risk_level": "GREEN"}}
+
+        User: "Why is the system slow?"
+        Response: {{"action": "UNKNOWN", "target": "none", "value": "none", "risk_level": "GREEN", "message": "chrome (pid 812) is using 95% CPU; load is 3.9 on 4 CPUs."}}
+
+        User: "Go to /var/log, list the files and check memory"
+        Response: {{"plan": [{{"id": 1, "action": "MOVE_DIR", "target": "/var/log", "value": "none", "risk_level": "GREEN", "depends_on": []}}, {{"id": 2, "action": "LIST_FILES", "target": "none", "value": "none", "risk_level": "GREEN", "depends_on": [1]}}, {{"id": 3, "action": "MONITOR_MEM", "target": "none", "value": "none", "risk_level": "GREEN", "depends_on": []}}]}}
+        """
+        return self._prefix
+
+    def _get_system_prompt(self, current_dir, snapshot=""):
+        """Static prefix plus a small dynamic suffix with real-time system context."""
+        snapshot = (snapshot or "- (not available)").replace("\n", "\n        ")
+        return self._prompt_prefix() + f"""
+        ### CURRENT CONTEXT:
+        - Operating System: {os.name}
+        - Current Directory: {current_dir}
+        - Local Time: {time.strftime("%Y-%m-%dT%H:%M")}
+
+        ### SYSTEM SNAPSHOT:
+        {snapshot}
         """
 
     def _validate_intent(self, intent):
@@ -104,13 +152,125 @@ class NLPInterface:
 
         return True, None
 
-    def process_query(self, user_query):
+    def _validate_plan(self, plan):
+        """
+        Validates a multi-step plan. Every step must be a valid intent and may
+        only depend on earlier steps, which keeps the graph acyclic.
+        Returns (steps, error_message).
+        """
+        if not isinstance(plan, list) or not plan:
+            return None, "Plan must be a non-empty list"
+        if len(plan) > self.MAX_PLAN_STEPS:
+            return None, f"Plan has {len(plan)} steps (max {self.MAX_PLAN_STEPS})"
+
+        steps, seen = [], set()
+        for n, step in enumerate(plan, 1):
+            if not isinstance(step, dict):
+                return None, f"Step {n} is not an object"
+            is_valid, error = self._validate_intent(step)
+            if not is_valid:
+                return None, f"Step {n}: {error}"
+            step_id = step.get("id", n)
+            if not isinstance(step_id, int) or step_id in seen:
+                return None, f"Step {n}: id must be a unique integer"
+            depends_on = step.get("depends_on") or []
+            if not isinstance(depends_on, list) or any(d not in seen for d in depends_on):
+                return None, f"Step {n}: depends_on may only reference earlier steps"
+            seen.add(step_id)
+            steps.append(dict(step, id=step_id, depends_on=depends_on))
+        return steps, None
+
+    def _plan_intent(self, plan):
+        """Wraps validated plan steps as a single PLAN intent (or unwraps a one-step plan)."""
+        steps, error = self._validate_plan(plan)
+        if error:
+            print(f"{Colors.FAIL}AI plan validation failed: {error}{Colors.RESET}")
+            return {
+                "action": "UNKNOWN",
+                "target": "none",
+                "value": "none",
+                "message": f"Invalid AI plan: {error}",
+                "risk_level": "RED",
+            }
+        if len(steps) == 1:
+            step = dict(steps[0])
+            step.pop("id", None)
+            step.pop("depends_on", None)
+            return step
+        risks = [s["risk_level"] for s in steps]
+        worst = "RED" if "RED" in risks else "YELLOW" if "YELLOW" in risks else "GREEN"
+        return {"action": "PLAN", "target": "none", "value": "none", "risk_level": worst, "steps": steps}
+
+    def classify_locally(self, text):
+        """
+        Cheap keyword classifier for common monitoring queries. Used as the
+        fallback when the AI returns no JSON, and before the AI call to guess
+        which collectors to prefetch. Returns an intent or None.
+        """
+        q = text.lower()
+        metrics = 0
+        if any(k in q for k in ["ram", "memory", "mem"]):
+            metrics += 1
+        if "cpu" in q:
+            metrics += 1
+        if any(k in q for k in ["disk", "storage"]):
+            metrics += 1
+
+        # Per container / systemd unit, not the host-wide figure
+        if re.search(r"\b(containers?|docker|podman|cgroups?|slices?|pods?|k8s|kubernetes)\b", q):
+            sort = "memory" if any(k in q for k in ["ram", "memory", "mem"]) else "cpu"
+            return {"action": "CGROUP_USAGE", "target": "none", "value": sort, "risk_level": "GREEN"}
+
+        # Past tense or a time window: the recorded history, not a live reading
+        if metrics == 1 and re.search(r"\b(was|were|history|trend|yesterday|overnight|ago|last (night|hour|day|week|\d+\s*\w+))\b"
+                                      r"|\bat \d{1,2}(:\d\d)?\s*(am|pm)\b", q):
+            metric = "mem" if any(k in q for k in ["ram", "memory", "mem"]) else "cpu" if "cpu" in q else "disk"
+            return {"action": "METRIC_HISTORY", "target": metric, "value": self._lookback(q), "risk_level": "GREEN"}
+
+        if metrics >= 2:
+            # Multi-metric summary
+            return {"action": "MONITOR_SUMMARY", "target": "none", "value": "none", "risk_level": "GREEN"}
+
+        # Explicit dashboard requests
+        if "dashboard" in q or any(phrase in q for phrase in ["open dashboard", "show dashboard", "live dashboard", "full dashboard", "open live dashboard", "show live dashboard"]):
+            return {"action": "MONITOR_DASHBOARD", "target": "none", "value": "none", "risk_level": "GREEN"}
+
+        if any(k in q for k in ["ram", "memory", "mem"]):
+            return {"action": "MONITOR_MEM", "target": "none", "value": "none", "risk_level": "GREEN"}
+        if "cpu" in q:
+            return {"action": "MONITOR_CPU", "target": "none", "value": "none", "risk_level": "GREEN"}
+        if any(k in q for k in ["disk", "storage"]):
+            return {"action": "MONITOR_DISK", "target": "none", "value": "none", "risk_level": "GREEN"}
+        if any(k in q for k in ["list", "ls", "dir", "files"]):
+            # try to extract a path after 'in' or 'at'
+            m = re.search(r'(?:in|at)\s+([\w\./\\:-]+)', text, re.IGNORECASE)
+            tgt = m.group(1) if m else "none"
+            return {"action": "LIST_FILES", "target": tgt, "value": "none", "risk_level": "GREEN"}
+        return None
+
+    @staticmethod
+    def _lookback(q):
+        """'last 3 hours' -> '3h', 'last hour' -> '1h'; anything else (yesterday, 3am) -> '24h'."""
+        m = re.search(r"last (\d+)\s*(m|min|minutes?|h|hours?|d|days?)\b", q)
+        if m:
+            return m.group(1) + m.group(2)[0]
+        m = re.search(r"last (hour|day|week)\b", q)
+        if m:
+            return {"hour": "1h", "day": "1d", "week": "7d"}[m.group(1)]
+        return "24h"
+
+    def process_query(self, user_query, prefetch=None, context=None):
         # 1. Normalize query
         normalized = self.resolver.normalize_text(user_query)
 
-        # 2. Inject Context
+        # Let the caller warm likely collectors while the AI call is in flight
+        guess = self.classify_locally(normalized)
+        if prefetch is not None:
+            prefetch(normalized, guess)
+
+        # 2. Inject Context (context() returns the cached system snapshot)
         cwd = os.getcwd()
-        system_prompt = self._get_system_prompt(cwd)
+        system_prompt = self._get_system_prompt(cwd, context() if context else "")
 
         print(f"{Colors.CYAN}Analyzing intent at {cwd}...{Colors.RESET}")
 
@@ -151,6 +311,8 @@ class NLPInterface:
             
             if json_text:
                 intent = json.loads(json_text)
+                if isinstance(intent, dict) and "plan" in intent:
+                    return self._plan_intent(intent["plan"])
 
                 # VALIDATE INTENT
                 is_valid, error = self._validate_intent(intent)
@@ -181,34 +343,8 @@ class NLPInterface:
                 }
 
             # Heuristic fallback for common queries
-            q = normalized.lower()
-            metrics = 0
-            if any(k in q for k in ["ram", "memory", "mem"]):
-                metrics += 1
-            if "cpu" in q:
-                metrics += 1
-            if any(k in q for k in ["disk", "storage"]):
-                metrics += 1
-
-            if metrics >= 2:
-                # Multi-metric summary
-                return {"action": "MONITOR_SUMMARY", "target": "none", "value": "none", "risk_level": "GREEN"}
-
-            # Explicit dashboard requests
-            if "dashboard" in q or any(phrase in q for phrase in ["open dashboard", "show dashboard", "live dashboard", "full dashboard", "open live dashboard", "show live dashboard"]):
-                return {"action": "MONITOR_DASHBOARD", "target": "none", "value": "none", "risk_level": "GREEN"}
-
-            if any(k in q for k in ["ram", "memory", "mem"]):
-                return {"action": "MONITOR_MEM", "target": "none", "value": "none", "risk_level": "GREEN"}
-            if "cpu" in q:
-                return {"action": "MONITOR_CPU", "target": "none", "value": "none", "risk_level": "GREEN"}
-            if any(k in q for k in ["disk", "storage"]):
-                return {"action": "MONITOR_DISK", "target": "none", "value": "none", "risk_level": "GREEN"}
-            if any(k in q for k in ["list", "ls", "dir", "files"]):
-                # try to extract a path after 'in' or 'at'
-                m = re.search(r'(?:in|at)\s+([\w\./\\:-]+)', normalized, re.IGNORECASE)
-                tgt = m.group(1) if m else "none"
-                return {"action": "LIST_FILES", "target": tgt, "value": "none", "risk_level": "GREEN"}
+            if guess:
+                return guess
 
             # Last resort: return UNKNOWN with the raw AI text
             return {
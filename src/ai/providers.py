@@ -0,0 +1,217 @@
+"""
+AI completion providers. Everything that talks to a model goes through
+get_completion(system_prompt, user_prompt, model=None) and returns the text,
+or a string starting with "Error"/"API Error" on failure, so callers never
+need to know which backend answered.
+
+Select one with NETMON_AI_PROVIDER:
+  groq      Groq cloud API (default when an API key is installed)
+  local     OpenAI-compatible server on localhost (llama.cpp server, Ollama, vLLM)
+            at NETMON_AI_LOCAL_URL (default http://127.0.0.1:8080/v1), model NETMON_AI_LOCAL_MODEL
+  llamacpp  In-process quantized GGUF model at NETMON_AI_MODEL_PATH (needs llama-cpp-python)
+  auto      groq if a key is installed, else local if a server answers, else groq (default)
+"""
+import http.client
+import json
+import os
+import threading
+import urllib.parse
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from utils.perf import timed
+
+DEFAULT_LOCAL_URL = "http://127.0.0.1:8080/v1"
+
+# One instance per provider and process, so the shell's NLP and log analyzer
+# share a client (and an in-process model is only loaded once)
+_providers = {}
+
+
+class CompletionProvider(ABC):
+    """Base class for completion backends."""
+    name = "base"
+
+    @abstractmethod
+    def get_completion(self, system_prompt, user_prompt, model=None):
+        """The completion text, or a string starting with "Error"/"API Error"."""
+
+    def get_completions(self, requests, max_workers=4):
+        """
+        Answers several (system_prompt, user_prompt) pairs, results in order.
+        Requests are sent concurrently; servers with parallel slots batch them.
+        """
+        requests = list(requests)
+        if len(requests) <= 1 or max_workers <= 1:
+            return [self.get_completion(*r) for r in requests]
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(requests))) as pool:
+            return list(pool.map(lambda r: self.get_completion(*r), requests))
+
+    def warm(self):
+        """Loads whatever the first real request would otherwise wait for."""
+        pass
+
+
+class LocalAIClient(CompletionProvider):
+    """
+    OpenAI-compatible chat completions on a local server, over plain http.client
+    with one keep-alive connection per thread. The model stays resident in the
+    server; the model names callers pass for Groq are ignored in favour of
+    NETMON_AI_LOCAL_MODEL.
+    """
+    name = "local"
+
+    def __init__(self, base_url=None, model=None, timeout=120.0, api_key=None):
+        self.base_url = (base_url or os.environ.get("NETMON_AI_LOCAL_URL") or DEFAULT_LOCAL_URL).rstrip("/")
+        self.model = model or os.environ.get("NETMON_AI_LOCAL_MODEL", "local")
+        self.timeout = timeout
+        self.api_key = api_key or os.environ.get("NETMON_AI_LOCAL_KEY")
+        url = urllib.parse.urlsplit(self.base_url)
+        self._https = url.scheme == "https"
+        self._host = url.hostname or "127.0.0.1"
+        self._port = url.port or (443 if self._https else 80)
+        self._path = url.path
+        self._local = threading.local()
+
+    def _connect(self, timeout=None):
+        cls = http.client.HTTPSConnection if self._https else http.client.HTTPConnection
+        return cls(self._host, self._port, timeout=timeout or self.timeout)
+
+    def _request(self, method, path, payload=None):
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        body = json.dumps(payload).encode() if payload is not None else None
+        for attempt in (1, 2):
+            conn = getattr(self._local, "conn", None)
+            if conn is None:
+                conn = self._local.conn = self._connect()
+            try:
+                conn.request(method, self._path + path, body, headers)
+                response = conn.getresponse()
+                data = response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # The server closed an idle keep-alive connection; reconnect once
+                conn.close()
+                self._local.conn = None
+                if attempt == 2:
+                    raise
+            except Exception:
+                conn.close()
+                self._local.conn = None
+                raise
+        if response.status != 200:
+            raise RuntimeError(f"HTTP {response.status}: {data[:200].decode(errors='replace')}")
+        return json.loads(data)
+
+    def available(self, timeout=0.5):
+        """True if a server answers on the models endpoint."""
+        conn = self._connect(timeout)
+        try:
+            conn.request("GET", self._path + "/models")
+            return conn.getresponse().status == 200
+        except (OSError, http.client.HTTPException):
+            return False
+        finally:
+            conn.close()
+
+    @timed("ai.local")
+    def get_completion(self, system_prompt, user_prompt, model=None, max_tokens=1024):
+        try:
+            reply = self._request("POST", "/chat/completions", {
+                "model": self.model,
+                "messages": [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt},
+                ],
+                "temperature": 0.2,
+                "max_tokens": max_tokens,
+            })
+            return reply["choices"][0]["message"]["content"]
+        except Exception as e:
+            return f"API Error: local AI server at {self.base_url}: {e}"
+
+    def warm(self):
+        # A one-token request makes the server load the model and open our connection
+        self.get_completion("You are a health check.", "ping", max_tokens=1)
+
+
+class LlamaCppClient(CompletionProvider):
+    """
+    Quantized GGUF model loaded into this process with llama-cpp-python.
+    Best used from the daemon, which keeps the model resident between calls.
+    One model context cannot run two generations at once, so calls are serialized.
+    """
+    name = "llamacpp"
+
+    def __init__(self, model_path=None, n_ctx=4096, n_threads=None):
+        self.model_path = model_path or os.environ.get("NETMON_AI_MODEL_PATH")
+        self.llm = None
+        self._lock = threading.Lock()
+        try:
+            from llama_cpp import Llama
+        except ImportError:
+            print("Error: 'llama-cpp-python' is not installed. Run 'pip install llama-cpp-python'")
+            return
+        if not self.model_path or not os.path.exists(self.model_path):
+            print(f"Error: local model not found (set NETMON_AI_MODEL_PATH, got {self.model_path!r})")
+            return
+        try:
+            self.llm = Llama(model_path=self.model_path, n_ctx=n_ctx, n_threads=n_threads, verbose=False)
+        except Exception as e:
+            print(f"Error loading local model {self.model_path}: {e}")
+
+    @timed("ai.llamacpp")
+    def get_completion(self, system_prompt, user_prompt, model=None, max_tokens=1024):
+        if self.llm is None:
+            return "Error: local model not loaded. Check NETMON_AI_MODEL_PATH."
+        with self._lock:
+            try:
+                reply = self.llm.create_chat_completion(
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt},
+                    ],
+                    temperature=0.2,
+                    max_tokens=max_tokens,
+                )
+            except Exception as e:
+                return f"API Error: {e}"
+        return reply["choices"][0]["message"]["content"]
+
+    def get_completions(self, requests, max_workers=1):
+        # Threads would only queue on the lock
+        return [self.get_completion(*r) for r in requests]
+
+    def warm(self):
+        self.get_completion("You are a health check.", "ping", max_tokens=1)
+
+
+def _create(name):
+    if name == "local":
+        return LocalAIClient()
+    if name == "llamacpp":
+        return LlamaCppClient()
+    if name == "groq":
+        from ai.groq_client import GroqAIClient
+        return GroqAIClient()
+    if name == "auto":
+        try:
+            from ai.groq_client import GroqAIClient
+        except ImportError:
+            return LocalAIClient()  # groq SDK not installed: offline host
+        if GroqAIClient.load_api_key():
+            return GroqAIClient()
+        local = LocalAIClient()
+        if local.available():
+            return local
+        return GroqAIClient()  # Prints the setup instructions
+    raise ValueError(f"unknown AI provider: {name} (expected groq, local, llamacpp or auto)")
+
+
+def get_provider(name=None):
+    """Returns the shared provider named by NETMON_AI_PROVIDER (or name)."""
+    name = (name or os.environ.get("NETMON_AI_PROVIDER") or "auto").lower()
+    if name not in _providers:
+        _providers[name] = _create(name)
+    return _providers[name]
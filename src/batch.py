@@ -0,0 +1,475 @@
+"""
+Non-interactive entry point (netmon-ai -c / --batch) emitting JSON envelopes.
+Skips the banner, Rich and the AI layer; collectors are imported on first use.
+"""
+import contextlib
+import json
+import os
+import shlex
+import socket
+import struct
+import sys
+import time
+from utils.helpers import json_default
+
+USAGE = """Usage: netmon-ai [-c "<command>"]... [--batch FILE|-] [--format json|ndjson] [--interval SECONDS]
+                 [--socket PATH] [--local]
+       netmon-ai --daemon [--socket PATH]
+
+Commands:
+  metrics                                    CPU, memory, disk and network counters
+  processes [--limit N] [--sort cpu|memory]  Top processes
+  disks                                      Usage and inodes per mount, I/O rates and await per disk
+  cgroups [--sort cpu|memory] [--limit N] [--match NAME] [--pids]
+                                             CPU, memory and I/O per container / systemd unit (cgroup v2)
+  connections [--state S] [--port P] [--proc NAME] [--remote IP|PREFIX.] [--proto P] [--fast]
+  integrity [--quick]                        Verify registered file hashes (--quick trusts unchanged stat
+                                             and fingerprint instead of re-hashing)
+  users [--group G] [--shell S] [--uid N] [--login]
+                                             Accounts with groups, password state and last login
+  users-audit [--inactive DAYS]              Account findings (uid 0, empty passwords, idle accounts, ...)
+  intent <question>                          Classify a question with the AI (never executes it)
+  history [METRIC] [--since 1h] [--until T] [--resolution 1s|1m|1h] [--points]
+                                             Recorded min/avg/max and peak time of a metric
+  perf [--prefix P] [--reset]                Latency histograms (p50/p95/p99) of the process that ran the commands
+  status                                     Daemon pid, uptime, request count, anomalies and integrity
+                                             watch state (daemon only)
+
+When a daemon is listening on the socket, commands are forwarded to it and run
+against its warm caches; --local forces in-process execution.
+
+Exit status: 0 success, 1 a command failed or integrity problems were found, 2 usage error.
+--interval is the CPU sampling window used for cpu percentages (default 0.1, 0 disables)."""
+
+# Commands whose output includes CPU percentages that need a sampling window
+_CPU_COMMANDS = {"metrics", "processes"}
+
+
+class BatchError(Exception):
+    pass
+
+
+def default_socket_path():
+    """
+    $NETMON_AI_SOCKET, else /run for root, else the user's runtime dir (a
+    per-uid /tmp path without one). None where there are no uids (Windows).
+    """
+    path = os.environ.get("NETMON_AI_SOCKET")
+    if path:
+        return path
+    if not hasattr(os, "getuid"):
+        return None
+    if os.getuid() == 0:
+        return "/run/netmon-ai.sock"
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime:
+        return os.path.join(runtime, "netmon-ai.sock")
+    return f"/tmp/netmon-ai-{os.getuid()}.sock"
+
+
+def _options(args, flags=(), switches=()):
+    """Parses '--name value' and bare '--switch' arguments into a dict."""
+    opts = {}
+    it = iter(args)
+    for arg in it:
+        name = arg.lstrip("-")
+        if arg.startswith("--") and name in switches:
+            opts[name] = True
+        elif arg.startswith("--") and name in flags:
+            value = next(it, None)
+            if value is None:
+                raise BatchError(f"{arg} needs a value")
+            opts[name] = value
+        else:
+            raise BatchError(f"unknown option: {arg}")
+    return opts
+
+
+class BatchRunner:
+    """Runs shell commands and returns JSON-serializable results."""
+    def __init__(self, interval=0.1):
+        self.interval = interval
+        self._primed = False
+        self._monitor = None
+        self._integrity = None
+        self._integrity_mtime = None
+        self._connections = None
+        self._nlp = None
+        self._history = None
+        self._filesystems = None
+        self._cgroups = None
+        self._users = None
+        # Set by a background sampler (daemon mode) to report a steady CPU window
+        self.cpu_sample = None
+        self.handlers = {
+            "metrics": self.metrics,
+            "processes": self.processes,
+            "disks": self.disks,
+            "cgroups": self.cgroups,
+            "connections": self.connections,
+            "integrity": self.integrity,
+            "users": self.users,
+            "users-audit": self.users_audit,
+            "intent": self.intent,
+            "history": self.history,
+            "perf": self.perf,
+        }
+
+    def prime(self, commands):
+        """
+        psutil reports CPU usage relative to the previous call, so the first
+        reading is meaningless. Take one baseline for the whole run and wait
+        a single interval, instead of sampling once per command.
+        """
+        if self._primed or self.interval <= 0:
+            return
+        if not any(cmd and cmd[0].lower() in _CPU_COMMANDS for cmd in commands):
+            return
+        import psutil
+        started = time.monotonic()
+        psutil.cpu_percent(interval=None)
+        if any(cmd and cmd[0].lower() == "processes" for cmd in commands):
+            from core.process_manager import ProcessManager
+            ProcessManager.process_table.snapshot()  # Tick baseline for per-process CPU
+        time.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+        self._primed = True
+
+    def warm(self):
+        """Builds every cheap collector up front (used by the daemon)."""
+        self.prime([["metrics"], ["processes"]])
+        from core.monitoring import SystemMonitor
+        from core.connection_table import ConnectionTable
+        self._monitor = self._monitor or SystemMonitor()
+        self._connections = self._connections or ConnectionTable()
+        self._load_integrity()
+        # Offline backends keep their model loaded here instead of on the first 'intent'
+        if os.environ.get("NETMON_AI_PROVIDER", "").lower() in ("local", "llamacpp"):
+            with contextlib.redirect_stdout(sys.stderr):
+                self._nlp_interface().ai.warm()
+
+    def _load_integrity(self):
+        """(Re)loads the integrity DB when it changed, e.g. after 'register' in the shell."""
+        from core.integrity import IntegrityMonitor
+
+        def db_mtime(path):
+            try:
+                return os.path.getmtime(path)
+            except OSError:
+                return None
+
+        if self._integrity is None:
+            self._integrity = IntegrityMonitor()
+            self._integrity_mtime = db_mtime(self._integrity.db_path)
+        elif db_mtime(self._integrity.db_path) != self._integrity_mtime:
+            self._integrity = IntegrityMonitor(self._integrity.db_path)
+            self._integrity_mtime = db_mtime(self._integrity.db_path)
+        return self._integrity
+
+    def execute(self, parts):
+        """Runs one tokenized command and returns its envelope."""
+        name = parts[0].lower() if parts else ""
+        envelope = {"cmd": " ".join(parts), "ok": True, "ts": round(time.time(), 3)}
+        handler = self.handlers.get(name)
+        try:
+            if handler is None:
+                raise BatchError(f"unknown command: {name or '(empty)'}")
+            envelope["data"] = handler(parts[1:])
+        except Exception as e:
+            envelope["ok"] = False
+            envelope["error"] = str(e) if isinstance(e, BatchError) else f"{type(e).__name__}: {e}"
+        return envelope
+
+    # --- COMMANDS ---
+
+    def metrics(self, args):
+        _options(args)
+        if self._monitor is None:
+            from core.monitoring import SystemMonitor
+            self._monitor = SystemMonitor()
+        metrics = self._monitor.get_metrics()
+        if self.cpu_sample is not None:
+            metrics["cpu"] = self.cpu_sample
+        return metrics
+
+    def processes(self, args):
+        opts = _options(args, flags=("limit", "sort"))
+        try:
+            limit = int(opts.get("limit", 10))
+        except ValueError:
+            raise BatchError("--limit must be a number")
+        from core.process_manager import ProcessManager
+        return ProcessManager.list_processes(limit=limit, sort_by=opts.get("sort", "cpu"))
+
+    def disks(self, args):
+        _options(args)
+        if self._filesystems is None:
+            from core.filesystems import FilesystemMonitor
+            self._filesystems = FilesystemMonitor()
+        return self._filesystems.snapshot()
+
+    def cgroups(self, args):
+        opts = _options(args, flags=("sort", "limit", "match"), switches=("pids",))
+        try:
+            limit = int(opts.get("limit", 20))
+        except ValueError:
+            raise BatchError("--limit must be a number")
+        if opts.get("sort", "cpu") not in ("cpu", "memory"):
+            raise BatchError("--sort must be cpu or memory")
+        if self._cgroups is None:
+            from core.cgroups import CgroupMonitor
+            self._cgroups = CgroupMonitor()
+        data = self._cgroups.snapshot(top_processes=opts.get("pids", False))
+        if not data["available"]:
+            raise BatchError(f"no cgroup v2 hierarchy at {data['root']} (set NETMON_CGROUP_ROOT)")
+        match = opts.get("match", "").lower()
+        rows = [r for r in data["groups"] if match in r.path.lower() or match in r.name.lower()]
+        key = (lambda r: r.memory or 0) if opts.get("sort") == "memory" else (lambda r: r.cpu_percent)
+        rows = sorted(rows, key=key, reverse=True)[:limit]
+        if opts.get("pids"):
+            return [dict(r.to_dict(), top_process=data["top_processes"].get(r.path)) for r in rows]
+        return rows
+
+    def connections(self, args):
+        opts = _options(args, flags=("state", "port", "proc", "remote", "proto"), switches=("fast",))
+        if self._connections is None:
+            from core.connection_table import ConnectionTable
+            self._connections = ConnectionTable()
+        table = self._connections
+        fast = opts.pop("fast", False)
+        if "port" in opts and not opts["port"].isdigit():
+            raise BatchError("--port must be a number")
+        if fast and opts.get("proc"):
+            raise BatchError("--proc needs process attribution and cannot be combined with --fast")
+        rows = table.filter(table.snapshot(attribute_processes=not fast), **opts)
+        result = []
+        for row in rows:
+            item = row._asdict()
+            if not fast:
+                item["process"] = table.process_name(row.pid) if row.pid else None
+            result.append(item)
+        return result
+
+    def integrity(self, args):
+        opts = _options(args, switches=("quick",))
+        files = self._load_integrity().verify_all(quick=opts.get("quick", False))
+        return {"intact": all(f["status"] == "SAFE" for f in files), "files": files}
+
+    def _inventory(self):
+        if self._users is None:
+            from core.user_manager import UserInventory
+            self._users = UserInventory()
+        if not self._users.available:
+            raise BatchError("the account inventory reads /etc/passwd and is not available on Windows")
+        return self._users
+
+    def users(self, args):
+        opts = _options(args, flags=("group", "shell", "uid"), switches=("login",))
+        try:
+            uid = int(opts["uid"]) if "uid" in opts else None
+        except ValueError:
+            raise BatchError("--uid must be a number")
+        return self._inventory().snapshot().filter(group=opts.get("group"), shell=opts.get("shell"), uid=uid,
+                                                   login=True if opts.get("login") else None)
+
+    def users_audit(self, args):
+        opts = _options(args, flags=("inactive",))
+        try:
+            inactive = int(opts.get("inactive", 90))
+        except ValueError:
+            raise BatchError("--inactive must be a number of days")
+        snapshot = self._inventory().snapshot()
+        return {"accounts": len(snapshot), "shadow_readable": snapshot.shadow_readable,
+                "lastlog_readable": snapshot.lastlog_readable, "findings": snapshot.audit(inactive_days=inactive)}
+
+    def intent(self, args):
+        if not args:
+            raise BatchError("usage: intent <question>")
+        # The AI layer prints progress and key warnings; keep stdout pure JSON
+        with contextlib.redirect_stdout(sys.stderr):
+            return self._nlp_interface().process_query(" ".join(args))
+
+    def history(self, args):
+        metric = "cpu"
+        if args and not args[0].startswith("--"):
+            metric, args = args[0], args[1:]
+        opts = _options(args, flags=("since", "until", "resolution"), switches=("points",))
+        from core.timeseries import TimeSeriesStore
+        if self._history is None:
+            self._history = TimeSeriesStore()
+        if metric not in self._history.metrics:
+            raise BatchError(f"unknown metric: {metric} (expected {', '.join(self._history.metrics)})")
+        if opts.get("resolution") not in (None, *(r[0] for r in self._history.resolutions)):
+            raise BatchError("--resolution must be 1s, 1m or 1h")
+        since = opts.get("since", "1h")
+        try:
+            start, end = TimeSeriesStore.parse_range(f"{since}..{opts['until']}" if opts.get("until") else since)
+        except ValueError as e:
+            raise BatchError(f"invalid time range: {e}")
+        summary = self._history.summary(metric, start, end, opts.get("resolution"))
+        if summary is not None and not opts.get("points"):
+            del summary["values"]
+        return summary
+
+    def _nlp_interface(self):
+        if self._nlp is None:
+            from ai.nlp_interface import NLPInterface
+            self._nlp = NLPInterface()
+        return self._nlp
+
+    def perf(self, args):
+        opts = _options(args, flags=("prefix",), switches=("reset",))
+        from utils.perf import PERF
+        stats = PERF.snapshot(opts.get("prefix"))
+        if opts.get("reset"):
+            PERF.reset()
+        return stats
+
+    def run(self, commands, out=sys.stdout, fmt="ndjson"):
+        """Runs tokenized commands in order, writing results. Returns the exit status."""
+        self.prime(commands)
+        return write_results((self.execute(parts) for parts in commands), out, fmt)
+
+
+def write_results(envelopes, out=sys.stdout, fmt="ndjson"):
+    """Writes envelopes as NDJSON (streamed) or one JSON document. Returns the exit status."""
+    status = 0
+    results = []
+    for envelope in envelopes:
+        if not envelope["ok"] or (isinstance(envelope.get("data"), dict) and envelope["data"].get("intact") is False):
+            status = 1
+        if fmt == "ndjson":
+            out.write(json.dumps(envelope, default=json_default) + "\n")
+            out.flush()
+        else:
+            results.append(envelope)
+    if fmt == "json":
+        doc = results[0] if len(results) == 1 else results
+        out.write(json.dumps(doc, default=json_default) + "\n")
+    return status
+
+
+def _peer_uid(sock, socket_path):
+    """Uid of the process listening on the socket (SO_PEERCRED), else of the socket file if owner-only."""
+    if hasattr(socket, "SO_PEERCRED"):
+        _, uid, _ = struct.unpack("3i", sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")))
+        return uid
+    st = os.stat(socket_path)
+    return st.st_uid if not st.st_mode & 0o077 else None
+
+
+def connect(socket_path, timeout=30.0):
+    """
+    Returns a socket connected to a running daemon, or None. The daemon must
+    run as this user or root: anyone can bind a /tmp path first and answer.
+    """
+    if not socket_path or not hasattr(socket, "AF_UNIX") or not os.path.exists(socket_path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(socket_path)
+        uid = _peer_uid(sock, socket_path)
+    except OSError:
+        sock.close()
+        return None
+    if uid not in (os.getuid(), 0):
+        sock.close()
+        print(f"netmon-ai: ignoring {socket_path}: not owned by this user (uid {uid}); running locally",
+              file=sys.stderr)
+        return None
+    return sock
+
+
+def forward(sock, commands):
+    """Sends commands to the daemon one at a time, yielding its envelopes."""
+    with sock, sock.makefile("rwb") as stream:
+        for parts in commands:
+            try:
+                stream.write(json.dumps({"argv": parts}).encode() + b"\n")
+                stream.flush()
+                line = stream.readline()
+                if not line:
+                    raise ConnectionError("daemon closed the connection")
+                yield json.loads(line)
+            except (OSError, ValueError) as e:
+                yield {"cmd": " ".join(parts), "ok": False, "error": f"daemon: {e}"}
+
+
+def read_batch(path):
+    """Reads one command per line from a file ('-' for stdin), skipping blanks and # comments."""
+    stream = sys.stdin if path == "-" else open(path, "r")
+    try:
+        commands = []
+        for line in stream:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                commands.append(shlex.split(line))
+        return commands
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def main(argv):
+    commands = []
+    fmt = None
+    interval = 0.1
+    socket_path = None
+    local = False
+    serve = False
+    it = iter(argv)
+    try:
+        for arg in it:
+            if arg in ("-h", "--help"):
+                print(USAGE)
+                return 0
+            elif arg == "-c":
+                commands.append(shlex.split(next(it)))
+            elif arg == "--batch":
+                commands.extend(read_batch(next(it)))
+            elif arg == "--format":
+                fmt = next(it)
+                if fmt not in ("json", "ndjson"):
+                    raise BatchError(f"unknown format: {fmt}")
+            elif arg == "--interval":
+                interval = float(next(it))
+            elif arg == "--socket":
+                socket_path = next(it)
+            elif arg == "--local":
+                local = True
+            elif arg == "--daemon":
+                serve = True
+            else:
+                raise BatchError(f"unknown argument: {arg}")
+    except StopIteration:
+        print(f"netmon-ai: {arg} needs a value\n\n{USAGE}", file=sys.stderr)
+        return 2
+    except (BatchError, ValueError, OSError) as e:
+        print(f"netmon-ai: {e}\n\n{USAGE}", file=sys.stderr)
+        return 2
+    if serve:
+        socket_path = socket_path or default_socket_path()
+        if not socket_path or not hasattr(socket, "AF_UNIX"):
+            print("netmon-ai: the daemon needs Unix sockets (set --socket or NETMON_AI_SOCKET where supported)",
+                  file=sys.stderr)
+            return 1
+        from daemon import NetMonDaemon
+        try:
+            NetMonDaemon(socket_path).serve()
+        except (RuntimeError, OSError) as e:
+            print(f"netmon-ai: {e}", file=sys.stderr)
+            return 1
+        return 0
+    if not commands:
+        print(USAGE, file=sys.stderr)
+        return 2
+    # A single -c reads naturally as one JSON document; batches stream NDJSON
+    fmt = fmt or ("json" if len(commands) == 1 else "ndjson")
+    sock = None if local else connect(socket_path or default_socket_path())
+    if sock is not None:
+        return write_results(forward(sock, commands), fmt=fmt)
+    return BatchRunner(interval=interval).run(commands, fmt=fmt)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,234 @@
+"""
+Online anomaly detection over metric streams. Each series keeps an
+exponentially weighted mean/variance (O(1) per sample, a few floats of
+state) and, for long-lived series, one slow baseline per hour of day, so a
+nightly backup that always pegs the disk is expected while the same load at
+noon is not. A sample is anomalous when it is `threshold` deviations from
+the recent baseline and, once the seasonal slot has history, from that too.
+"""
+import json
+import math
+import os
+import threading
+import time
+from array import array
+from collections import deque
+from utils.helpers import RateLimiter
+
+_HOURS = 24
+
+
+class Series:
+    """Streaming statistics of one metric series."""
+    __slots__ = ("count", "mean", "var", "season", "streak", "active", "z", "seen", "value")
+
+    def __init__(self, seasonal=True):
+        self.count = 0
+        self.mean = 0.0
+        self.var = 0.0
+        # Per hour of day: mean, variance, sample count
+        self.season = array("d", [0.0]) * (_HOURS * 3) if seasonal else None
+        self.streak = 0
+        self.active = False
+        self.z = 0.0
+        self.seen = 0.0
+        self.value = 0.0
+
+    def to_list(self):
+        return [self.count, self.mean, self.var, list(self.season) if self.season is not None else None]
+
+    @classmethod
+    def from_list(cls, state):
+        series = cls(seasonal=state[3] is not None)
+        series.count, series.mean, series.var = state[0], state[1], state[2]
+        if state[3] is not None:
+            series.season = array("d", state[3])
+        return series
+
+
+class AnomalyDetector:
+    """
+    Flags values far from a series' own history instead of fixed 60/85%
+    limits. observe() takes a dict of {series: value} per tick; a series must
+    stay anomalous for `persist` samples to fire, fires once per episode, and
+    clears when it drops back under half the threshold. Anomalous samples are
+    clamped before updating the baseline, so a spike does not teach the
+    detector that spikes are normal. Series not seen for `expire` seconds
+    (exited processes, removed NICs) are dropped. Episodes over the alert
+    cap are queued and reported in order once the window allows.
+    """
+    def __init__(self, threshold=4.0, persist=3, half_life=300, season_half_life=3, warmup=60,
+                 season_warmup=1800, interval=1.0, expire=600, max_alerts_per_minute=20,
+                 state_path="data/anomaly_state.json"):
+        self.threshold = threshold
+        self.persist = persist
+        self.warmup = warmup
+        self.season_warmup = season_warmup
+        self.expire = expire
+        # Per-sample smoothing: recent baseline halves in half_life seconds,
+        # a seasonal slot (fed one hour a day) in season_half_life days
+        self.alpha = 1 - 0.5 ** (interval / half_life)
+        self.season_alpha = 1 - 0.5 ** (interval / (season_half_life * 3600))
+        self.state_path = os.path.abspath(state_path) if state_path else None
+        self.series = {}
+        self.callbacks = []
+        self.limiter = RateLimiter(max_alerts_per_minute)
+        self.deferred = deque()  # Anomalies waiting for the rate limit, oldest first
+        self.suppressed = 0  # Anomalies that had to wait
+        self._last_gc = 0.0
+        self._lock = threading.Lock()
+
+    def add_callback(self, fn):
+        """fn(anomaly dict) is called for every new anomaly episode."""
+        self.callbacks.append(fn)
+
+    @staticmethod
+    def _floor(mean):
+        # Deviations smaller than this are never anomalous (flat series have ~0 variance)
+        return max(0.5, abs(mean) * 0.05)
+
+    def _update(self, series, x, hour):
+        """Scores x against the series' baselines, then folds it in. Returns z or None while warming up."""
+        std = math.sqrt(series.var) + self._floor(series.mean)
+        z = (x - series.mean) / std if series.count >= self.warmup else None
+
+        season = series.season
+        zs = None
+        if season is not None:
+            i = hour * 3
+            s_mean, s_var, s_count = season[i], season[i + 1], season[i + 2]
+            s_std = math.sqrt(s_var) + self._floor(s_mean)
+            if s_count >= self.season_warmup:
+                zs = (x - s_mean) / s_std
+            # Clamp outliers before learning from them
+            limit = self.threshold * s_std
+            sx = min(max(x, s_mean - limit), s_mean + limit) if s_count >= self.season_warmup else x
+            s_alpha = max(self.season_alpha, 1.0 / (s_count + 1))
+            diff = sx - s_mean
+            season[i] = s_mean + s_alpha * diff
+            season[i + 1] = (1 - s_alpha) * (s_var + diff * s_alpha * diff)
+            season[i + 2] = s_count + 1
+
+        if z is not None:
+            limit = self.threshold * std
+            x = min(max(x, series.mean - limit), series.mean + limit)
+        # Plain average until the EWMA has enough samples to be meaningful
+        alpha = max(self.alpha, 1.0 / (series.count + 1))
+        diff = x - series.mean
+        series.mean += alpha * diff
+        series.var = (1 - alpha) * (series.var + diff * alpha * diff)
+        series.count += 1
+
+        if z is None:
+            return None
+        # Expected by either baseline means normal, so the smaller deviation wins
+        if zs is not None and abs(zs) < abs(z):
+            return zs
+        return z
+
+    def observe(self, samples, now=None, seasonal=True):
+        """Feeds one tick of {series: value}. Returns the anomalies reported now (queued ones included)."""
+        now = now or time.time()
+        hour = time.localtime(now).tm_hour
+        fired = []
+        with self._lock:
+            table = self.series
+            for name, value in samples.items():
+                series = table.get(name)
+                if series is None:
+                    series = table[name] = Series(seasonal)
+                series.seen = now
+                series.value = value
+                z = self._update(series, value, hour)
+                if z is None:
+                    continue
+                series.z = z
+                if abs(z) >= self.threshold:
+                    series.streak += 1
+                    if series.streak >= self.persist and not series.active:
+                        series.active = True
+                        fired.append(self._anomaly(name, series, now))
+                elif abs(z) < self.threshold / 2:
+                    series.streak = 0
+                    series.active = False
+            if now - self._last_gc >= 60:
+                self._gc(now)
+            # Behind any still waiting, so episodes are always reported in order
+            self.deferred.extend(fired)
+            sent = []
+            while self.deferred and self.limiter.allow(now):
+                sent.append(self.deferred.popleft())
+            self.suppressed += min(len(fired), len(self.deferred))  # The newest are the ones left
+        for anomaly in sent:
+            self._notify(anomaly)
+        return sent
+
+    def _anomaly(self, name, series, now):
+        direction = "spike" if series.z > 0 else "drop"
+        return {
+            "series": name,
+            "direction": direction,
+            "value": round(series.value, 3),
+            "expected": round(series.mean, 3),
+            "z": round(series.z, 1),
+            "epoch": round(now, 3),
+            "message": f"{name} {direction}: {series.value:.1f} vs usual {series.mean:.1f} ({series.z:+.1f} sd)",
+        }
+
+    def _notify(self, anomaly):
+        # A host-wide event can trip hundreds of process series at once; the limiter caps the fan-out
+        for fn in self.callbacks:
+            try:
+                fn(anomaly)
+            except Exception:
+                pass
+
+    def _gc(self, now):
+        self._last_gc = now
+        stale = [name for name, s in self.series.items() if now - s.seen > self.expire]
+        for name in stale:
+            del self.series[name]
+
+    def active(self, prefix=None):
+        """Anomalous series right now, worst first, as (name, value, expected, z)."""
+        with self._lock:
+            rows = [(name, s.value, s.mean, s.z) for name, s in self.series.items()
+                    if s.active and (prefix is None or name.startswith(prefix))]
+        return sorted(rows, key=lambda row: abs(row[3]), reverse=True)
+
+    def status(self, name):
+        """(active, z) for one series; z is 0.0 while it warms up."""
+        series = self.series.get(name)
+        return (series.active, series.z) if series is not None else (False, 0.0)
+
+    # --- PERSISTENCE ---
+
+    def save(self):
+        """Writes the seasonal series' baselines, so a restart does not relearn the daily cycle."""
+        if not self.state_path:
+            return
+        with self._lock:
+            state = {name: s.to_list() for name, s in self.series.items() if s.season is not None}
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.state_path)
+
+    def load(self):
+        if not self.state_path:
+            return
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        with self._lock:
+            for name, values in state.items():
+                try:
+                    series = Series.from_list(values)
+                except (TypeError, ValueError, IndexError):
+                    continue
+                series.seen = now
+                self.series[name] = series
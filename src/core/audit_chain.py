@@ -0,0 +1,363 @@
+import glob
+import hashlib
+import hmac
+import json
+import logging.handlers
+import os
+import re
+import secrets
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
+
+GENESIS = "0" * 64
+# Every chained line is '{"seq":N,"prev":"<64 hex>",...,"hash":"<64 hex>"}'
+_PREFIX = re.compile(rb'^\{"seq":(\d+),"prev":"([0-9a-f]{64})",')
+_SUFFIX_LEN = len(',"hash":"') + 64 + len('"}')
+SYSTEM_KEY = "/etc/netmon-ai/audit.key"
+
+
+def list_audit_files(log_file):
+    """Rotated audit files oldest first, then the live file."""
+    rotated = [p for p in glob.glob(log_file + ".*") if re.search(r"\.\d+$", p)]
+    rotated.sort(key=lambda p: int(p.rsplit(".", 1)[1]), reverse=True)
+    return rotated + ([log_file] if os.path.exists(log_file) else [])
+
+
+def default_key_path():
+    """
+    $NETMON_AUDIT_KEY, else the root-only package config directory, else the
+    user's config directory. Never data/: whoever can edit the logs there
+    could also re-sign the checkpoints.
+    """
+    path = os.environ.get("NETMON_AUDIT_KEY")
+    if path:
+        return path
+    if os.path.isdir(os.path.dirname(SYSTEM_KEY)) and os.access(os.path.dirname(SYSTEM_KEY), os.W_OK):
+        return SYSTEM_KEY
+    config = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(config, "netmon-ai", "audit.key")
+
+
+def inside(path, directory):
+    path, directory = os.path.realpath(path), os.path.realpath(directory)
+    return os.path.commonpath([path, directory]) == directory
+
+
+def _create_key(key_path, key):
+    os.makedirs(os.path.dirname(key_path) or ".", mode=0o700, exist_ok=True)
+    fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+
+
+def load_or_create_key(key_path, log_dir=None):
+    """
+    Returns the checkpoint signing key, creating a random one (mode 600) on
+    first use. Refuses to create it inside log_dir, next to what it signs.
+    """
+    if os.path.exists(key_path):
+        with open(key_path, "rb") as f:
+            return f.read()
+    if log_dir is not None and inside(key_path, log_dir):
+        raise ValueError(f"refusing to create the audit signing key {key_path} inside the audit log directory "
+                         f"{log_dir}; set NETMON_AUDIT_KEY to a path outside it")
+    key = secrets.token_bytes(32)
+    _create_key(key_path, key)
+    return key
+
+
+def sign_checkpoint(key, seq, digest):
+    return hmac.new(key, f"{seq}:{digest}".encode(), hashlib.sha256).hexdigest()
+
+
+def _split_line(line):
+    """Returns (seq, prev, body, digest) for a chained line, or None."""
+    m = _PREFIX.match(line)
+    if not m or len(line) < _SUFFIX_LEN or not line.endswith(b'"}'):
+        return None
+    tail = line[-_SUFFIX_LEN:]
+    if not tail.startswith(b',"hash":"'):
+        return None
+    body = line[:-_SUFFIX_LEN] + b"}"
+    return int(m.group(1)), m.group(2).decode(), body, tail[9:73].decode()
+
+
+def _last_record(path):
+    """Reads (seq, hash) of the last chained record in a file, if any."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(max(0, size - 65536))
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    for line in reversed(lines):
+        parts = _split_line(line)
+        if parts:
+            return parts[0], parts[3]
+    return None
+
+
+class HashChainHandler(logging.handlers.RotatingFileHandler):
+    """
+    Rotating file handler that links every record to the previous one.
+    Each line carries its sequence number, the previous record's hash and a
+    SHA-256 over its own bytes. Every `checkpoint_every` records an HMAC-signed
+    checkpoint of the chain head is appended to a separate file. Writers in
+    other processes are serialized with an advisory lock and the chain head is
+    re-read whenever the file changed underneath us.
+    """
+    def __init__(self, filename, checkpoint_file, key_path, checkpoint_every=1000, **kwargs):
+        key = load_or_create_key(key_path, os.path.dirname(os.path.abspath(filename)))  # Before opening any file
+        super().__init__(filename, encoding="utf-8", **kwargs)
+        self.checkpoint_file = checkpoint_file
+        self.key = key
+        self.checkpoint_every = checkpoint_every
+        self.seq = 0
+        self.head = GENESIS
+        self._known = None
+        self._lock_file = open(filename + ".lock", "a")
+        self.last_checkpoint = self._last_checkpoint_seq()
+
+    def _last_checkpoint_seq(self):
+        try:
+            with open(self.checkpoint_file, "rb") as f:
+                lines = f.read().splitlines()
+            return json.loads(lines[-1])["seq"] if lines else 0
+        except (OSError, ValueError, KeyError, IndexError):
+            return 0
+
+    def _interprocess_lock(self, exclusive=True):
+        if fcntl is not None:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_UN)
+
+    def _sync_head(self):
+        """Reloads seq/hash if another process appended or rotated since our last write."""
+        if self.stream is None:
+            self.stream = self._open()
+        try:
+            disk = os.stat(self.baseFilename)
+            ident = (disk.st_ino, disk.st_size)
+        except OSError:
+            ident = None
+        if ident is not None and os.fstat(self.stream.fileno()).st_ino != ident[0]:
+            # Rotated by someone else: follow the new live file
+            self.stream.close()
+            self.stream = self._open()
+        if ident == self._known:
+            return
+        for path in reversed(list_audit_files(self.baseFilename)):
+            last = _last_record(path)
+            if last:
+                self.seq, self.head = last
+                break
+
+    def emit(self, record):
+        try:
+            self._interprocess_lock()
+            try:
+                if self.shouldRollover(record):
+                    self.doRollover()
+                self._sync_head()
+                payload = record.getMessage()
+                body = '{"seq":%d,"prev":"%s",%s' % (self.seq + 1, self.head, payload[1:])
+                digest = hashlib.sha256(body.encode("utf-8")).hexdigest()
+                self.stream.write(body[:-1] + ',"hash":"%s"}\n' % digest)
+                self.stream.flush()
+                self.seq += 1
+                self.head = digest
+                st = os.fstat(self.stream.fileno())
+                self._known = (st.st_ino, st.st_size)
+                if self.seq - self.last_checkpoint >= self.checkpoint_every:
+                    self._write_checkpoint()
+            finally:
+                self._interprocess_lock(exclusive=False)
+        except Exception:
+            self.handleError(record)
+
+    def _write_checkpoint(self):
+        entry = {
+            "seq": self.seq,
+            "hash": self.head,
+            "epoch": round(time.time(), 3),
+            "sig": sign_checkpoint(self.key, self.seq, self.head),
+        }
+        with open(self.checkpoint_file, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+        self.last_checkpoint = self.seq
+
+    def checkpoint(self):
+        """Signs the current head if it moved since the last checkpoint."""
+        with self.lock:
+            self._interprocess_lock()
+            try:
+                self._sync_head()
+                if self.seq > self.last_checkpoint:
+                    self._write_checkpoint()
+            finally:
+                self._interprocess_lock(exclusive=False)
+
+    def close(self):
+        super().close()
+        if not self._lock_file.closed:
+            self._lock_file.close()
+
+
+def _verify_range(path, start, end, checkpoint_seqs):
+    """
+    Verifies the chain inside one byte range of one file.
+    Lines are owned by the range their first byte falls in.
+    """
+    result = {
+        "path": path, "start": start, "count": 0, "legacy_leading": 0,
+        "first_seq": None, "first_prev": None, "last_seq": None, "last_hash": None,
+        "checkpoints": {}, "errors": [],
+    }
+    with open(path, "rb") as f:
+        pos = start
+        if start > 0:
+            f.seek(start - 1)
+            skipped = f.readline()
+            pos = start - 1 + len(skipped)
+        while pos < end:
+            line = f.readline()
+            if not line:
+                break
+            pos += len(line)
+            line = line.rstrip(b"\r\n")
+            if not line:
+                continue
+            parts = _split_line(line)
+            if parts is None:
+                if result["last_seq"] is None:
+                    result["legacy_leading"] += 1
+                else:
+                    result["errors"].append(f"{path}@{pos - len(line) - 1}: unchained record inside the chain")
+                continue
+            seq, prev, body, digest = parts
+            if hashlib.sha256(body).hexdigest() != digest:
+                result["errors"].append(f"seq {seq}: content does not match its hash (modified)")
+            if result["last_seq"] is None:
+                result["first_seq"], result["first_prev"] = seq, prev
+            elif prev != result["last_hash"] or seq != result["last_seq"] + 1:
+                result["errors"].append(f"seq {seq}: broken link after seq {result['last_seq']} (inserted/deleted records)")
+            result["last_seq"], result["last_hash"] = seq, digest
+            result["count"] += 1
+            if seq in checkpoint_seqs:
+                result["checkpoints"][seq] = digest
+    return result
+
+
+class AuditChainVerifier:
+    """Checks the audit hash chain and its signed checkpoints in parallel."""
+    def __init__(self, log_file="data/ai_audit.jsonl", checkpoint_file="data/ai_audit.checkpoints.jsonl",
+                 key_path=None):
+        self.log_file = log_file
+        self.checkpoint_file = checkpoint_file
+        self.key_path = key_path or default_key_path()
+
+    def _load_checkpoints(self, key, errors):
+        checkpoints = {}
+        if not os.path.exists(self.checkpoint_file):
+            return checkpoints
+        with open(self.checkpoint_file, "r") as f:
+            for n, line in enumerate(f, 1):
+                try:
+                    cp = json.loads(line)
+                    seq, digest, sig = int(cp["seq"]), cp["hash"], cp["sig"]
+                except (ValueError, KeyError, TypeError):
+                    errors.append(f"checkpoint line {n}: unreadable")
+                    continue
+                if key is None or not hmac.compare_digest(sig, sign_checkpoint(key, seq, digest)):
+                    errors.append(f"checkpoint seq {seq}: bad signature")
+                    continue
+                checkpoints[seq] = digest
+        return checkpoints
+
+    def _plan(self, files, workers, min_segment):
+        """Splits files into roughly equal byte ranges, several per worker."""
+        total = sum(os.path.getsize(p) for p in files)
+        target = max(min_segment, total // max(1, workers * 4))
+        segments = []
+        for path in files:
+            size = os.path.getsize(path)
+            start = 0
+            while start < size:
+                end = min(size, start + target)
+                segments.append((path, start, end))
+                start = end
+        return segments
+
+    def verify(self, workers=None, min_segment=8 * 1024 * 1024):
+        started = time.time()
+        errors = []
+        key = None
+        if os.path.exists(self.key_path):
+            with open(self.key_path, "rb") as f:
+                key = f.read()
+        elif os.path.exists(self.checkpoint_file):
+            errors.append(f"signing key {self.key_path} is missing")
+        checkpoints = self._load_checkpoints(key, errors)
+
+        files = list_audit_files(self.log_file)
+        workers = workers or os.cpu_count() or 1
+        segments = self._plan(files, workers, min_segment)
+        cp_seqs = frozenset(checkpoints)
+        if workers > 1 and len(segments) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(segments))) as pool:
+                results = list(pool.map(_verify_range, *zip(*segments), [cp_seqs] * len(segments)))
+        else:
+            results = [_verify_range(path, start, end, cp_seqs) for path, start, end in segments]
+
+        # Stitch segment boundaries together
+        last_seq, last_hash, first_seq, count, legacy = None, None, None, 0, 0
+        seen_checkpoints = {}
+        for res in results:
+            errors.extend(res["errors"])
+            if res["legacy_leading"]:
+                if last_seq is None:
+                    legacy += res["legacy_leading"]
+                else:
+                    errors.append(f"{res['path']}: unchained records after seq {last_seq}")
+            if res["first_seq"] is None:
+                continue
+            if last_seq is None:
+                first_seq = res["first_seq"]
+                if first_seq == 1 and res["first_prev"] != GENESIS:
+                    errors.append("seq 1 does not start from the genesis hash")
+            elif res["first_prev"] != last_hash or res["first_seq"] != last_seq + 1:
+                errors.append(f"seq {res['first_seq']}: broken link after seq {last_seq} (inserted/deleted records)")
+            last_seq, last_hash = res["last_seq"], res["last_hash"]
+            count += res["count"]
+            seen_checkpoints.update(res["checkpoints"])
+
+        verified = 0
+        for seq, digest in sorted(checkpoints.items()):
+            if first_seq is not None and seq < first_seq:
+                continue  # Rotated out of retention
+            if last_seq is None or seq > last_seq:
+                errors.append(f"checkpoint seq {seq}: record missing (log truncated)")
+            elif seen_checkpoints.get(seq) != digest:
+                errors.append(f"checkpoint seq {seq}: chain rewritten (hash differs from signed checkpoint)")
+            else:
+                verified += 1
+
+        return {
+            "ok": not errors,
+            "records": count,
+            "legacy_records": legacy,
+            "first_seq": first_seq,
+            "last_seq": last_seq,
+            "files": len(files),
+            "segments": len(segments),
+            "checkpoints_verified": verified,
+            "unsigned_tail": max(0, (last_seq or 0) - max(checkpoints, default=0)),
+            "errors": errors,
+            "elapsed": round(time.time() - started, 3),
+        }
@@ -0,0 +1,174 @@
+import bisect
+import json
+import os
+import re
+import time
+from datetime import datetime
+from core.audit_chain import list_audit_files
+
+
+class AuditIndex:
+    """
+    Incremental query index over the JSON-lines audit trail.
+    Remembers how far each log file (tracked by inode, so rotation is safe)
+    has been read; each refresh only parses records appended since. Records
+    are kept in time order with postings lists per action, risk and status.
+    On disk, new rows are appended to <index>.rows (one JSON array per line)
+    and the small <index>.json only records the file offsets and row count,
+    so a refresh writes what it added, not the whole index.
+    """
+    FIELDS = ("epoch", "ts", "user", "event", "action", "risk", "status", "query", "target")
+    KEYS = ("action", "risk", "status", "user")
+
+    def __init__(self, log_file="data/ai_audit.jsonl", index_path="data/ai_audit.idx.json"):
+        self.log_file = log_file
+        self.index_path = index_path
+        self.rows_path = os.path.splitext(index_path)[0] + ".rows"
+        self.files = {}      # "dev:ino" -> bytes consumed
+        self.records = []    # compact rows, FIELDS order
+        self.epochs = []     # parallel to records, for bisect
+        self.postings = {k: {} for k in self.KEYS}
+        self.rows_size = 0   # bytes of the rows file accounted for by the state
+        self._load()
+
+    # --- PERSISTENCE ---
+
+    def _load(self):
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, "r") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        rows, size = [], 0
+        try:
+            with open(self.rows_path, "rb") as f:
+                for line in f:
+                    if len(rows) == state.get("rows", 0) or not line.endswith(b"\n"):
+                        break  # Tail of a refresh that died before recording it; re-read from the logs
+                    rows.append(json.loads(line))
+                    size += len(line)
+        except (OSError, ValueError):
+            return  # Unreadable rows: rebuild from the logs
+        if len(rows) != state.get("rows", 0):
+            return
+        self.files = state.get("files", {})
+        self.rows_size = size
+        for row in rows:
+            self._add(row)
+
+    def _save(self, added):
+        """Appends the last `added` rows, then records file offsets and the row count."""
+        os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+        with open(self.rows_path, "ab") as f:
+            f.truncate(self.rows_size)
+            for row in self.records[len(self.records) - added:]:
+                f.write(json.dumps(row, separators=(",", ":")).encode() + b"\n")
+            self.rows_size = f.tell()
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"files": self.files, "rows": len(self.records)}, f, separators=(",", ":"))
+        os.replace(tmp_path, self.index_path)
+
+    # --- INGESTION ---
+
+    def _add(self, row):
+        idx = len(self.records)
+        epoch = row[0]
+        if self.epochs and epoch < self.epochs[-1]:
+            # Clock skew: keep the arrays sorted for bisect
+            epoch = self.epochs[-1]
+        self.records.append(row)
+        self.epochs.append(epoch)
+        for k in self.KEYS:
+            value = row[self.FIELDS.index(k)]
+            if value is not None:
+                self.postings[k].setdefault(str(value).upper(), []).append(idx)
+
+    def refresh(self):
+        """Parses records appended since the last refresh. Returns how many were added."""
+        added = 0
+        seen = {}
+        for path in list_audit_files(self.log_file):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            key = f"{st.st_dev}:{st.st_ino}"
+            offset = self.files.get(key, 0)
+            if st.st_size < offset:
+                offset = 0  # File was truncated/replaced in place
+            if st.st_size > offset:
+                offset, count = self._ingest(path, offset)
+                added += count
+            seen[key] = offset
+        # Forget inodes that rotated out of existence
+        self.files = seen
+        if added:
+            self._save(added)
+        return added
+
+    def _ingest(self, path, offset):
+        count = 0
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # Partially written record; pick it up next time
+                offset += len(raw)
+                try:
+                    rec = json.loads(raw)
+                except ValueError:
+                    continue
+                if not isinstance(rec, dict) or "epoch" not in rec:
+                    continue
+                self._add([rec.get(field) for field in self.FIELDS])
+                count += 1
+        return offset, count
+
+    # --- QUERYING ---
+
+    @staticmethod
+    def parse_time(value):
+        """Accepts '30d', '12h', '15m', epoch seconds or an ISO date/time."""
+        if value is None:
+            return None
+        value = str(value).strip()
+        m = re.fullmatch(r"(\d+(?:\.\d+)?)([smhdw])", value)
+        if m:
+            unit = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}[m.group(2)]
+            return time.time() - float(m.group(1)) * unit
+        try:
+            return float(value)
+        except ValueError:
+            pass
+        return datetime.fromisoformat(value).timestamp()
+
+    def query(self, since=None, until=None, action=None, risk=None, status=None,
+              user=None, text=None, limit=50):
+        """Returns matching records as dicts, oldest first (the newest `limit`)."""
+        lo = bisect.bisect_left(self.epochs, self.parse_time(since)) if since is not None else 0
+        hi = bisect.bisect_right(self.epochs, self.parse_time(until)) if until is not None else len(self.records)
+
+        candidates = None
+        for key, value in (("action", action), ("risk", risk), ("status", status), ("user", user)):
+            if value is None:
+                continue
+            ids = self.postings[key].get(str(value).upper(), [])
+            # Postings are sorted, so the time window can be cut by bisect too
+            ids = ids[bisect.bisect_left(ids, lo):bisect.bisect_left(ids, hi)]
+            candidates = set(ids) if candidates is None else candidates & set(ids)
+        ids = sorted(candidates) if candidates is not None else range(lo, hi)
+
+        results = []
+        needle = text.lower() if text else None
+        for i in reversed(ids):
+            row = self.records[i]
+            if needle and needle not in (row[7] or "").lower():
+                continue
+            results.append(dict(zip(self.FIELDS, row)))
+            if limit and len(results) >= limit:
+                break
+        results.reverse()
+        return results
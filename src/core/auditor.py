@@ -1,34 +1,135 @@
+import atexit
+import getpass
+import json
 import logging
+import logging.handlers
 import os
-from datetime import datetime
+import queue
+import socket
+import sys
+import time
+from collections import deque
+from datetime import datetime, timezone
+from core.audit_chain import HashChainHandler, SYSTEM_KEY, default_key_path, inside
+from utils.colors import Colors
+
+_listener = None
+_queue = None
+_chain = None
+
+
+def _shutdown():
+    # Drain the queue first so the final checkpoint covers every record
+    if _listener is not None:
+        _listener.stop()
+    if _chain is not None:
+        _chain.checkpoint()
+        _chain.close()
+
 
 class AuditLogger:
-    def __init__(self, log_file="data/ai_audit.log"):
-        self.log_file = log_file
-        os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
-        
+    """
+    Structured, tamper-evident audit trail.
+    Records are JSON lines handed to a QueueHandler, so the REPL only enqueues;
+    a background QueueListener does the hash chaining, file I/O and rotation.
+    """
+    def __init__(self, log_file="data/ai_audit.jsonl", max_bytes=10 * 1024 * 1024, backup_count=10,
+                 checkpoint_file="data/ai_audit.checkpoints.jsonl", key_path=None,
+                 checkpoint_every=1000):
+        global _listener, _queue, _chain
+        # Absolute, so a MOVE_DIR during the session cannot scatter audit files
+        self.log_file = os.path.abspath(log_file)
+        self.checkpoint_file = os.path.abspath(checkpoint_file)
+        self.key_path = os.path.abspath(key_path or default_key_path())
+        log_dir = os.path.dirname(self.log_file)
+        os.makedirs(log_dir, exist_ok=True)
+
         self.logger = logging.getLogger("AI_Audit")
         self.logger.setLevel(logging.INFO)
-        
+        self.logger.propagate = False
+
         if not self.logger.handlers:
-            handler = logging.FileHandler(self.log_file)
-            formatter = logging.Formatter('%(asctime)s | %(levelname)s | %(message)s')
-            handler.setFormatter(formatter)
-            self.logger.addHandler(handler)
+            fallback = key_path is None and not os.environ.get("NETMON_AUDIT_KEY") and self.key_path != SYSTEM_KEY
+            self._check_key(log_dir, fallback)
+            _chain = HashChainHandler(
+                self.log_file, self.checkpoint_file, self.key_path, checkpoint_every=checkpoint_every,
+                maxBytes=max_bytes, backupCount=backup_count
+            )
+            _queue = queue.Queue()
+            _listener = logging.handlers.QueueListener(_queue, _chain)
+            _listener.start()
+            atexit.register(_shutdown)
+            self.logger.addHandler(logging.handlers.QueueHandler(_queue))
+
+        # Non-GREEN events of this session, for the AI context snapshot
+        self.alerts = deque(maxlen=50)
+        self.user = self._current_user()
+        self.host = socket.gethostname()
 
-    def log_intent(self, query, intent, authorized):
+    def _check_key(self, log_dir, fallback):
+        """Warns (on stderr) about weak key locations: a key next to the log always, a same-user key once, as it is created."""
+        if inside(self.key_path, log_dir) and os.path.exists(self.key_path):
+            print(f"{Colors.FAIL}WARNING: the audit signing key {self.key_path} sits next to the audit log; anyone "
+                  f"who can edit the log can re-sign it. Move it and set NETMON_AUDIT_KEY.{Colors.RESET}",
+                  file=sys.stderr)
+        elif fallback and not os.path.exists(self.key_path):
+            print(f"{Colors.WARNING}WARNING: the audit signing key {self.key_path} belongs to the same user as the "
+                  f"audit log, so checkpoints only prove integrity against other users. Create "
+                  f"{os.path.dirname(SYSTEM_KEY)} as root (root-only) to keep it in {SYSTEM_KEY}, or set NETMON_AUDIT_KEY to a key this user cannot write.{Colors.RESET}",
+                  file=sys.stderr)
+
+    @staticmethod
+    def _current_user():
+        # Under sudo, record who actually ran the command
+        user = os.environ.get("SUDO_USER")
+        if user:
+            return user
+        try:
+            return getpass.getuser()
+        except Exception:
+            return "unknown"
+
+    def _write(self, record, level=logging.INFO):
+        now = time.time()
+        entry = {
+            "ts": datetime.fromtimestamp(now, timezone.utc).isoformat(timespec="milliseconds"),
+            "epoch": round(now, 3),
+            "user": self.user,
+            "host": self.host,
+        }
+        entry.update(record)
+        self.logger.log(level, json.dumps(entry, ensure_ascii=False, default=str))
+        return entry
+
+    def log_intent(self, query, intent, authorized, **details):
         """Records the AI's proposal and the human's final decision."""
         status = "AUTHORIZED" if authorized else "REJECTED"
-        risk = intent.get('risk_level', 'UNKNOWN')
-        action = intent.get('action', 'NONE')
-        
-        msg = (
-            f"\n[QUERY]: {query}\n"
-            f"[ACTION]: {action} | [RISK]: {risk}\n"
-            f"[STATUS]: {status}\n"
-            f"{'-'*50}"
-        )
-        if authorized:
-            self.logger.info(msg)
-        else:
-            self.logger.warning(msg)
\ No newline at end of file
+        record = {
+            "event": "intent",
+            "query": query,
+            "action": intent.get('action', 'NONE'),
+            "target": intent.get('target'),
+            "value": intent.get('value'),
+            "risk": intent.get('risk_level', 'UNKNOWN'),
+            "status": status,
+        }
+        record.update(details)
+        return self._write(record, logging.INFO if authorized else logging.WARNING)
+
+    def log_event(self, event, action, risk="GREEN", status="INFO", **details):
+        """Records a non-intent event (alerts, automated operations)."""
+        record = {"event": event, "action": action, "risk": risk, "status": status}
+        record.update(details)
+        entry = self._write(record, logging.WARNING if risk == "RED" else logging.INFO)
+        if risk != "GREEN":
+            self.alerts.append(entry)
+        return entry
+
+    def recent_alerts(self, limit=10):
+        """YELLOW/RED events logged in this session, oldest first."""
+        return list(self.alerts)[-limit:]
+
+    def flush(self):
+        """Blocks until every queued record has been written."""
+        if _queue is not None:
+            _queue.join()
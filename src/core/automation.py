@@ -4,6 +4,7 @@ import subprocess
 import shlex
 import re
 from utils.colors import Colors
+from utils import perf
 
 class PlaybookEngine:
     def __init__(self):
@@ -64,7 +65,7 @@ class PlaybookEngine:
             args = shlex.split(command)
             
             # Execute without shell
-            result = subprocess.run(
+            result = perf.run(
                 args,
                 capture_output=True,
                 text=True,
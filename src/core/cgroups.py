@@ -0,0 +1,290 @@
+import os
+import re
+import threading
+import time
+from core.records import CgroupUsage, ProcessTable
+from utils.perf import timed
+
+# Container runtimes name their scopes after the container id
+_CONTAINER = re.compile(r"^(?:(docker|libpod|cri-containerd|crio)-)?([0-9a-f]{64})(?:\.scope)?$")
+_RUNTIMES = {"libpod": "podman", "cri-containerd": "containerd", None: "docker"}
+
+# Per-cgroup files kept open between samples
+_FILES = ("cpu.stat", "memory.current", "memory.max", "io.stat", "pids.current")
+
+
+class _Group:
+    __slots__ = ("path", "name", "fds", "counters")
+
+    def __init__(self, path, name):
+        self.path = path
+        self.name = name
+        self.fds = {}
+        self.counters = {}  # baseline -> (cpu, throttled, read, write) at its last sample
+
+
+class CgroupMonitor:
+    """
+    Per-cgroup CPU, memory and I/O from the cgroup v2 hierarchy, so a busy
+    host can be broken down by container or systemd unit. The tree is walked
+    every `rescan` seconds; in between, each tracked group's stat files stay
+    open and are re-read with pread(), so a sample costs a few syscalls per
+    group and no path lookups. Only populated leaf groups (or groups at
+    max_depth, which include their subtree) are tracked, so nothing is
+    counted twice. The root defaults to /sys/fs/cgroup and can be moved with
+    NETMON_CGROUP_ROOT (e.g. a host hierarchy mounted into a container).
+    Like FilesystemMonitor.io(), interactive callers pass `fresh` to reuse
+    the recorder's sample, or else measure against a baseline of their own.
+    """
+    def __init__(self, root=None, max_depth=4, rescan=10.0, max_groups=200):
+        self.root = os.path.abspath(root or os.environ.get("NETMON_CGROUP_ROOT") or "/sys/fs/cgroup")
+        self.max_depth = max_depth
+        self.rescan = rescan
+        self.max_groups = max_groups
+        self.groups = {}  # path relative to root ("/system.slice/nginx.service") -> _Group
+        self._scanned = 0.0
+        self._taken = {}  # baseline -> monotonic of its last sample
+        self._sampled = None  # monotonic of the `last` sample
+        self._host_memory = None
+        self._processes = None  # Own tick baseline for top_processes, not pslist's
+        self._lock = threading.Lock()
+        # Latest result, for readers that must not touch the files (AI context)
+        self.last = []
+
+    @property
+    def available(self):
+        # cgroup v1 (and hybrid) hierarchies have no cgroup.controllers at the root
+        return os.path.exists(os.path.join(self.root, "cgroup.controllers"))
+
+    @staticmethod
+    def name(path):
+        """Short label: 'docker:0123456789ab' for containers, else the last path element."""
+        base = path.rstrip("/").rsplit("/", 1)[-1] or "/"
+        match = _CONTAINER.match(base)
+        if match:
+            return f"{_RUNTIMES.get(match.group(1), match.group(1))}:{match.group(2)[:12]}"
+        return base
+
+    # --- DISCOVERY ---
+
+    def _populated(self, directory):
+        try:
+            with open(os.path.join(directory, "cgroup.events")) as f:
+                return "populated 1" in f.read()
+        except OSError:
+            return True  # No events file (root, fixtures): assume it has processes
+
+    def _walk(self, directory, depth, found):
+        children = []
+        if depth < self.max_depth:
+            try:
+                with os.scandir(directory) as entries:
+                    children = [e.path for e in entries if e.is_dir(follow_symlinks=False)]
+            except OSError:
+                return
+            children = [c for c in children if self._populated(c)]
+        if not children:
+            found.append(directory)
+            return
+        for child in children:
+            self._walk(child, depth + 1, found)
+
+    def _scan(self):
+        found = []
+        self._walk(self.root, 0, found)
+        paths = {self._relative(d) for d in found}
+        for path in set(self.groups) - paths:
+            self._close(self.groups.pop(path))
+        for path in sorted(paths - set(self.groups))[:max(self.max_groups - len(self.groups), 0)]:
+            group = _Group(path, self.name(path))
+            directory = self._directory(path)
+            for file in _FILES:
+                try:
+                    group.fds[file] = os.open(os.path.join(directory, file), os.O_RDONLY)
+                except OSError:
+                    pass  # Controller not enabled for this group
+            if group.fds:
+                self.groups[path] = group
+        self._scanned = time.monotonic()
+
+    def _relative(self, directory):
+        rel = os.path.relpath(directory, self.root)
+        return "/" if rel == "." else "/" + rel
+
+    def _directory(self, path):
+        return self.root if path == "/" else self.root + path
+
+    @staticmethod
+    def _close(group):
+        for fd in group.fds.values():
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        group.fds.clear()
+
+    def close(self):
+        with self._lock:
+            for group in self.groups.values():
+                self._close(group)
+            self.groups.clear()
+
+    # --- SAMPLING ---
+
+    @staticmethod
+    def _read(group, file):
+        fd = group.fds.get(file)
+        return os.pread(fd, 65536, 0) if fd is not None else None
+
+    @staticmethod
+    def _keyed(data):
+        """'key value' lines (cpu.stat) as a dict of ints."""
+        values = {}
+        for line in data.splitlines():
+            key, _, value = line.partition(b" ")
+            values[key] = int(value)
+        return values
+
+    @staticmethod
+    def _io_bytes(data):
+        """Summed rbytes/wbytes over the devices in io.stat."""
+        read = written = 0
+        for field in data.split():
+            if field.startswith(b"rbytes="):
+                read += int(field[7:])
+            elif field.startswith(b"wbytes="):
+                written += int(field[7:])
+        return read, written
+
+    @staticmethod
+    def _rate(new, old, elapsed, scale=1.0):
+        if new is None or old is None or elapsed is None:
+            return 0.0
+        return round(max(new - old, 0) * scale / elapsed, 1)
+
+    def _host(self):
+        if self._host_memory is None:
+            import psutil
+            self._host_memory = psutil.virtual_memory().total
+        return self._host_memory
+
+    @timed("collector.cgroups")
+    def sample(self, fresh=None):
+        """
+        CgroupUsage per tracked group since the previous call, busiest CPU
+        first. Rates are 0.0 on a group's first sample. [] without cgroup v2.
+        With `fresh`, a sample younger than that many seconds is returned as
+        is, and otherwise rates are measured against a separate baseline.
+        """
+        if not self.available:
+            return []
+        with self._lock:
+            now = time.monotonic()
+            if fresh is not None and self._sampled is not None and now - self._sampled < fresh:
+                return self.last
+            if not self.groups or now - self._scanned >= self.rescan:
+                self._scan()
+            baseline = "interactive" if fresh is not None else "sampler"
+            taken = self._taken.get(baseline)
+            elapsed = max(now - taken, 1e-6) if taken else None
+            self._taken[baseline] = now
+            rows, gone = [], []
+            for path, g in self.groups.items():
+                try:
+                    cpu_stat = self._read(g, "cpu.stat")
+                    memory = self._read(g, "memory.current")
+                    limit = self._read(g, "memory.max")
+                    io_stat = self._read(g, "io.stat")
+                    pids = self._read(g, "pids.current")
+                except OSError:
+                    gone.append(path)  # Removed since the last scan (ENODEV)
+                    continue
+                stat = self._keyed(cpu_stat) if cpu_stat is not None else {}
+                cpu, throttled = stat.get(b"usage_usec"), stat.get(b"throttled_usec")
+                read, written = self._io_bytes(io_stat) if io_stat is not None else (None, None)
+                memory = int(memory) if memory is not None else None
+                limit = int(limit) if limit is not None and limit.strip() != b"max" else None
+                rate = self._rate
+                old_cpu, old_throttled, old_read, old_write = g.counters.get(baseline, (None,) * 4)
+                rows.append(CgroupUsage(
+                    path, g.name,
+                    rate(cpu, old_cpu, elapsed, 1e-4),  # usec per second -> percent of one CPU, like psutil
+                    memory,
+                    round(memory * 100.0 / (limit or self._host()), 1) if memory is not None else None,
+                    limit,
+                    rate(read, old_read, elapsed),
+                    rate(written, old_write, elapsed),
+                    int(pids) if pids is not None else None,
+                    rate(throttled, old_throttled, elapsed, 1e-4),
+                ))
+                g.counters[baseline] = (cpu, throttled, read, written)
+            for path in gone:
+                self._close(self.groups.pop(path))
+            rows.sort(key=lambda r: (r.cpu_percent, r.memory or 0), reverse=True)
+            self.last, self._sampled = rows, now
+        return rows
+
+    # --- PROCESSES ---
+
+    def cgroup_of(self, pid, proc_root="/proc"):
+        """The cgroup v2 path of a process ('/system.slice/nginx.service'), or None."""
+        try:
+            with open(f"{proc_root}/{pid}/cgroup") as f:
+                for line in f:
+                    if line.startswith("0::"):
+                        return line[3:].strip()
+        except OSError:
+            pass
+        return None
+
+    def members(self, path):
+        """PIDs directly in a group (cgroup.procs)."""
+        try:
+            with open(os.path.join(self._directory(path), "cgroup.procs"), "rb") as f:
+                return [int(pid) for pid in f.read().split()]
+        except (OSError, ValueError):
+            return []
+
+    def attribute(self, snapshot, paths=None):
+        """
+        {group path: ProcessSnapshot row indices} for a process snapshot. One
+        cgroup.procs read per group instead of one /proc/<pid>/cgroup per process.
+        """
+        row = {pid: i for i, pid in enumerate(snapshot.pids)}
+        result = {}
+        for path in (paths if paths is not None else list(self.groups)):
+            indices = [row[pid] for pid in self.members(path) if pid in row]
+            if indices:
+                result[path] = indices
+        return result
+
+    def snapshot(self, top_processes=True, wait=0.25, fresh=1.0):
+        """
+        Everything CGROUP_USAGE shows: groups, plus each one's busiest process.
+        A sample younger than `fresh` seconds is reused; without one, or an
+        earlier interactive sample to compare with, it samples twice, `wait`
+        seconds apart. Process CPU comes from a ProcessTable of its own, primed
+        in the same wait on first use, so it neither moves pslist's baseline
+        nor ranks processes by all-zero first readings.
+        """
+        stale = self._sampled is None or time.monotonic() - self._sampled >= fresh
+        warm = stale and "interactive" not in self._taken and self.available
+        if warm:
+            self.sample(fresh=0)
+        if top_processes and self._processes is None and self.available:
+            with self._lock:
+                self._processes = ProcessTable()
+                self._processes.snapshot()
+            warm = True
+        if warm:
+            time.sleep(wait)
+        rows = self.sample(fresh=0 if stale else fresh)
+        busiest = {}
+        if top_processes and rows:
+            with self._lock:
+                snap = self._processes.snapshot()
+            for path, indices in self.attribute(snap, [r.path for r in rows[:20]]).items():
+                i = max(indices, key=snap.cpu.__getitem__)
+                busiest[path] = {"pid": snap.pids[i], "name": snap.names[i], "cpu_percent": snap.cpu[i],
+                                 "processes": len(indices)}
+        return {"available": self.available, "root": self.root, "groups": rows, "top_processes": busiest}
@@ -0,0 +1,183 @@
+import os
+import socket
+from collections import Counter, namedtuple
+from functools import lru_cache
+import psutil
+from utils.perf import timed
+
+Connection = namedtuple("Connection", "proto laddr lport raddr rport status pid")
+
+# Kernel TCP states as written in /proc/net/tcp{,6}
+_TCP_STATES = {
+    "01": "ESTABLISHED", "02": "SYN_SENT", "03": "SYN_RECV", "04": "FIN_WAIT1",
+    "05": "FIN_WAIT2", "06": "TIME_WAIT", "07": "CLOSE", "08": "CLOSE_WAIT",
+    "09": "LAST_ACK", "0A": "LISTEN", "0B": "CLOSING", "0C": "NEW_SYN_RECV",
+}
+
+_PROC_TABLES = (
+    ("/proc/net/tcp", "TCP"),
+    ("/proc/net/tcp6", "TCP6"),
+    ("/proc/net/udp", "UDP"),
+    ("/proc/net/udp6", "UDP6"),
+)
+
+
+@lru_cache(maxsize=65536)
+def _decode_proc_addr(hex_addr):
+    """Decodes '0100007F:0035' style /proc/net addresses into (ip, port)."""
+    host, port = hex_addr.split(":")
+    raw = bytes.fromhex(host)
+    # The kernel prints each 32-bit word in host (little-endian) order
+    raw = b"".join(raw[i:i + 4][::-1] for i in range(0, len(raw), 4))
+    family = socket.AF_INET if len(raw) == 4 else socket.AF_INET6
+    ip = socket.inet_ntop(family, raw)
+    if ip.startswith("::ffff:") and "." in ip:
+        ip = ip[7:]
+    return ip, int(port, 16)
+
+
+class ConnectionTable:
+    """
+    Socket snapshot engine with aggregation, filtering and pagination.
+    Rows are cheap tuples and are only formatted for the page being shown.
+    Process names are cached per PID across snapshots.
+    """
+    AGGREGATE_KEYS = ("state", "remote", "lport", "process")
+
+    def __init__(self, name_cache_size=4096):
+        self._names = {}
+        self.name_cache_size = name_cache_size
+
+    # --- COLLECTION ---
+
+    @staticmethod
+    def proc_available():
+        return os.path.exists("/proc/net/tcp")
+
+    @timed("collector.connections")
+    def snapshot(self, attribute_processes=True):
+        """
+        Returns a list of Connection rows.
+        Without process attribution on Linux, /proc/net is read directly, which
+        skips the per-process file descriptor scan psutil has to do.
+        """
+        if not attribute_processes and self.proc_available():
+            return self._snapshot_proc()
+        return self._snapshot_psutil()
+
+    @staticmethod
+    def _snapshot_psutil():
+        rows = []
+        for conn in psutil.net_connections(kind="inet"):
+            proto = "TCP" if conn.type == socket.SOCK_STREAM else "UDP"
+            if conn.family == socket.AF_INET6:
+                proto += "6"
+            raddr = conn.raddr
+            rows.append(Connection(
+                proto,
+                conn.laddr.ip, conn.laddr.port,
+                raddr.ip if raddr else None, raddr.port if raddr else None,
+                conn.status,
+                conn.pid,
+            ))
+        return rows
+
+    @staticmethod
+    def _snapshot_proc():
+        rows = []
+        for path, proto in _PROC_TABLES:
+            try:
+                with open(path, "r") as f:
+                    next(f, None)  # header
+                    lines = f.readlines()
+            except OSError:
+                continue
+            is_udp = proto.startswith("UDP")
+            for line in lines:
+                fields = line.split()
+                if len(fields) < 4:
+                    continue
+                lip, lport = _decode_proc_addr(fields[1])
+                rip, rport = _decode_proc_addr(fields[2])
+                if rport == 0:
+                    rip, rport = None, None
+                status = psutil.CONN_NONE if is_udp else _TCP_STATES.get(fields[3], fields[3])
+                rows.append(Connection(proto, lip, lport, rip, rport, status, None))
+        return rows
+
+    def process_name(self, pid):
+        """PID -> name with a bounded cache (names are stable for a PID's lifetime)."""
+        if pid is None:
+            return "-"
+        name = self._names.get(pid)
+        if name is None:
+            try:
+                name = psutil.Process(pid).name()
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                name = "?"
+            if len(self._names) >= self.name_cache_size:
+                self._names.clear()
+            self._names[pid] = name
+        return name
+
+    def prune_names(self, rows):
+        """Drops cached names for PIDs that no longer own sockets."""
+        live = {r.pid for r in rows if r.pid is not None}
+        if not live:
+            return  # Fast mode (/proc/net) rows carry no PIDs; they say nothing about liveness
+        for pid in [p for p in self._names if p not in live]:
+            del self._names[pid]
+
+    # --- QUERYING ---
+
+    def filter(self, rows, state=None, port=None, proc=None, remote=None, proto=None):
+        """Filters rows; every criterion given must match."""
+        if state:
+            state = state.upper()
+            rows = [r for r in rows if r.status == state]
+        if port is not None:
+            port = int(port)
+            rows = [r for r in rows if r.lport == port or r.rport == port]
+        if remote:
+            # Whole address (10.0.0.1 must not match 10.0.0.10); a trailing '.' or ':' selects a subnet
+            subnet = remote.endswith((".", ":"))
+            rows = [r for r in rows if r.raddr and (r.raddr == remote or subnet and r.raddr.startswith(remote))]
+        if proto:
+            proto = proto.upper()
+            rows = [r for r in rows if r.proto.startswith(proto)]
+        if proc:
+            proc = proc.lower()
+            rows = [r for r in rows if proc in self.process_name(r.pid).lower()]
+        return rows
+
+    def aggregate(self, rows, by, top=10):
+        """Counts rows by state, remote host, local port or owning process."""
+        if by == "state":
+            counts = Counter(r.status for r in rows)
+        elif by == "remote":
+            counts = Counter(r.raddr for r in rows if r.raddr)
+        elif by == "lport":
+            counts = Counter(r.lport for r in rows)
+        elif by == "process":
+            pids = Counter(r.pid for r in rows)
+            counts = Counter()
+            for pid, n in pids.items():
+                label = f"{self.process_name(pid)}/{pid}" if pid else "-"
+                counts[label] += n
+        else:
+            raise ValueError(f"Unknown aggregation: {by} (use {', '.join(self.AGGREGATE_KEYS)})")
+        return counts.most_common(top)
+
+    @staticmethod
+    def page(rows, page=1, page_size=50):
+        """Returns (rows_on_page, total_pages)."""
+        total_pages = max(1, -(-len(rows) // page_size))
+        page = min(max(1, page), total_pages)
+        start = (page - 1) * page_size
+        return rows[start:start + page_size], total_pages
+
+    def format_row(self, row):
+        laddr = f"{row.laddr}:{row.lport}"
+        raddr = f"{row.raddr}:{row.rport}" if row.raddr else "-"
+        process = f"{self.process_name(row.pid)}/{row.pid}" if row.pid else "-"
+        return f"{row.proto:<6} {laddr:<25} {raddr:<25} {row.status:<13} {process}"
@@ -0,0 +1,172 @@
+import os
+import select
+import threading
+import time
+import psutil
+from core.records import MountUsage, DiskIO
+from utils.perf import timed
+
+# statvfs on these can block for the whole network timeout when the server is gone
+REMOTE_FSTYPES = {"nfs", "nfs4", "cifs", "smb3", "smbfs", "fuse.sshfs", "ceph", "glusterfs", "9p"}
+
+# Block devices that never hold user data
+_SKIP_DISKS = ("loop", "ram", "zram", "sr", "fd")
+
+
+class FilesystemMonitor:
+    """
+    Usage and inode usage of every mounted filesystem, plus per-disk I/O
+    rates. The mount list is enumerated once and cached; on Linux it is only
+    re-read when the kernel signals a mount-table change (poll() on
+    /proc/self/mounts), elsewhere every `refresh` seconds. I/O rates are
+    deltas between consecutive io() calls, so a sampler calling it every
+    second (the metric recorder) keeps them fresh for everyone; interactive
+    callers pass `fresh` and get that sample instead of cutting its window.
+    """
+    def __init__(self, include_remote=False, refresh=30.0):
+        self.include_remote = include_remote
+        self.refresh = refresh
+        self._mounts = None
+        self._listed = 0.0
+        self._poller = None
+        self._mounts_file = None
+        self._previous = None  # (monotonic, {disk: counters}) of the sampler
+        self._interactive = None  # Same, for calls with `fresh` when no sample is recent
+        self._sampled = None  # monotonic of the last_io sample
+        self._lock = threading.Lock()
+        # Latest results, for readers that must not touch the disks (AI context)
+        self.last_usage = []
+        self.last_io = []
+
+    # --- MOUNTS ---
+
+    def _watch_mount_table(self):
+        if self._poller is not None or not os.path.exists("/proc/self/mounts"):
+            return
+        self._mounts_file = open("/proc/self/mounts", "rb")
+        self._poller = select.poll()
+        self._poller.register(self._mounts_file, select.POLLPRI | select.POLLERR)
+
+    def _mount_table_changed(self):
+        if self._poller is None:
+            return time.monotonic() - self._listed > self.refresh
+        # The kernel flags the open mounts file on every mount/umount
+        return bool(self._poller.poll(0))
+
+    def mounts(self):
+        """[(device, mountpoint, fstype)] of real filesystems, one mountpoint per device."""
+        with self._lock:
+            if self._mounts is None:
+                self._watch_mount_table()
+            elif not self._mount_table_changed():
+                return self._mounts
+            if self._mounts_file is not None:
+                # Re-read so the next poll() only reports newer changes
+                self._mounts_file.seek(0)
+                self._mounts_file.read()
+            seen, mounts = set(), []
+            for part in psutil.disk_partitions(all=False):
+                if part.device in seen or (part.fstype in REMOTE_FSTYPES and not self.include_remote):
+                    continue
+                if part.fstype == "squashfs":
+                    continue  # Read-only snap images: always 100% full
+                seen.add(part.device)
+                mounts.append((part.device, part.mountpoint, part.fstype))
+            self._mounts = mounts
+            self._listed = time.monotonic()
+            return mounts
+
+    @timed("collector.filesystems")
+    def usage(self):
+        """MountUsage per mounted filesystem, fullest first."""
+        rows = []
+        for device, mountpoint, fstype in self.mounts():
+            try:
+                if hasattr(os, "statvfs"):
+                    st = os.statvfs(mountpoint)
+                    total = st.f_blocks * st.f_frsize
+                    free = st.f_bavail * st.f_frsize
+                    used = (st.f_blocks - st.f_bfree) * st.f_frsize
+                    inodes, inodes_used = st.f_files, st.f_files - st.f_ffree
+                else:
+                    du = psutil.disk_usage(mountpoint)
+                    total, used, free = du.total, du.used, du.free
+                    inodes = inodes_used = None
+            except OSError:
+                continue  # Unmounted since the list was read, or no permission
+            if not total:
+                continue
+            # Like df: reserved blocks count as unavailable, not free
+            percent = round(used * 100.0 / (used + free), 1) if used + free else 0.0
+            inodes_percent = round(inodes_used * 100.0 / inodes, 1) if inodes else None
+            rows.append(MountUsage(device, mountpoint, fstype, total, used, free, percent,
+                                   inodes, inodes_used, inodes_percent))
+        rows.sort(key=lambda r: r.percent, reverse=True)
+        self.last_usage = rows
+        return rows
+
+    # --- I/O ---
+
+    @staticmethod
+    def _whole_disk(name):
+        if name.startswith(_SKIP_DISKS):
+            return False
+        # Partitions (sda1, nvme0n1p2) have no /sys/block entry of their own
+        return not os.path.isdir("/sys/block") or os.path.isdir(f"/sys/block/{name}")
+
+    def _counters(self):
+        try:
+            counters = psutil.disk_io_counters(perdisk=True) or {}
+        except (RuntimeError, OSError):
+            return {}
+        return {name: c for name, c in counters.items() if self._whole_disk(name)}
+
+    @timed("collector.disk_io")
+    def io(self, wait=0.25, fresh=None):
+        """
+        DiskIO per disk since the previous call, busiest first. The first call
+        has nothing to compare with, so it samples twice, `wait` seconds apart.
+        With `fresh`, a sample younger than that many seconds is returned as
+        is, and otherwise the rates are measured against a baseline of their
+        own, so interactive calls never shorten the sampler's next window.
+        """
+        with self._lock:
+            if fresh is not None and self._sampled is not None and time.monotonic() - self._sampled < fresh:
+                return self.last_io
+            baseline = "_interactive" if fresh is not None else "_previous"
+            previous = getattr(self, baseline)
+            if previous is None:
+                previous = (time.monotonic(), self._counters())
+                time.sleep(wait)
+            now, counters = time.monotonic(), self._counters()
+            setattr(self, baseline, (now, counters))
+        then, before = previous
+        elapsed = max(now - then, 1e-6)
+        rows = []
+        for name, c in counters.items():
+            old = before.get(name)
+            if old is None:
+                continue
+            reads = max(c.read_count - old.read_count, 0)
+            writes = max(c.write_count - old.write_count, 0)
+            ops = reads + writes
+            # Milliseconds spent per completed request, queueing included (iostat's await)
+            waited = max(c.read_time - old.read_time, 0) + max(c.write_time - old.write_time, 0)
+            busy = getattr(c, "busy_time", None)
+            util = (min(100.0, max(busy - old.busy_time, 0) / (elapsed * 10)) if busy is not None else None)
+            rows.append(DiskIO(
+                name,
+                round(reads / elapsed, 1),
+                round(writes / elapsed, 1),
+                round(max(c.read_bytes - old.read_bytes, 0) / elapsed, 1),
+                round(max(c.write_bytes - old.write_bytes, 0) / elapsed, 1),
+                round(waited / ops, 2) if ops else 0.0,
+                round(util, 1) if util is not None else None,
+            ))
+        rows.sort(key=lambda r: (r.util or 0.0, r.read_iops + r.write_iops), reverse=True)
+        self.last_io, self._sampled = rows, now
+        return rows
+
+    def snapshot(self, fresh=1.0):
+        """Everything MONITOR_DISK shows: {"mounts": [...], "io": [...]}."""
+        return {"mounts": self.usage(), "io": self.io(fresh=fresh)}
@@ -1,53 +1,186 @@
-import hashlib
 import json
 import os
+import threading
 from utils.colors import Colors
+from utils.perf import timed
+from core.hashing import FileHasher, HashError
+
+# Verification status for each HashError reason (MISSING kept for files that are gone)
+ERROR_STATUS = {"vanished": "MISSING", "permission": "DENIED", "not_a_file": "UNREADABLE", "io_error": "UNREADABLE"}
+
 
 class IntegrityMonitor:
-    def __init__(self, db_path="data/integrity_db.json"):
+    """
+    SHA-256 baselines of registered files in integrity_db.json ({path: hex},
+    unchanged so older versions can still read it). A sidecar
+    integrity_db.meta.json remembers each file's size, timestamps, inode and
+    sampled fingerprint as of its last verified hash, plus that hash;
+    verification checks those first, so a changed file is reported without
+    hashing all of it, and `quick` checks trust an unchanged stat plus a
+    matching fingerprint. Entries confirmed against a different hash than
+    the DB now holds (an older build or a restore rewrote it) are ignored.
+    """
+    def __init__(self, db_path="data/integrity_db.json", hasher=None):
         self.db_path = db_path
+        self.meta_path = os.path.splitext(db_path)[0] + ".meta.json"
+        self.hasher = hasher or FileHasher()
+        self._lock = threading.Lock()  # meta is also updated by the integrity watch thread
         self.hashes = self._load_db()
+        self.meta = self._load_meta()
+
+    def reload(self):
+        """Re-reads the DB and sidecar (another process registered files)."""
+        hashes, meta = self._load_db(), self._load_meta()
+        with self._lock:
+            self.hashes, self.meta = hashes, meta
 
     def _load_db(self):
         if os.path.exists(self.db_path):
-            with open(self.db_path, 'r') as f:
-                return json.load(f)
+            try:
+                with open(self.db_path, 'r') as f:
+                    return json.load(f)
+            except ValueError:
+                if getattr(self, "hashes", None) is not None:
+                    return self.hashes  # Caught mid-write by reload(): keep what we had
+                raise
         return {}
 
+    def _load_meta(self):
+        try:
+            with open(self.meta_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}  # Rebuilt as files are verified
+
     def _save_db(self):
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
         with open(self.db_path, 'w') as f:
             json.dump(self.hashes, f, indent=4)
+        self.save_meta()
+
+    def save_meta(self):
+        with self._lock:
+            data = json.dumps(self.meta)
+        os.makedirs(os.path.dirname(self.meta_path) or ".", exist_ok=True)
+        tmp = f"{self.meta_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(data)
+        os.replace(tmp, self.meta_path)
 
+    @timed("collector.hash")
     def calculate_hash(self, filepath):
-        """Generates a SHA-256 hash for a file."""
-        sha256_hash = hashlib.sha256()
+        """Generates a SHA-256 hash for a file (None if it cannot be read; see hash_file)."""
         try:
-            with open(filepath, "rb") as f:
-                for byte_block in iter(lambda: f.read(4096), b""):
-                    sha256_hash.update(byte_block)
-            return sha256_hash.hexdigest()
-        except Exception as e:
+            return self.hasher.sha256(filepath)
+        except HashError:
             return None
 
+    def hash_file(self, filepath, progress=None):
+        """SHA-256 of a file; raises HashError with the reason it could not be read."""
+        return self.hasher.sha256(filepath, progress)
+
+    def _stat(self, filepath):
+        try:
+            st = os.stat(filepath)
+        except OSError as e:
+            raise HashError.from_os_error(filepath, e)
+        return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "ctime_ns": st.st_ctime_ns, "ino": st.st_ino}
+
+    def _remember(self, filepath, current, sha256, fingerprint=None):
+        """Records stat and fingerprint for a file whose hash was just confirmed to be sha256."""
+        try:
+            current = dict(current, fingerprint=fingerprint or self.hasher.fingerprint(filepath), tier=self.hasher.TIER,
+                           sha256=sha256)
+        except HashError:
+            return False
+        with self._lock:
+            if self.meta.get(filepath) == current:
+                return False
+            self.meta[filepath] = current
+        return True
+
     def register_file(self, filepath):
         """Saves the current state of a file to the database."""
-        h = self.calculate_hash(filepath)
-        if h:
-            self.hashes[filepath] = h
-            self._save_db()
-            print(f"{Colors.GREEN}Successfully registered {filepath}{Colors.RESET}")
-        else:
-            print(f"{Colors.FAIL}Failed to read file.{Colors.RESET}")
-
-    def check_integrity(self):
+        try:
+            current = self._stat(filepath)
+            h = self.hash_file(filepath)
+        except HashError as e:
+            print(f"{Colors.FAIL}Failed to read file: {e.reason} ({e.detail or filepath}).{Colors.RESET}")
+            return
+        self.hashes[filepath] = h
+        self._remember(filepath, current, h)
+        self._save_db()
+        print(f"{Colors.GREEN}Successfully registered {filepath}{Colors.RESET}")
+
+    def verify(self, filepath, stored_hash, quick=False, progress=None):
+        """
+        One {path, status, expected, actual, checked, reason} result. checked
+        is the cheapest tier that decided it: 'size' or 'fingerprint' (a proven
+        change, actual is None), 'stat' (quick mode) or 'sha256'.
+        """
+        result = {"path": filepath, "status": "SAFE", "expected": stored_hash, "actual": None,
+                  "checked": "sha256", "reason": None}
+        known = self.meta.get(filepath)
+        if known is not None and known.get("sha256") != stored_hash:
+            known = None  # Describes some other baseline: only a full hash can decide
+        fingerprint = None
+        try:
+            current = self._stat(filepath)
+            if known is not None:
+                if current["size"] != known["size"]:
+                    result.update(status="TAMPERED", checked="size")
+                    return result
+                if known.get("tier") == self.hasher.TIER:
+                    fingerprint = self.hasher.fingerprint(filepath)
+                    if fingerprint != known["fingerprint"]:
+                        result.update(status="TAMPERED", checked="fingerprint")
+                        return result
+                    if quick and all(current[k] == known[k] for k in ("mtime_ns", "ctime_ns", "ino")):
+                        result.update(actual=stored_hash, checked="stat")
+                        return result
+            actual = self.hash_file(filepath, progress)
+        except HashError as e:
+            result.update(status=ERROR_STATUS[e.reason], reason=e.reason, checked=None)
+            return result
+        result["actual"] = actual
+        if actual != stored_hash:
+            result["status"] = "TAMPERED"
+        elif self._remember(filepath, current, actual, fingerprint):
+            result["learned"] = True
+        return result
+
+    @timed("collector.integrity")
+    def verify_all(self, quick=False, progress=None):
+        """
+        Returns one result per registered file (see verify()). Fingerprints
+        learned from files confirmed by SHA-256 are saved for the next run.
+        """
+        results = [self.verify(filepath, stored_hash, quick, progress)
+                   for filepath, stored_hash in self.hashes.items()]
+        learned = [r.pop("learned", False) for r in results]
+        if any(learned):
+            try:
+                self.save_meta()
+            except OSError:
+                pass  # Read-only data dir: verification still worked, it just stays slow
+        return results
+
+    def check_integrity(self, quick=False):
         """Compares current files against the saved database."""
-        print(f"{Colors.HEADER}--- Integrity Audit ---{Colors.RESET}")
-        for filepath, stored_hash in self.hashes.items():
-            current_hash = self.calculate_hash(filepath)
-            if current_hash is None:
-                print(f"{Colors.FAIL}MISSING:[/] {filepath}")
-            elif current_hash != stored_hash:
-                print(f"{Colors.FAIL}⚠️ TAMPERED:[/] {filepath}")
+        print(f"{Colors.HEADER}--- Integrity Audit{' (quick)' if quick else ''} ---{Colors.RESET}")
+
+        def progress(path, done, total):
+            print(f"\r  hashing {path}: {done / 2**30:.1f}/{total / 2**30:.1f} GB "
+                  f"({done * 100 // max(total, 1)}%)", end="", flush=True)
+            if done >= total:
+                print("\r\033[K", end="")
+
+        for result in self.verify_all(quick, progress):
+            if result["status"] == "MISSING":
+                print(f"{Colors.FAIL}MISSING:{Colors.RESET} {result['path']}")
+            elif result["status"] == "TAMPERED":
+                print(f"{Colors.FAIL}⚠️ TAMPERED:{Colors.RESET} {result['path']}")
+            elif result["status"] != "SAFE":
+                print(f"{Colors.WARNING}{result['status']} ({result['reason']}):{Colors.RESET} {result['path']}")
             else:
-                print(f"{Colors.GREEN}SAFE:[/] {filepath}")
\ No newline at end of file
+                print(f"{Colors.GREEN}SAFE:{Colors.RESET} {result['path']}")
@@ -0,0 +1,346 @@
+import os
+import select
+import threading
+import time
+from collections import deque
+from utils.helpers import RateLimiter
+from utils.inotify import (
+    Inotify, inotify_available,
+    IN_MODIFY, IN_ATTRIB, IN_CLOSE_WRITE, IN_CREATE, IN_DELETE, IN_MOVED_FROM, IN_MOVED_TO,
+    IN_DELETE_SELF, IN_MOVE_SELF, IN_IGNORED, IN_Q_OVERFLOW,
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows: every watcher alerts
+    fcntl = None
+
+_DIR_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO
+             | IN_DELETE_SELF | IN_MOVE_SELF)
+
+# Alert risk per verification status
+RISK = {"TAMPERED": "RED", "MISSING": "RED", "DENIED": "YELLOW", "UNREADABLE": "YELLOW", "SAFE": "GREEN"}
+
+
+class IntegrityWatcher:
+    """
+    Keeps registered files verified between audits. Filesystem events (one
+    inotify watch per parent directory, like LogTailer) mark files dirty;
+    a background thread re-verifies dirty files once they have been quiet
+    for `settle` seconds, at most batch_size per pass and max_rate bytes/s
+    of hashing, so steady-state cost follows the change rate rather than
+    the size of the registered set. A stat sweep at start and every
+    rescan_interval catches changes made while nothing was watching;
+    without inotify the sweep runs every poll_interval instead. Callbacks
+    get an alert dict when a file's status changes (TAMPERED, MISSING,
+    DENIED, UNREADABLE, or SAFE again). Alerts over the per-minute cap are
+    queued as they are and sent in order once the window allows, without
+    verifying the files again.
+    """
+    def __init__(self, monitor, settle=1.0, batch_size=64, max_rate=32 << 20, rescan_interval=3600.0,
+                 poll_interval=30.0, max_alerts_per_minute=30, use_inotify=True):
+        self.monitor = monitor
+        self.settle = settle
+        self.batch_size = batch_size
+        self.max_rate = max_rate
+        self.rescan_interval = rescan_interval
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify and inotify_available()
+        self.dirty = {}  # path -> monotonic time it may be verified (after the last event settles)
+        self.status = {}  # path -> status of its last verification
+        self._seen = {}  # path -> stat key at its last verification, so sweeps skip known problems
+        self.alerts = deque(maxlen=100)
+        self.callbacks = []
+        self.events = 0
+        self.verified = 0
+        self.bytes_hashed = 0
+        self.limiter = RateLimiter(max_alerts_per_minute)
+        self.deferred = deque()  # Alerts waiting for the rate limit, oldest first
+        self.suppressed = 0  # Alerts that had to wait
+        self.started = None
+        self._allowance = float(max_rate)
+        self._refilled = time.monotonic()
+        self._db_mtime = self._mtime(monitor.db_path)
+        self._swept = 0.0
+        self._lock_file = None
+        self._stop = threading.Event()
+        self._wake_r, self._wake_w = os.pipe()
+        self._thread = None
+
+    def add_callback(self, fn):
+        """fn(alert dict) is called for every status change."""
+        self.callbacks.append(fn)
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    # --- OWNERSHIP ---
+
+    def acquire(self):
+        """
+        Takes the watch lock next to the DB. False if another process (the
+        daemon or another shell) already watches; this one still verifies,
+        but only the owner should write alerts to the audit log.
+        """
+        if self._lock_file is not None:
+            return True
+        directory = os.path.dirname(os.path.abspath(self.monitor.db_path))
+        os.makedirs(directory, exist_ok=True)
+        handle = open(os.path.join(directory, ".integrity-watch.lock"), "a")
+        if fcntl is not None:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                handle.close()
+                return False
+        self._lock_file = handle
+        return True
+
+    @property
+    def owner(self):
+        return self._lock_file is not None
+
+    # --- DIRTY SET ---
+
+    def mark(self, path, delay=None):
+        """Queues a registered path for verification `delay` (default settle) seconds from now."""
+        self.dirty[path] = time.monotonic() + (self.settle if delay is None else delay)
+
+    @staticmethod
+    def _stat_key(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_size, st.st_mtime_ns, st.st_ctime_ns, st.st_ino)
+
+    def sweep(self):
+        """Marks every registered file whose stat differs from its last verified one. Returns the count."""
+        marked = 0
+        for path in list(self.monitor.hashes):
+            key = self._stat_key(path)
+            if path in self.dirty or (path in self._seen and self._seen[path] == key):
+                continue
+            known = self.monitor.meta.get(path)
+            if (key is None or known is None or known.get("sha256") != self.monitor.hashes.get(path)
+                    or key != (known["size"], known["mtime_ns"], known["ctime_ns"], known["ino"])):
+                self.mark(path, 0)
+                marked += 1
+        self._swept = time.monotonic()
+        return marked
+
+    def _reload(self):
+        """Picks up files registered or removed by any process (the DB was rewritten)."""
+        mtime = self._mtime(self.monitor.db_path)
+        if mtime == self._db_mtime:
+            return False
+        self._db_mtime = mtime
+        self.monitor.reload()
+        return True
+
+    # --- VERIFICATION ---
+
+    def _take(self, size):
+        """Token bucket over hashed bytes; a file larger than the burst waits for a full bucket."""
+        now = time.monotonic()
+        self._allowance = min(float(self.max_rate), self._allowance + (now - self._refilled) * self.max_rate)
+        self._refilled = now
+        if self._allowance < min(size, self.max_rate):
+            return False
+        self._allowance -= size
+        return True
+
+    def process(self):
+        """Verifies up to batch_size settled dirty files. Returns how many were verified."""
+        self._flush()
+        now = time.monotonic()
+        due = sorted((when, path) for path, when in self.dirty.items() if when <= now)[:self.batch_size]
+        done, learned = 0, False
+        for _, path in due:
+            if self._stop.is_set():
+                break
+            stored = self.monitor.hashes.get(path)
+            if stored is None:
+                self.dirty.pop(path, None)  # Unregistered meanwhile
+                continue
+            key = self._stat_key(path)
+            size = key[0] if key else 0
+            if not self._take(size):
+                break  # Over the hashing budget: the rest waits for the next pass
+            self.dirty.pop(path, None)
+            result = self.monitor.verify(path, stored)
+            self._seen[path] = key
+            learned = result.pop("learned", False) or learned
+            self.verified += 1
+            if result["checked"] == "sha256":
+                self.bytes_hashed += size
+            done += 1
+            self._transition(path, result)
+        if learned:
+            try:
+                self.monitor.save_meta()
+            except OSError:
+                pass
+        return done
+
+    def _transition(self, path, result):
+        previous = self.status.get(path, "SAFE")
+        status = result["status"]
+        if status == previous:
+            return
+        if status == "SAFE":
+            message = f"{path} verified again after {previous}"
+        elif status == "TAMPERED":
+            message = f"{path} no longer matches its registered hash (detected by {result['checked']})"
+        else:
+            message = f"{path} cannot be verified: {result['reason']}"
+        alert = {"path": path, "status": status, "previous": previous, "risk": RISK.get(status, "YELLOW"),
+                 "checked": result["checked"], "reason": result["reason"], "epoch": round(time.time(), 3),
+                 "message": message}
+        self.status[path] = status
+        # Queued behind any earlier ones, so alerts always go out in order
+        self.deferred.append(alert)
+        self._flush()
+        if self.deferred and self.deferred[-1] is alert:
+            self.suppressed += 1
+
+    def _flush(self):
+        """Sends queued alerts, oldest first, as far as the rate limit allows."""
+        # A package upgrade rewrites many watched files at once; cap the fan-out
+        while self.deferred and self.limiter.allow():
+            self._notify(self.deferred.popleft())
+
+    def _notify(self, alert):
+        self.alerts.append(alert)
+        for fn in self.callbacks:
+            try:
+                fn(alert)
+            except Exception:
+                pass
+
+    # --- MAIN LOOPS ---
+
+    def _watch_directories(self, notifier, watches):
+        """Adds and removes inotify watches to match the registered set (plus the DB's directory)."""
+        wanted = {}
+        for path in list(self.monitor.hashes):
+            wanted.setdefault(os.path.dirname(path), {})[os.path.basename(path)] = path
+        wanted.setdefault(os.path.dirname(os.path.abspath(self.monitor.db_path)), {})
+        current = {directory: wd for wd, (directory, _) in watches.items()}
+        for directory, wd in current.items():
+            if directory not in wanted:
+                notifier.rm_watch(wd)
+                del watches[wd]
+        for directory, names in wanted.items():
+            wd = current.get(directory)
+            if wd is None:
+                try:
+                    wd = notifier.add_watch(directory, _DIR_MASK)
+                except OSError:
+                    for path in names.values():
+                        self.mark(path, 0)  # Directory gone or unreadable: verify reports why
+                    continue
+            watches[wd] = (directory, names)
+
+    def _follow_inotify(self):
+        notifier = Inotify()
+        watches = {}  # wd -> (directory, {basename: registered path})
+        db_name = os.path.basename(self.monitor.db_path)
+        try:
+            self._watch_directories(notifier, watches)
+            self.sweep()
+            while not self._stop.is_set():
+                timeout = self.rescan_interval - (time.monotonic() - self._swept)
+                if self.dirty:
+                    timeout = min(timeout, max(min(self.dirty.values()) - time.monotonic(), 0.05))
+                if self.deferred:
+                    timeout = min(timeout, max(self.limiter.retry_in(), 0.05))
+                ready, _, _ = select.select([notifier, self._wake_r], [], [], max(timeout, 0))
+                if self._wake_r in ready:
+                    os.read(self._wake_r, 64)
+                if notifier in ready:
+                    rewatch = False
+                    for wd, mask, _, name in notifier.read_events():
+                        self.events += 1
+                        if mask & IN_Q_OVERFLOW:
+                            self.sweep()
+                            continue
+                        directory, names = watches.get(wd, (None, {}))
+                        if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                            # The directory itself went away: its files are gone too
+                            watches.pop(wd, None)
+                            for path in names.values():
+                                self.mark(path)
+                            rewatch = True
+                            continue
+                        if name == db_name and directory == os.path.dirname(os.path.abspath(self.monitor.db_path)):
+                            rewatch = self._reload() or rewatch
+                            continue
+                        path = names.get(name)
+                        if path is not None:
+                            # A finished write can be checked right away
+                            self.mark(path, 0 if mask & IN_CLOSE_WRITE else None)
+                    if rewatch:
+                        self._watch_directories(notifier, watches)
+                if time.monotonic() - self._swept >= self.rescan_interval:
+                    self._reload()
+                    self._watch_directories(notifier, watches)  # Also re-adds directories that reappeared
+                    self.sweep()
+                self.process()
+        finally:
+            notifier.close()
+
+    def _follow_polling(self):
+        while not self._stop.is_set():
+            self._reload()
+            self.sweep()
+            while self.process():
+                pass
+            wait = self.poll_interval if not self.dirty else self.settle
+            self._stop.wait(min(wait, max(self.limiter.retry_in(), 0.05)) if self.deferred else wait)
+
+    def follow(self):
+        """Blocks, verifying changed files until stop() is called."""
+        self._stop.clear()
+        self.started = time.time()
+        if self.use_inotify:
+            try:
+                self._follow_inotify()
+                return
+            except OSError:
+                pass  # Watch limit reached or unsupported filesystem
+        self._follow_polling()
+
+    def start(self):
+        """Runs follow() in a background daemon thread. Returns whether this process owns the alerts."""
+        if self._thread is None:
+            self.acquire()
+            self._thread = threading.Thread(target=self.follow, name="integrity-watch", daemon=True)
+            self._thread.start()
+        return self.owner
+
+    def stop(self):
+        self._stop.set()
+        try:
+            os.write(self._wake_w, b"x")
+        except OSError:
+            pass
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def stats(self):
+        return {"running": self.running, "owner": self.owner, "inotify": self.use_inotify,
+                "files": len(self.monitor.hashes), "dirty": len(self.dirty), "events": self.events,
+                "deferred": len(self.deferred),
+                "verified": self.verified, "bytes_hashed": self.bytes_hashed, "suppressed": self.suppressed,
+                "problems": {path: status for path, status in self.status.items() if status != "SAFE"},
+                "started": self.started}
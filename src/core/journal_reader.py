@@ -0,0 +1,155 @@
+import json
+import os
+import subprocess
+import threading
+import time
+
+
+class JournalReader:
+    """
+    Incremental reader for the systemd journal.
+    Remembers the last cursor seen per unit so repeat reads only fetch new entries.
+    """
+    def __init__(self, state_path="data/journal_cursors.json"):
+        self.state_path = state_path
+        self.cursors = self._load_state()
+        self._lock = threading.Lock()
+
+    def _load_state(self):
+        if os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, 'r') as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                return {}
+        return {}
+
+    def _save_state(self):
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.cursors, f, indent=4)
+        os.replace(tmp_path, self.state_path)
+
+    def _build_command(self, unit, lines, cursor):
+        cmd = ['journalctl', '-u', unit, '-o', 'json', '--no-pager']
+        if cursor:
+            # Only entries written after the last one we handed out
+            cmd += ['--after-cursor', cursor]
+        else:
+            # First read of this unit: start from the recent tail, not the whole journal
+            cmd += ['-n', str(lines)]
+        if os.name != 'nt' and os.geteuid() != 0:
+            cmd = ['sudo'] + cmd
+        return cmd
+
+    @staticmethod
+    def _parse_entry(unit, raw):
+        """Normalizes a journalctl JSON record into a small dict."""
+        message = raw.get('MESSAGE', '')
+        if isinstance(message, list):
+            # Binary messages are exported as a list of byte values
+            message = bytes(message).decode('utf-8', errors='replace')
+        try:
+            timestamp = int(raw.get('__REALTIME_TIMESTAMP', 0)) / 1_000_000
+        except (TypeError, ValueError):
+            timestamp = 0.0
+        return {
+            "cursor": raw.get('__CURSOR'),
+            "timestamp": timestamp,
+            "unit": unit,
+            "host": raw.get('_HOSTNAME', ''),
+            "identifier": raw.get('SYSLOG_IDENTIFIER') or raw.get('_COMM', unit),
+            "pid": raw.get('_PID'),
+            "priority": raw.get('PRIORITY'),
+            "message": message,
+        }
+
+    @staticmethod
+    def format_entry(entry):
+        """Renders an entry as a classic syslog line."""
+        stamp = time.strftime('%b %d %H:%M:%S', time.localtime(entry['timestamp']))
+        ident = entry['identifier']
+        if entry.get('pid'):
+            ident = f"{ident}[{entry['pid']}]"
+        host = entry.get('host') or '-'
+        return f"{stamp} {host} {ident}: {entry['message']}"
+
+    def iter_entries(self, unit, lines=50, since_last=True, max_entries=5000, timeout=30):
+        """
+        Streams journal entries for a unit, oldest first.
+        With since_last, only entries after the stored cursor are read, and the
+        cursor advances as entries are consumed, so an interrupted read resumes
+        where the caller stopped. Otherwise the last `lines` entries are read and
+        the cursor is left alone. A cursor journalctl rejects is forgotten.
+        """
+        cursor = None
+        if since_last:
+            with self._lock:
+                cursor = self.cursors.get(unit)
+        cmd = self._build_command(unit, lines, cursor)
+
+        proc = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            errors='replace'
+        )
+        # Kill a stuck journalctl instead of blocking the shell forever
+        watchdog = threading.Timer(timeout, proc.kill)
+        watchdog.start()
+
+        last_cursor = cursor
+        count = 0
+        try:
+            for line in proc.stdout:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    raw = json.loads(line)
+                except ValueError:
+                    continue
+                entry = self._parse_entry(unit, raw)
+                if entry['cursor']:
+                    last_cursor = entry['cursor']
+                count += 1
+                yield entry
+                if count >= max_entries:
+                    break
+        finally:
+            watchdog.cancel()
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+            stderr = proc.stderr.read().strip() if proc.stderr else ""
+            proc.stdout.close()
+            if proc.stderr:
+                proc.stderr.close()
+
+            if since_last and last_cursor and last_cursor != cursor:
+                with self._lock:
+                    self.cursors[unit] = last_cursor
+                    self._save_state()
+
+        if count == 0 and proc.returncode not in (0, None, -9) and stderr:
+            if cursor:
+                # Stale cursor (journal vacuumed or rotated away): start over from the tail next time
+                self.reset(unit)
+                raise RuntimeError(f"{stderr} (stored cursor for {unit} was reset)")
+            raise RuntimeError(stderr)
+
+    def fetch(self, unit, lines=50, since_last=True, max_entries=5000, timeout=30):
+        """Returns the entries for a unit as a list."""
+        return list(self.iter_entries(unit, lines=lines, since_last=since_last,
+                                      max_entries=max_entries, timeout=timeout))
+
+    def reset(self, unit=None):
+        """Forgets the stored cursor for one unit (or all units)."""
+        with self._lock:
+            if unit is None:
+                self.cursors.clear()
+            else:
+                self.cursors.pop(unit, None)
+            self._save_state()
@@ -0,0 +1,206 @@
+import asyncio
+import socket
+import struct
+import time
+from collections import deque
+
+_ICMP_ECHO_REQUEST = 8
+_ICMP_ECHO_REPLY = 0
+
+
+def _checksum(data):
+    if len(data) % 2:
+        data += b"\0"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def icmp_available():
+    """True when unprivileged ICMP datagram sockets are allowed (net.ipv4.ping_group_range)."""
+    try:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+    except (OSError, AttributeError):
+        return False
+    sock.close()
+    return True
+
+
+def compute_stats(rtts, sent):
+    """Summarizes round-trip times (seconds) into millisecond statistics."""
+    received = len(rtts)
+    stats = {
+        "sent": sent,
+        "received": received,
+        "loss": round(100.0 * (sent - received) / sent, 1) if sent else 0.0,
+        "min": None, "avg": None, "max": None, "p95": None, "jitter": None,
+    }
+    if not rtts:
+        return stats
+    ms = [r * 1000.0 for r in rtts]
+    ordered = sorted(ms)
+    stats["min"] = round(ordered[0], 3)
+    stats["max"] = round(ordered[-1], 3)
+    stats["avg"] = round(sum(ms) / received, 3)
+    stats["p95"] = round(ordered[min(received - 1, int(round(0.95 * (received - 1))))], 3)
+    # Mean absolute difference between consecutive samples (RFC 3550 style)
+    if received > 1:
+        stats["jitter"] = round(sum(abs(b - a) for a, b in zip(ms, ms[1:])) / (received - 1), 3)
+    else:
+        stats["jitter"] = 0.0
+    return stats
+
+
+class LatencyProber:
+    """
+    Concurrent reachability and latency prober built on asyncio.
+    Uses unprivileged ICMP echo where the kernel allows it, otherwise times a
+    TCP handshake (a refused connection still proves the host answered).
+    """
+    def __init__(self, count=4, timeout=1.0, interval=0.2, port=443,
+                 method="auto", concurrency=256, history=720):
+        if count < 1:
+            raise ValueError("count must be at least 1")
+        self.count = count
+        self.timeout = timeout
+        self.interval = interval
+        self.port = port
+        if method == "auto":
+            method = "icmp" if icmp_available() else "tcp"
+        self.method = method
+        self.concurrency = concurrency
+        self.history = history
+        # host -> deque of (timestamp, stats) for continuous runs
+        self.series = {}
+
+    # --- SINGLE PROBES ---
+
+    async def _tcp_probe(self, address, family):
+        start = time.perf_counter()
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(address, self.port, family=family),
+                timeout=self.timeout
+            )
+        except ConnectionRefusedError:
+            return time.perf_counter() - start
+        except (asyncio.TimeoutError, OSError):
+            return None
+        rtt = time.perf_counter() - start
+        writer.close()
+        return rtt
+
+    async def _icmp_probe(self, address, seq):
+        loop = asyncio.get_running_loop()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+        sock.setblocking(False)
+        payload = struct.pack("!d", time.time()) + b"netmon-ai"
+        header = struct.pack("!BBHHH", _ICMP_ECHO_REQUEST, 0, 0, 0, seq)
+        packet = struct.pack("!BBHHH", _ICMP_ECHO_REQUEST, 0, _checksum(header + payload), 0, seq) + payload
+
+        reply = loop.create_future()
+
+        def on_readable():
+            try:
+                data = sock.recv(1024)
+            except OSError:
+                return
+            # The kernel owns the identifier on datagram sockets; match on sequence
+            if len(data) >= 8:
+                icmp_type, _, _, _, reply_seq = struct.unpack("!BBHHH", data[:8])
+                if icmp_type == _ICMP_ECHO_REPLY and reply_seq == seq and not reply.done():
+                    reply.set_result(time.perf_counter())
+
+        loop.add_reader(sock.fileno(), on_readable)
+        try:
+            start = time.perf_counter()
+            sock.sendto(packet, (address, 0))
+            end = await asyncio.wait_for(reply, timeout=self.timeout)
+            return end - start
+        except (asyncio.TimeoutError, OSError):
+            return None
+        finally:
+            loop.remove_reader(sock.fileno())
+            sock.close()
+
+    async def _resolve(self, host):
+        loop = asyncio.get_running_loop()
+        family = socket.AF_INET if self.method == "icmp" else socket.AF_UNSPEC
+        infos = await loop.getaddrinfo(host, None, family=family, type=socket.SOCK_STREAM)
+        family, _, _, _, sockaddr = infos[0]
+        return sockaddr[0], family
+
+    async def probe_host(self, host, semaphore=None):
+        """Sends `count` probes to one host and returns its statistics."""
+        result = {"host": host, "address": None, "method": self.method, "error": None}
+        try:
+            address, family = await self._resolve(host)
+        except (OSError, IndexError) as e:
+            result.update(compute_stats([], self.count))
+            result["error"] = f"resolve failed: {e}"
+            return result
+        result["address"] = address
+
+        rtts = []
+        for seq in range(1, self.count + 1):
+            if semaphore:
+                async with semaphore:
+                    rtt = await self._one_probe(address, family, seq)
+            else:
+                rtt = await self._one_probe(address, family, seq)
+            if rtt is not None:
+                rtts.append(rtt)
+            if seq < self.count:
+                await asyncio.sleep(self.interval)
+        result.update(compute_stats(rtts, self.count))
+        return result
+
+    async def _one_probe(self, address, family, seq):
+        if self.method == "icmp":
+            return await self._icmp_probe(address, seq)
+        return await self._tcp_probe(address, family)
+
+    # --- MANY HOSTS ---
+
+    async def probe_many_async(self, hosts):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        return await asyncio.gather(*(self.probe_host(h, semaphore) for h in hosts))
+
+    def probe_many(self, hosts):
+        """Probes all hosts concurrently and returns one result dict per host."""
+        return asyncio.run(self.probe_many_async(list(hosts)))
+
+    def watch(self, hosts, period=10.0, rounds=None, on_round=None):
+        """
+        Probes continuously every `period` seconds, appending each round to
+        self.series. Runs until `rounds` complete or KeyboardInterrupt.
+        """
+        hosts = list(hosts)
+
+        async def loop():
+            done = 0
+            while rounds is None or done < rounds:
+                started = time.time()
+                results = await self.probe_many_async(hosts)
+                for res in results:
+                    self.series.setdefault(res["host"], deque(maxlen=self.history)).append((started, res))
+                if on_round:
+                    on_round(results)
+                done += 1
+                if rounds is None or done < rounds:
+                    await asyncio.sleep(max(0.0, period - (time.time() - started)))
+
+        asyncio.run(loop())
+        return self.series
+
+    @staticmethod
+    def load_hosts(path):
+        """Reads hosts from a file, one per line, ignoring blanks and # comments."""
+        hosts = []
+        with open(path, "r") as f:
+            for line in f:
+                line = line.split("#", 1)[0].strip()
+                if line:
+                    hosts.append(line)
+        return hosts
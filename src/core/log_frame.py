@@ -0,0 +1,195 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+
+def _require_pandas():
+    """Imports pandas on first use so the shell does not pay for it at startup."""
+    try:
+        import pandas as pd
+    except ImportError:
+        raise ImportError("pandas is required for log frames. Run 'pip install pandas numpy'")
+    return pd
+
+
+class LogFrameParser:
+    """
+    Bulk syslog/auth.log parser producing columnar pandas frames.
+    All field extraction is done with vectorized string operations over whole
+    chunks, never with per-line Python code. `failure` marks one row per
+    failed attempt: sshd logs an invalid user's attempt as "Invalid user",
+    a PAM "authentication failure" and "Failed password" under one pid, and
+    only the last of those counts (like ThreatDetector).
+    """
+    LINE_PATTERN = (
+        r'^(?P<timestamp>[A-Z][a-z]{2}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2}'
+        r'|\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?)'
+        r'\s+(?P<host>\S+)'
+        r'\s+(?P<program>[^\s\[:]+)(?:\[(?P<pid>\d+)\])?:'
+        r'\s?(?P<message>.*)$'
+    )
+    IP_PATTERN = r'(?:from|rhost=)\s*(\d{1,3}(?:\.\d{1,3}){3}|[0-9a-fA-F]*:[0-9a-fA-F:]+)'
+    USER_PATTERN = r'(?:for (?:invalid )?user |for |[Ii]nvalid user |\buser=)([\w.@-]+)'
+    # Lines that end an attempt, and lines logged earlier in the same attempt
+    FAILURE_PATTERN = r'Failed password|Failed publickey|FAILED LOGIN|incorrect password'
+    PRELUDE_PATTERN = r'authentication failure|Invalid user'
+    COLUMNS = ["timestamp", "host", "program", "pid", "message", "ip", "user", "failure"]
+
+    def __init__(self, year=None):
+        # Classic syslog timestamps carry no year
+        self.year = year or time.localtime().tm_year
+
+    def parse_lines(self, lines):
+        """Parses an iterable of raw log lines into a DataFrame."""
+        pd = _require_pandas()
+        raw = pd.Series(list(lines), dtype="string").str.rstrip("\r\n")
+        fields = raw.str.extract(self.LINE_PATTERN)
+
+        # Lines that are not syslog-shaped keep their text as the message
+        unparsed = fields["message"].isna()
+        fields.loc[unparsed, "message"] = raw[unparsed]
+
+        message = fields["message"]
+        frame = pd.DataFrame({
+            "timestamp": self._parse_timestamps(fields["timestamp"]),
+            "host": fields["host"].astype("category"),
+            "program": fields["program"].astype("category"),
+            "pid": pd.to_numeric(fields["pid"], errors="coerce").astype("Int32"),
+            "message": message,
+            "ip": self._extract_where(message, ("from", "rhost="), self.IP_PATTERN),
+            "user": self._extract_where(message, ("user", "for "), self.USER_PATTERN),
+        })
+        frame["failure"] = self._failures(frame)
+        return frame
+
+    def _failures(self, frame):
+        """
+        One True per failed attempt. Closing lines ("Failed password", ...)
+        always count; a prelude line only when no closing line shares its
+        host, program, pid and source, and only the first such prelude.
+        """
+        message = frame["message"]
+        closing = message.str.contains(self.FAILURE_PATTERN, regex=True).fillna(False).astype(bool)
+        prelude = message.str.contains(self.PRELUDE_PATTERN, regex=True).fillna(False).astype(bool) & ~closing
+        if not prelude.any():
+            return closing
+        has_pid = frame["pid"].notna()
+        attempt = (frame["host"].astype("string").fillna("") + "|" + frame["program"].astype("string").fillna("")
+                   + "|" + frame["pid"].astype("string").fillna("") + "|" + frame["ip"].astype("string").fillna(""))
+        closed = attempt[closing & has_pid]
+        grouped = prelude & has_pid
+        repeated = attempt.where(grouped).duplicated() & grouped
+        return closing | (prelude & ~(grouped & (attempt.isin(closed) | repeated)))
+
+    @staticmethod
+    def _extract_where(message, needles, pattern):
+        """Runs a regex only on rows containing one of the literal needles."""
+        pd = _require_pandas()
+        candidates = message.str.contains(needles[0], regex=False)
+        for needle in needles[1:]:
+            candidates |= message.str.contains(needle, regex=False)
+        candidates = candidates.fillna(False).astype(bool)
+        result = pd.Series(pd.NA, index=message.index, dtype="string")
+        if candidates.any():
+            result[candidates] = message[candidates].str.extract(pattern, expand=False)
+        return result.astype("category")
+
+    def _parse_timestamps(self, stamps):
+        """Naive UTC for both stamp kinds; classic syslog stamps are read as local time."""
+        pd = _require_pandas()
+        import numpy as np
+        from dateutil.tz import tzlocal  # A pandas dependency
+        # Busy logs repeat the same second thousands of times: parse each distinct
+        # stamp once and broadcast the results back through the factor codes.
+        codes, uniques = pd.factorize(stamps)
+        uniques = pd.Series(uniques, dtype="string")
+        parsed = pd.Series(pd.NaT, index=uniques.index, dtype="datetime64[ns]")
+
+        classic = uniques.str.match(r'^[A-Z][a-z]{2}\s').fillna(False).astype(bool)
+        if classic.any():
+            normalized = str(self.year) + " " + uniques[classic].str.replace(r'\s+', ' ', regex=True)
+            local = pd.to_datetime(normalized, format="%Y %b %d %H:%M:%S", errors="coerce")
+            # Repeated or skipped wall-clock hours at DST changes have no single UTC instant
+            local = local.dt.tz_localize(tzlocal(), ambiguous="NaT", nonexistent="NaT")
+            parsed[classic] = local.dt.tz_convert("UTC").dt.tz_localize(None)
+
+        iso = ~classic
+        if iso.any():
+            converted = pd.to_datetime(uniques[iso], errors="coerce", utc=True, format="ISO8601")
+            parsed[iso] = converted.dt.tz_localize(None)
+
+        # Code -1 marks a missing stamp; point it at a trailing NaT
+        values = np.append(parsed.to_numpy(dtype="datetime64[ns]"), np.datetime64("NaT", "ns"))
+        return pd.Series(values[codes], index=stamps.index)
+
+    def iter_file(self, file_path, chunk_bytes=16 * 1024 * 1024):
+        """Yields one DataFrame per chunk of the file, keeping memory bounded."""
+        for lines in self._iter_raw_chunks(file_path, chunk_bytes):
+            yield self.parse_lines(lines)
+
+    def _iter_raw_chunks(self, file_path, chunk_bytes):
+        with open(file_path, "r", errors="replace") as f:
+            while True:
+                lines = f.readlines(chunk_bytes)
+                if not lines:
+                    break
+                yield lines
+
+    def parse_file(self, file_path, chunk_bytes=16 * 1024 * 1024, workers=None):
+        """
+        Parses a whole log file into a single DataFrame.
+        Chunks are parsed in a process pool when the file spans more than one.
+        """
+        pd = _require_pandas()
+        workers = workers or os.cpu_count() or 1
+        if workers > 1 and os.path.getsize(file_path) > chunk_bytes:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                chunks = list(pool.map(self.parse_lines, self._iter_raw_chunks(file_path, chunk_bytes)))
+        else:
+            chunks = list(self.iter_file(file_path, chunk_bytes))
+        if not chunks:
+            return self.parse_lines([])
+        frame = pd.concat(chunks, ignore_index=True)
+        # Categories diverge between chunks; re-categorize once at the end
+        for column in ("host", "program", "ip", "user"):
+            frame[column] = frame[column].astype("string").astype("category")
+        return frame
+
+    # --- AGGREGATIONS ---
+
+    @staticmethod
+    def failures_per_ip(frame, freq="1min"):
+        """Counts authentication failures per source IP per time bucket."""
+        pd = _require_pandas()
+        failed = frame[frame["failure"] & frame["ip"].notna() & frame["timestamp"].notna()]
+        counts = (
+            failed.groupby([pd.Grouper(key="timestamp", freq=freq), "ip"], observed=True)
+            .size()
+            .rename("failures")
+            .reset_index()
+        )
+        return counts.sort_values(["timestamp", "failures"], ascending=[True, False], ignore_index=True)
+
+    @staticmethod
+    def top(frame, column, n=10, failures_only=False):
+        """Most frequent values of a column."""
+        if failures_only:
+            frame = frame[frame["failure"]]
+        return frame[column].value_counts(dropna=True).head(n)
+
+    # --- EXPORT ---
+
+    @staticmethod
+    def export(frame, path):
+        """Writes a frame to Parquet (.parquet) or Arrow IPC (.arrow/.feather)."""
+        ext = os.path.splitext(path)[1].lower()
+        try:
+            if ext == ".parquet":
+                frame.to_parquet(path, index=False)
+            elif ext in (".arrow", ".feather"):
+                frame.reset_index(drop=True).to_feather(path)
+            else:
+                raise ValueError(f"Unsupported export format: {ext or path} (use .parquet or .arrow)")
+        except ImportError:
+            raise ImportError("pyarrow is required for Parquet/Arrow export. Run 'pip install pyarrow'")
+        return path
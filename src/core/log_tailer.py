@@ -0,0 +1,230 @@
+import os
+import re
+import select
+import threading
+from utils.inotify import (
+    Inotify, inotify_available,
+    IN_MODIFY, IN_ATTRIB, IN_CREATE, IN_DELETE, IN_MOVED_FROM, IN_MOVED_TO, IN_Q_OVERFLOW,
+)
+
+_DIR_MASK = IN_MODIFY | IN_ATTRIB | IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO
+
+
+class _TailedFile:
+    """Read state for one followed path."""
+    __slots__ = ('path', 'handle', 'ident', 'position', 'partial')
+
+    def __init__(self, path):
+        self.path = path
+        self.handle = None
+        self.ident = None
+        self.position = 0
+        self.partial = b""
+
+
+class LogTailer:
+    """
+    Follows many log files at once.
+    Uses one inotify watch per parent directory when available, so idle files
+    cost nothing, and falls back to stat polling elsewhere. Rotation (new inode)
+    and truncation are detected and the file is reopened from the start.
+    """
+    def __init__(self, paths, keywords=None, patterns=None, from_start=False,
+                 poll_interval=1.0, rescan_interval=30.0, use_inotify=True):
+        if isinstance(paths, str):
+            paths = [paths]
+        self.files = {os.path.abspath(p): _TailedFile(os.path.abspath(p)) for p in paths}
+        self.from_start = from_start
+        self.poll_interval = poll_interval
+        self.rescan_interval = rescan_interval
+        self.use_inotify = use_inotify and inotify_available()
+        self.callbacks = []
+        self._filters = []
+        self._stop = threading.Event()
+        self._wake_r, self._wake_w = os.pipe()
+        self._thread = None
+
+        if keywords:
+            self.add_keywords(keywords)
+        for pattern in patterns or []:
+            self.add_pattern(pattern)
+
+    # --- FILTERS & PIPELINE ---
+
+    def add_keywords(self, keywords):
+        """Adds case-insensitive keyword filters, compiled into one regex."""
+        if isinstance(keywords, str):
+            keywords = [keywords]
+        alternation = "|".join(re.escape(k) for k in keywords if k)
+        if alternation:
+            self._filters.append(re.compile(alternation, re.IGNORECASE))
+
+    def add_pattern(self, pattern, flags=0):
+        """Adds a regular expression filter."""
+        self._filters.append(re.compile(pattern, flags) if isinstance(pattern, str) else pattern)
+
+    def add_callback(self, callback):
+        """
+        Appends a pipeline stage called as callback(path, line).
+        A stage returning False drops the line for the stages after it.
+        """
+        self.callbacks.append(callback)
+
+    def _matches(self, line):
+        if not self._filters:
+            return True
+        return any(f.search(line) for f in self._filters)
+
+    def _emit(self, path, line):
+        if not self._matches(line):
+            return
+        for callback in self.callbacks:
+            if callback(path, line) is False:
+                break
+
+    # --- FILE STATE ---
+
+    def _open(self, tf, at_end):
+        try:
+            handle = open(tf.path, 'rb')
+        except OSError:
+            return False
+        st = os.fstat(handle.fileno())
+        tf.handle = handle
+        tf.ident = (st.st_dev, st.st_ino)
+        tf.position = st.st_size if at_end else 0
+        tf.partial = b""
+        handle.seek(tf.position)
+        return True
+
+    def _close(self, tf):
+        if tf.handle:
+            tf.handle.close()
+        tf.handle = None
+        tf.ident = None
+
+    def _drain(self, tf):
+        """Reads whatever has been appended since the last read."""
+        if not tf.handle:
+            return
+        while True:
+            chunk = tf.handle.read(256 * 1024)
+            if not chunk:
+                break
+            tf.position += len(chunk)
+            data = tf.partial + chunk
+            lines = data.split(b"\n")
+            tf.partial = lines.pop()
+            for raw in lines:
+                self._emit(tf.path, raw.rstrip(b"\r").decode('utf-8', errors='replace'))
+
+    def _check(self, tf):
+        """Handles appends, truncation and rotation for one file."""
+        try:
+            st = os.stat(tf.path)
+        except OSError:
+            # Rotated away or deleted: finish the old file, wait for a new one
+            self._drain(tf)
+            self._close(tf)
+            return
+
+        if tf.handle is None:
+            # (Re)appeared after rotation: everything in it is new
+            self._open(tf, at_end=False)
+        elif (st.st_dev, st.st_ino) != tf.ident:
+            self._drain(tf)
+            self._close(tf)
+            self._open(tf, at_end=False)
+        elif st.st_size < tf.position:
+            # copytruncate-style rotation
+            tf.handle.seek(0)
+            tf.position = 0
+            tf.partial = b""
+        self._drain(tf)
+
+    # --- MAIN LOOPS ---
+
+    def _follow_inotify(self):
+        notifier = Inotify()
+        watches = {}  # wd -> {basename: _TailedFile}
+        try:
+            by_dir = {}
+            for tf in self.files.values():
+                by_dir.setdefault(os.path.dirname(tf.path), {})[os.path.basename(tf.path)] = tf
+            for directory, names in by_dir.items():
+                watches[notifier.add_watch(directory, _DIR_MASK)] = names
+
+            while not self._stop.is_set():
+                ready, _, _ = select.select([notifier, self._wake_r], [], [], self.rescan_interval)
+                if self._wake_r in ready:
+                    os.read(self._wake_r, 64)
+                if not ready:
+                    # Periodic safety rescan in case an event was missed
+                    for tf in self.files.values():
+                        self._check(tf)
+                    continue
+                if notifier not in ready:
+                    continue
+
+                touched = []
+                overflow = False
+                for wd, mask, _, name in notifier.read_events():
+                    if mask & IN_Q_OVERFLOW:
+                        overflow = True
+                        continue
+                    tf = watches.get(wd, {}).get(name)
+                    if tf is not None and tf not in touched:
+                        touched.append(tf)
+                for tf in (self.files.values() if overflow else touched):
+                    self._check(tf)
+        finally:
+            notifier.close()
+
+    def _follow_polling(self):
+        while not self._stop.is_set():
+            for tf in self.files.values():
+                self._check(tf)
+            self._stop.wait(self.poll_interval)
+
+    def follow(self):
+        """Blocks, feeding new lines into the pipeline until stop() is called."""
+        self._stop.clear()
+        for tf in self.files.values():
+            self._open(tf, at_end=not self.from_start)
+            if self.from_start:
+                self._drain(tf)
+        try:
+            if self.use_inotify:
+                try:
+                    self._follow_inotify()
+                    return
+                except OSError:
+                    # Watch limit reached or unsupported filesystem
+                    pass
+            self._follow_polling()
+        finally:
+            for tf in self.files.values():
+                self._close(tf)
+
+    def start(self):
+        """Runs follow() in a background daemon thread."""
+        self._thread = threading.Thread(target=self.follow, name="LogTailer", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+        try:
+            os.write(self._wake_w, b"x")
+        except OSError:
+            pass
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+
+    def close(self):
+        self.stop()
+        for fd in (self._wake_r, self._wake_w):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
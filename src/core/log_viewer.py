@@ -1,6 +1,6 @@
 import os
-import time
 from utils.colors import Colors
+from core.log_tailer import LogTailer
 
 class LogViewer:
     @staticmethod
@@ -20,17 +20,29 @@ class LogViewer:
             return f"Error reading logs: {e}"
 
     @staticmethod
-    def tail_logs(file_path):
-        """Follows a log file in real-time (Ctrl+C to stop)."""
-        print(f"{Colors.CYAN}Tailing {file_path}. Press Ctrl+C to stop...{Colors.RESET}")
+    def tail_logs(file_paths, keyword=None, pattern=None):
+        """Follows one or more log files in real-time (Ctrl+C to stop)."""
+        if isinstance(file_paths, str):
+            file_paths = [file_paths]
+        multi = len(file_paths) > 1
+
+        def print_line(path, line):
+            if multi:
+                print(f"{Colors.BLUE}{os.path.basename(path)}:{Colors.RESET} {line}")
+            else:
+                print(line)
+
+        tailer = LogTailer(
+            file_paths,
+            keywords=[keyword] if keyword else None,
+            patterns=[pattern] if pattern else None
+        )
+        tailer.add_callback(print_line)
+
+        print(f"{Colors.CYAN}Tailing {', '.join(file_paths)}. Press Ctrl+C to stop...{Colors.RESET}")
         try:
-            with open(file_path, 'r') as f:
-                f.seek(0, 2)  # Move to end of file
-                while True:
-                    line = f.readline()
-                    if not line:
-                        time.sleep(0.1)
-                        continue
-                    print(line, end='')
+            tailer.follow()
         except KeyboardInterrupt:
-            print(f"\n{Colors.WARNING}Stopped tailing.{Colors.RESET}")
\ No newline at end of file
+            print(f"\n{Colors.WARNING}Stopped tailing.{Colors.RESET}")
+        finally:
+            tailer.close()
@@ -1,14 +1,11 @@
 import psutil
 import time
 import os
-from rich.console import Console
-from rich.table import Table
-from rich.live import Live
-from rich.panel import Panel
-
-console = Console()
+from utils.perf import span, timed
+from core.records import Metrics
 
 class SystemMonitor:
+    @timed("collector.metrics")
     def get_metrics(self):
         """Standardized metric collection for both AI context and TUI display."""
         # Cross-platform disk path
@@ -20,42 +17,103 @@ class SystemMonitor:
         # Get network I/O counters
         net_io = psutil.net_io_counters()
         
-        return {
-            "cpu": psutil.cpu_percent(interval=None),
-            "mem": psutil.virtual_memory().percent,
-            "disk": psutil.disk_usage(disk_path).percent,
-            "network_sent": net_io.bytes_sent,
-            "network_recv": net_io.bytes_recv,
-            "boot_time": psutil.boot_time()
-        }
+        return Metrics(
+            cpu=psutil.cpu_percent(interval=None),
+            mem=psutil.virtual_memory().percent,
+            disk=psutil.disk_usage(disk_path).percent,
+            network_sent=net_io.bytes_sent,
+            network_recv=net_io.bytes_recv,
+            boot_time=psutil.boot_time()
+        )
+
+    def display_dashboard(self, history=None, trend_minutes=30, anomalies=None, filesystems=None, max_mounts=6,
+                          cgroups=None, max_cgroups=5):
+        """
+        Professional TUI Dashboard using the Rich Live library, with trend
+        sparklines from history. With an anomaly detector, a value unusual for
+        this host is flagged even when it is under the fixed 60/85% limits.
+        With a FilesystemMonitor, every other mount and each disk's I/O
+        utilization get a row too, and with a CgroupMonitor the busiest
+        containers / systemd units.
+        """
+        # Imported here so batch mode does not pay for Rich at startup
+        from rich.console import Console
+        from rich.table import Table
+        from rich.live import Live
+        from rich.panel import Panel
+        from utils.helpers import format_bytes, sparkline
+        console = Console()
+        root = 'C:\\' if os.name == 'nt' else '/'
+
+        def level(val):
+            if val > 85:
+                return "red", "CRITICAL"
+            return ("yellow", "WARNING") if val > 60 else ("green", "HEALTHY")
+
+        def trend(metric, **scale):
+            """The trend cell for a row ([] without history, so the column is simply absent)."""
+            if history is None:
+                return []
+            _, values = history.query(metric, time.time() - trend_minutes * 60)
+            return [f"[cyan]{sparkline(values, 30, **scale)}[/]"]
 
-    def display_dashboard(self):
-        """Professional TUI Dashboard using the Rich Live library."""
         def generate_table():
             stats = self.get_metrics()
             table = Table(show_header=True, header_style="bold magenta", expand=True)
             table.add_column("Resource")
             table.add_column("Usage %", justify="right")
             table.add_column("Status", justify="center")
+            if history is not None:
+                table.add_column(f"Trend ({trend_minutes}m)")
 
             # CPU, RAM, Disk metrics
-            for label, val in [("CPU", stats['cpu']), ("RAM", stats['mem']), ("Disk", stats['disk'])]:
-                color = "red" if val > 85 else "yellow" if val > 60 else "green"
-                status = "CRITICAL" if val > 85 else "WARNING" if val > 60 else "HEALTHY"
-                table.add_row(label, f"[{color}]{val:.1f}%[/]", f"[{color}]{status}[/]")
+            for label, key in [("CPU", "cpu"), ("RAM", "mem"), ("Disk", "disk")]:
+                val = stats[key]
+                color, status = level(val)
+                unusual, z = anomalies.status(key) if anomalies is not None else (False, 0.0)
+                if unusual:
+                    color, status = "magenta", f"ANOMALY {z:+.1f}sd"
+                table.add_row(label, f"[{color}]{val:.1f}%[/]", f"[{color}]{status}[/]", *trend(key, lo=0, hi=100))
+
+            if filesystems is not None:
+                # Other mounts (the root one is the Disk row above): fuller of space and inodes
+                blank = [""] if history is not None else []
+                for m in [m for m in filesystems.usage() if m.mountpoint != root][:max_mounts]:
+                    color, status = level(max(m.percent, m.inodes_percent or 0.0))
+                    if (m.inodes_percent or 0.0) > m.percent:
+                        status += f" (inodes {m.inodes_percent:.0f}%)"
+                    table.add_row(f"Disk {m.mountpoint}", f"[{color}]{m.percent:.1f}%[/]", f"[{color}]{status}[/]", *blank)
+                # Per-disk utilization; await is what a saturated database volume shows first
+                for d in filesystems.io(fresh=1.0):
+                    color, status = level(d.util or 0.0)
+                    detail = (f"{d.read_iops:.0f} r/s {d.write_iops:.0f} w/s "
+                              f"{format_bytes(d.read_bps + d.write_bps)}/s")
+                    table.add_row(f"I/O {d.disk}", f"[{color}]{d.util or 0.0:.1f}%[/]",
+                                  f"[{color}]{status} {d.await_ms:.0f}ms[/]", *([detail] if history is not None else []))
+
+            if cgroups is not None:
+                # CPU is of one core (a group can exceed 100%); memory colors the status
+                for g in cgroups.sample(fresh=1.0)[:max_cgroups]:
+                    color, status = level(g.memory_percent or 0.0)
+                    detail = (f"{format_bytes(g.read_bps + g.write_bps)}/s io"
+                              + (f", throttled {g.throttled_percent:.0f}%" if g.throttled_percent else ""))
+                    table.add_row(f"CG {g.name[:24]}", f"[cyan]{g.cpu_percent:.1f}%[/]",
+                                  f"[{color}]mem {format_bytes(g.memory or 0)}[/]", *([detail] if history is not None else []))
             
-            # Network metrics (show current totals in GB)
+            # Network metrics (show current totals in GB, trend of the rate)
             net_sent_gb = stats['network_sent'] / (1024**3)
             net_recv_gb = stats['network_recv'] / (1024**3)
             table.add_row(
                 "Network Sent", 
                 f"[cyan]{net_sent_gb:.2f} GB[/]", 
-                "[cyan]TOTAL[/]"
+                "[cyan]TOTAL[/]",
+                *trend("net_sent", lo=0)
             )
             table.add_row(
                 "Network Recv", 
                 f"[cyan]{net_recv_gb:.2f} GB[/]", 
-                "[cyan]TOTAL[/]"
+                "[cyan]TOTAL[/]",
+                *trend("net_recv", lo=0)
             )
             
             return table
@@ -70,6 +128,7 @@ class SystemMonitor:
             with Live(generate_table(), refresh_per_second=2) as live:
                 while True:
                     time.sleep(0.5)
-                    live.update(generate_table())
+                    with span("render.dashboard"):
+                        live.update(generate_table())
         except KeyboardInterrupt:
             console.print("\n[yellow]Dashboard suspended.[/]")
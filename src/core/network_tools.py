@@ -1,66 +1,143 @@
 import socket
-import subprocess
 import time
 import os
 import psutil
+from concurrent.futures import ThreadPoolExecutor
 from utils.colors import Colors
+from utils import perf
 from utils.helpers import format_bytes
+from core.connection_table import ConnectionTable
+from core.latency_prober import LatencyProber
 
 class NetworkTools:
+    # Shared so the PID -> name cache survives between calls
+    connection_table = ConnectionTable()
+
     @staticmethod
-    def ping(host, count=4):
-        """Performs a standard ping and displays results."""
+    def ping_output(host, count=4):
+        """Runs the system ping and returns (success, output or error)."""
         param = "-n" if os.name == "nt" else "-c"
         command = ["ping", param, str(count), host]
-        
-        print(f"{Colors.CYAN}Pinging {host}...{Colors.RESET}")
         try:
-            output = subprocess.check_output(command).decode()
-            print(output)
+            return True, perf.check_output(command).decode()
         except Exception as e:
-            print(f"{Colors.FAIL}Ping failed: {e}{Colors.RESET}")
+            return False, str(e)
+
+    @classmethod
+    def ping(cls, host, count=4, result=None):
+        """Performs a standard ping and displays results."""
+        print(f"{Colors.CYAN}Pinging {host}...{Colors.RESET}")
+        success, output = result or cls.ping_output(host, count)
+        if success:
+            print(output)
+        else:
+            print(f"{Colors.FAIL}Ping failed: {output}{Colors.RESET}")
+
+    @staticmethod
+    def probe(hosts, count=4, port=443, method="auto", watch=None):
+        """Probes many hosts concurrently and prints latency/loss statistics."""
+        prober = LatencyProber(count=count, port=port, method=method)
+        print(f"{Colors.CYAN}Probing {len(hosts)} host(s) via {prober.method.upper()}"
+              f"{f' port {port}' if prober.method == 'tcp' else ''}...{Colors.RESET}")
+
+        def print_results(results):
+            print(f"\n{Colors.BOLD}{'Host':<28} {'Loss':>6} {'Min':>8} {'Avg':>8} {'Max':>8} {'P95':>8} {'Jitter':>8}  (ms){Colors.RESET}")
+            for r in sorted(results, key=lambda r: (r['loss'], r['avg'] or 0)):
+                color = Colors.GREEN if r['loss'] == 0 else Colors.FAIL if r['loss'] == 100 else Colors.WARNING
+                cells = "".join(f" {('-' if r[k] is None else f'{r[k]:.1f}'):>8}" for k in ('min', 'avg', 'max', 'p95', 'jitter'))
+                note = f"  {r['error']}" if r['error'] else ""
+                print(f"{color}{r['host'][:28]:<28} {r['loss']:>5.0f}%{cells}{note}{Colors.RESET}")
+
+        try:
+            if watch:
+                prober.watch(hosts, period=watch, on_round=print_results)
+            else:
+                results = prober.probe_many(hosts)
+                print_results(results)
+                return results
+        except KeyboardInterrupt:
+            print(f"\n{Colors.WARNING}Stopped probing.{Colors.RESET}")
 
     @staticmethod
-    def port_scan(host, ports=[21, 22, 80, 443, 3306, 8080]):
+    def scan_ports(host, ports=(21, 22, 80, 443, 3306, 8080), timeout=1.0):
+        """Returns {port: is_open}, connecting to all ports concurrently."""
+        def is_open(port):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.settimeout(timeout)
+            try:
+                return sock.connect_ex((host, port)) == 0
+            except OSError:
+                return False
+            finally:
+                sock.close()
+
+        ports = list(ports)
+        with ThreadPoolExecutor(max_workers=min(32, len(ports) or 1)) as pool:
+            return dict(zip(ports, pool.map(is_open, ports)))
+
+    @classmethod
+    def port_scan(cls, host, ports=(21, 22, 80, 443, 3306, 8080), result=None):
         """Checks if specific common ports are open on a host."""
         print(f"{Colors.HEADER}🔍 Scanning {host} for open ports...{Colors.RESET}")
-        for port in ports:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(1)
-            result = sock.connect_ex((host, port))
-            if result == 0:
+        for port, is_open in (result or cls.scan_ports(host, ports)).items():
+            if is_open:
                 print(f"{Colors.GREEN}Port {port}: OPEN{Colors.RESET}")
             else:
                 print(f"{Colors.FAIL}Port {port}: CLOSED{Colors.RESET}")
-            sock.close()
 
     @staticmethod
-    def get_bandwidth():
-        """Calculates real-time network traffic throughput."""
+    @perf.timed("collector.bandwidth")
+    def measure_bandwidth(interval=1.0):
+        """Returns (bytes sent, bytes received) per second over one sample."""
         old_value = psutil.net_io_counters()
-        time.sleep(1)
+        time.sleep(interval)
         new_value = psutil.net_io_counters()
-        
-        sent = new_value.bytes_sent - old_value.bytes_sent
-        recv = new_value.bytes_recv - old_value.bytes_recv
+        return ((new_value.bytes_sent - old_value.bytes_sent) / interval,
+                (new_value.bytes_recv - old_value.bytes_recv) / interval)
+
+    @classmethod
+    def get_bandwidth(cls, rates=None):
+        """Calculates real-time network traffic throughput."""
+        sent, recv = rates or cls.measure_bandwidth()
         
         print(f"{Colors.BOLD}Network Usage (1s sample):{Colors.RESET}")
         print(f"📤 Sent: {format_bytes(sent)}/s")
         print(f"📥 Received: {format_bytes(recv)}/s")
 
-    @staticmethod
-    def show_connections():
-        """Displays active network connections and the apps using them."""
-        print(f"\n{Colors.HEADER}🌐 ACTIVE NETWORK CONNECTIONS{Colors.RESET}")
-        print(f"{Colors.BOLD}{'Proto':<6} {'Local Address':<25} {'Remote Address':<25} {'Status':<15}{Colors.RESET}")
-        
+    @classmethod
+    def show_connections(cls, state=None, port=None, proc=None, remote=None,
+                         top=5, page=1, page_size=50, fast=False, rows=None):
+        """
+        Displays active network connections and the apps using them.
+        Prints per-state counts and top talkers first, then one page of rows.
+        With fast=True, /proc/net is read directly and process attribution is skipped.
+        rows may pass in an already taken snapshot.
+        """
+        table = cls.connection_table
         try:
-            for conn in psutil.net_connections(kind='inet'):
-                laddr = f"{conn.laddr.ip}:{conn.laddr.port}"
-                raddr = f"{conn.raddr.ip}:{conn.raddr.port}" if conn.raddr else "LISTENING"
-                proto = "TCP" if conn.type == 1 else "UDP"
-                
-                # Filter for active or listening connections
-                print(f"{proto:<6} {laddr:<25} {raddr:<25} {conn.status:<15}")
-        except Exception as e:
-            print(f"{Colors.FAIL}Error fetching connections: {e}{Colors.RESET}")
\ No newline at end of file
+            rows = rows if rows is not None else table.snapshot(attribute_processes=not fast)
+        except (psutil.AccessDenied, OSError) as e:
+            print(f"{Colors.FAIL}Error fetching connections: {e}{Colors.RESET}")
+            return
+        table.prune_names(rows)
+        total = len(rows)
+        rows = table.filter(rows, state=state, port=port, proc=proc, remote=remote)
+
+        print(f"\n{Colors.HEADER}🌐 ACTIVE NETWORK CONNECTIONS{Colors.RESET} "
+              f"({len(rows)} of {total} sockets)")
+        states = "  ".join(f"{s}={n}" for s, n in table.aggregate(rows, "state", top=None))
+        print(f"{Colors.BOLD}States:{Colors.RESET} {states or 'none'}")
+        groups = [("Remote hosts", "remote"), ("Local ports", "lport")]
+        if not fast:
+            groups.append(("Processes", "process"))
+        for label, key in groups:
+            summary = ", ".join(f"{k} ({n})" for k, n in table.aggregate(rows, key, top=top))
+            print(f"{Colors.BOLD}Top {label}:{Colors.RESET} {summary or 'none'}")
+
+        shown, pages = table.page(rows, page, page_size)
+        print(f"\n{Colors.BOLD}{'Proto':<6} {'Local Address':<25} {'Remote Address':<25} {'Status':<13} {'Process'}{Colors.RESET}")
+        for row in shown:
+            print(table.format_row(row))
+        if pages > 1:
+            current = min(max(1, page), pages)
+            print(f"{Colors.CYAN}Page {current}/{pages} (use --page N, or filter with --state/--port/--proc/--remote){Colors.RESET}")
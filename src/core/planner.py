@@ -0,0 +1,142 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.colors import Colors
+from core.registry import Handler, max_risk
+
+
+class PlanExecutor:
+    """
+    Runs a validated multi-step plan from the AI against the shell's registry.
+    All YELLOW/RED steps are confirmed together up front and every step is
+    audited. Steps then run in dependency waves: GREEN steps whose handler
+    has collect() are gathered concurrently, and everything is rendered or
+    executed in plan order so output never interleaves. Targets are resolved
+    (and security-checked) again when a step is dispatched, since an earlier
+    MOVE_DIR changes what a relative path means.
+    """
+    def __init__(self, shell, max_workers=8):
+        self.shell = shell
+        self.max_workers = max_workers
+
+    def _prepare(self, step):
+        entry = self.shell.registry.get_action(step["action"])
+        prepared = {
+            "step": step, "id": step["id"], "depends_on": step.get("depends_on", []),
+            "entry": entry, "risk": max_risk(step.get("risk_level"), entry.risk if entry else None),
+            "target": None, "status": "pending", "error": None,
+        }
+        if entry is None:
+            prepared["status"], prepared["error"] = "invalid", f"action {step['action']} is not implemented"
+            return prepared
+        # Early rejection (before confirmation) only where no earlier step can change what the target
+        # means; every target is resolved for real at dispatch
+        error = None if prepared["depends_on"] else self.shell._resolve_target(entry, step.get("target"))[1]
+        if error:
+            prepared["status"], prepared["error"] = "invalid", f"security violation: {error}"
+        return prepared
+
+    def _resolve(self, plan_id, p):
+        """Resolves a step's target against the current directory right before it runs. False if refused."""
+        target, error = self.shell._resolve_target(p["entry"], p["step"].get("target"))
+        if not error:
+            p["target"] = target
+            return True
+        p["status"], p["error"] = "invalid", f"security violation: {error}"
+        print(f"{Colors.FAIL}{self._describe(p)}: {p['error']}{Colors.RESET}")
+        self.shell.auditor.log_event("plan_step", p["step"]["action"], risk=p["risk"], status="BLOCKED",
+                                     plan=plan_id, step=p["id"], error=p["error"])
+        return False
+
+    def _describe(self, p):
+        target = p["step"].get("target")
+        on = f" on {target}" if target and str(target).lower() != "none" else ""
+        deps = f" (after {', '.join(map(str, p['depends_on']))})" if p["depends_on"] else ""
+        return f"[{p['id']}] {p['step']['action']}{on}{deps}"
+
+    def _confirm(self, steps):
+        risky = [p for p in steps if p["status"] == "pending" and p["risk"] in ("YELLOW", "RED")]
+        if not risky:
+            return
+        worst = max_risk(*(p["risk"] for p in risky))
+        print(f"\n{Colors.WARNING}⚠️  SECURITY ALERT: {len(risky)} {worst} RISK STEP(S) IN PLAN{Colors.RESET}")
+        for p in risky:
+            color = Colors.FAIL if p["risk"] == "RED" else Colors.WARNING
+            print(f"  {color}{p['risk']:<7}{Colors.RESET} {self._describe(p)}")
+        if not self.shell.confirm("Do you authorize these system changes?"):
+            print(f"{Colors.FAIL}Risky steps rejected; running the rest.{Colors.RESET}")
+            for p in risky:
+                p["status"] = "rejected"
+
+    def _request(self, query, p):
+        return {"query": query, "intent": p["step"], "target": p["target"], "value": p["step"].get("value")}
+
+    def _run_wave(self, query, plan_id, wave):
+        # Resolve handlers on this thread; lazy imports are not safe to race
+        handlers = {p["id"]: p["entry"].handler for p in wave}
+        parallel = [p for p in wave if p["risk"] == "GREEN" and isinstance(handlers[p["id"]], Handler)
+                    and self._resolve(plan_id, p)]
+        futures = {}
+        if parallel:
+            pool = ThreadPoolExecutor(max_workers=min(self.max_workers, len(parallel)))
+            for p in parallel:
+                futures[p["id"]] = pool.submit(handlers[p["id"]].collect, self.shell, self._request(query, p))
+            pool.shutdown(wait=False)
+
+        for p in wave:
+            if p["status"] == "invalid" or (p["id"] not in futures and not self._resolve(plan_id, p)):
+                continue
+            print(f"\n{Colors.CYAN}{self._describe(p)}{Colors.RESET}")
+            try:
+                if p["id"] in futures:
+                    data = futures[p["id"]].result()
+                    handlers[p["id"]].render(self.shell, data)
+                    result = data
+                else:
+                    result = p["entry"](self.shell, self._request(query, p))
+                p["status"] = "failed" if result is False else "done"
+            except Exception as e:
+                p["status"], p["error"] = "failed", str(e)
+                print(f"{Colors.FAIL}Execution Error: {e}{Colors.RESET}")
+
+    def run(self, query, plan):
+        started = time.time()
+        plan_id = f"{int(started * 1000):x}"
+        steps = [self._prepare(step) for step in plan["steps"]]
+        self._confirm(steps)
+
+        for p in steps:
+            if p["status"] == "invalid":
+                # Refused by validation, not by the human: not an APPROVED/REJECTED intent
+                print(f"{Colors.FAIL}{self._describe(p)}: {p['error']}{Colors.RESET}")
+                self.shell.auditor.log_event("plan_step", p["step"]["action"], risk=p["risk"],
+                                             status="INVALID" if p["entry"] is None else "BLOCKED",
+                                             query=query, plan=plan_id, step=p["id"],
+                                             depends_on=p["depends_on"], error=p["error"])
+                continue
+            authorized = p["status"] == "pending"
+            self.shell.auditor.log_intent(query, dict(p["step"], risk_level=p["risk"]), authorized,
+                                          plan=plan_id, step=p["id"], depends_on=p["depends_on"])
+
+        finished, failed = set(), {p["id"] for p in steps if p["status"] != "pending"}
+        pending = [p for p in steps if p["status"] == "pending"]
+        while pending:
+            for p in pending:
+                if any(d in failed for d in p["depends_on"]):
+                    p["status"] = "blocked"
+                    failed.add(p["id"])
+            pending = [p for p in pending if p["status"] == "pending"]
+            wave = [p for p in pending if all(d in finished for d in p["depends_on"])]
+            if not wave:
+                break
+            self._run_wave(query, plan_id, wave)
+            for p in wave:
+                (finished if p["status"] == "done" else failed).add(p["id"])
+            pending = [p for p in pending if p["status"] == "pending"]
+
+        counts = {}
+        for p in steps:
+            counts[p["status"]] = counts.get(p["status"], 0) + 1
+        summary = ", ".join(f"{n} {status}" for status, n in counts.items())
+        color = Colors.GREEN if counts.get("done") == len(steps) else Colors.WARNING
+        print(f"\n{color}Plan finished in {time.time() - started:.2f}s: {summary}{Colors.RESET}")
+        return steps
@@ -0,0 +1,123 @@
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Prefetcher:
+    """
+    Speculatively runs read-only collectors while the AI resolves an intent.
+    A cheap local guess (keywords plus the heuristic classifier) picks the
+    likely collectors; handlers then take() the warm result instead of
+    collecting again. Results are used at most once and expire after max_age,
+    so a wrong guess only costs a discarded background sample.
+    """
+    # Collectors each guessed action will need
+    ACTIONS = {
+        "MONITOR_CPU": ("metrics",),
+        "MONITOR_MEM": ("metrics",),
+        "MONITOR_DISK": ("metrics", "filesystems"),
+        "MONITOR_SUMMARY": ("metrics",),
+        "PROCESS_LIST": ("processes",),
+        "CGROUP_USAGE": ("cgroups",),
+        "CONNECTIONS": ("connections",),
+        "BANDWIDTH": ("bandwidth",),
+    }
+
+    # Cheap enough to always run; the AI context snapshot reads them too
+    ALWAYS = ("metrics",)
+
+    # Wider than the classifier: questions that are likely to end in one of the actions above
+    KEYWORDS = {
+        "metrics": r"\b(cpu|ram|mem|memory|disk|storage|load|usage|health|slow)\b",
+        "processes": r"\b(process(es)?|procs?|running|hogs?|top|slow)\b",
+        "connections": r"\b(connections?|sockets?|listening|established|ports?)\b",
+        "bandwidth": r"\b(bandwidth|traffic|throughput|upload|download)\b",
+        "filesystems": r"\b(disks?|storage|mounts?|filesystems?|inodes?|iops|i/o|io|full)\b",
+        "cgroups": r"\b(containers?|docker|podman|cgroups?|slices?|pods?|k8s|kubernetes|services?)\b",
+    }
+
+    def __init__(self, shell, max_age=5.0, max_workers=4):
+        self.collectors = {
+            "metrics": shell.monitor.get_metrics,
+            "processes": shell.proc_mgr.list_processes,
+            "connections": shell.net_tools.connection_table.snapshot,
+            "bandwidth": shell.net_tools.measure_bandwidth,
+            "filesystems": shell.filesystems.snapshot,
+            "cgroups": shell.cgroups.snapshot,
+        }
+        self.max_age = max_age
+        self.max_workers = max_workers
+        self._pool = None
+        self._pending = {}  # name -> (started, future)
+        self.latest = {}  # name -> (finished, result), for readers that must not wait or consume
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def predict(self, query, guess=None):
+        """Names of the collectors a query is likely to need."""
+        names = set(self.ALWAYS) | set(self.ACTIONS.get((guess or {}).get("action"), ()))
+        q = query.lower()
+        for name, pattern in self.KEYWORDS.items():
+            if re.search(pattern, q):
+                names.add(name)
+        return names
+
+    def start(self, query, guess=None):
+        """Starts the predicted collectors in the background. Returns their names."""
+        names = self.predict(query, guess)
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="prefetch")
+            now = time.monotonic()
+            for name in names:
+                started, future = self._pending.get(name, (0, None))
+                # A sample still in flight or fresh enough is reused, not restarted
+                if future is not None and now - started < self.max_age:
+                    continue
+                future = self._pool.submit(self.collectors[name])
+                future.add_done_callback(lambda f, name=name: self._remember(name, f))
+                self._pending[name] = (now, future)
+        return names
+
+    def _remember(self, name, future):
+        if not future.cancelled() and future.exception() is None:
+            self.latest[name] = (time.monotonic(), future.result())
+
+    def peek(self, name, wait=0.0):
+        """
+        Returns the newest fresh result for name without consuming it, waiting
+        at most `wait` seconds for a run still in flight. None if there is none.
+        """
+        with self._lock:
+            started, future = self._pending.get(name, (0, None))
+        if future is not None and wait > 0:
+            try:
+                future.result(timeout=wait)
+            except Exception:
+                pass  # Still running or failed; fall back to the last good result
+        finished, result = self.latest.get(name, (0, None))
+        return result if time.monotonic() - finished < self.max_age else None
+
+    def take(self, name, loader=None):
+        """
+        Returns the prefetched result for name, waiting for it if still running.
+        Falls back to loader() when nothing usable was prefetched.
+        """
+        with self._lock:
+            started, future = self._pending.pop(name, (0, None))
+        if future is not None and time.monotonic() - started < self.max_age:
+            try:
+                result = future.result()
+            except Exception:
+                pass  # The speculative run failed; collect for real below
+            else:
+                self.hits += 1
+                return result
+        self.misses += 1
+        if loader is None:
+            return None
+        result = loader()
+        self.latest[name] = (time.monotonic(), result)
+        return result
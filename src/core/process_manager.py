@@ -1,10 +1,16 @@
 import psutil
 import os
+from utils.perf import timed
+from core.records import ProcessTable
 
 class ProcessManager:
+    # Shared so CPU percentages are measured between consecutive refreshes
+    process_table = ProcessTable()
+
     @staticmethod
+    @timed("collector.processes")
     def list_processes(limit=10, sort_by='cpu'):
-        """Lists top processes by CPU or Memory."""
+        """Lists top processes by CPU or Memory (dict-compatible ProcessRecords)."""
         # Validate inputs
         if not isinstance(limit, int) or limit < 1 or limit > 100:
             limit = 10
@@ -12,16 +18,7 @@ class ProcessManager:
         if sort_by not in ['cpu', 'memory']:
             sort_by = 'cpu'
         
-        processes = []
-        for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent']):
-            try:
-                processes.append(proc.info)
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                continue
-        
-        key = 'cpu_percent' if sort_by == 'cpu' else 'memory_percent'
-        processes.sort(key=lambda x: x.get(key, 0), reverse=True)
-        return processes[:limit]
+        return ProcessManager.process_table.snapshot().top(limit, sort_by)
 
     @staticmethod
     def kill_process(pid):
@@ -0,0 +1,205 @@
+import heapq
+import os
+import time
+from array import array
+
+
+class Record:
+    """
+    Base for compact snapshot rows. Subclasses declare __slots__, so a row
+    costs no per-instance dict, yet it still reads like the dicts collectors
+    used to return (row["pid"], row.get("name"), dict(row), json via to_dict()).
+    """
+    __slots__ = ()
+
+    def __init__(self, *values, **named):
+        for field, value in zip(self.__slots__, values):
+            setattr(self, field, value)
+        for field in self.__slots__[len(values):]:
+            setattr(self, field, named.get(field))
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            other = other.to_dict()
+        return self.to_dict() == other
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{k}={getattr(self, k)!r}' for k in self.__slots__)})"
+
+    def get(self, key, default=None):
+        value = getattr(self, key, default) if key in self.__slots__ else default
+        return default if value is None else value
+
+    def keys(self):
+        return self.__slots__
+
+    def items(self):
+        return [(k, getattr(self, k)) for k in self.__slots__]
+
+    def to_dict(self):
+        return {k: getattr(self, k) for k in self.__slots__}
+
+
+class Metrics(Record):
+    __slots__ = ("cpu", "mem", "disk", "network_sent", "network_recv", "boot_time")
+
+
+class ProcessRecord(Record):
+    __slots__ = ("pid", "name", "cpu_percent", "memory_percent")
+
+
+class MountUsage(Record):
+    __slots__ = ("device", "mountpoint", "fstype", "total", "used", "free", "percent",
+                 "inodes", "inodes_used", "inodes_percent")
+
+
+class DiskIO(Record):
+    __slots__ = ("disk", "read_iops", "write_iops", "read_bps", "write_bps", "await_ms", "util")
+
+
+class CgroupUsage(Record):
+    __slots__ = ("path", "name", "cpu_percent", "memory", "memory_percent", "memory_max",
+                 "read_bps", "write_bps", "pids", "throttled_percent")
+
+
+class UserAccount(Record):
+    __slots__ = ("name", "uid", "gid", "group", "groups", "gecos", "home", "shell", "login", "password",
+                 "last_change", "max_days", "expires", "last_login", "last_login_from")
+
+
+class ProcessSnapshot:
+    """
+    Struct-of-arrays process table: numeric columns live in typed arrays and
+    names in one list, so a 10k-process refresh allocates four containers
+    instead of 10k dicts. Rows are materialized as ProcessRecord only for
+    what is actually shown (top(), records()).
+    """
+    def __init__(self):
+        self.pids = array("l")
+        self.cpu = array("d")
+        self.mem = array("d")
+        self.names = []
+        self.taken = time.time()
+
+    def append(self, pid, name, cpu, mem):
+        self.pids.append(pid)
+        self.names.append(name)
+        self.cpu.append(cpu or 0.0)
+        self.mem.append(mem or 0.0)
+
+    def __len__(self):
+        return len(self.pids)
+
+    def record(self, i):
+        return ProcessRecord(self.pids[i], self.names[i], self.cpu[i], self.mem[i])
+
+    def records(self, indices=None):
+        for i in (range(len(self)) if indices is None else indices):
+            yield self.record(i)
+
+    def _column(self, sort_by):
+        return self.mem if sort_by == "memory" else self.cpu
+
+    def top(self, n=10, sort_by="cpu"):
+        """The n busiest rows by cpu or memory, as records (O(N log n), no full sort)."""
+        column = self._column(sort_by)
+        return [self.record(i) for i in heapq.nlargest(n, range(len(column)), key=column.__getitem__)]
+
+    def order(self, sort_by="cpu", reverse=True):
+        """Row indices sorted by cpu or memory."""
+        column = self._column(sort_by)
+        return sorted(range(len(column)), key=column.__getitem__, reverse=reverse)
+
+    def select(self, name=None, min_cpu=None, min_mem=None):
+        """Row indices matching a name substring and/or usage thresholds."""
+        name = name.lower() if name else None
+        return [i for i in range(len(self))
+                if (name is None or name in self.names[i].lower())
+                and (min_cpu is None or self.cpu[i] >= min_cpu)
+                and (min_mem is None or self.mem[i] >= min_mem)]
+
+
+class ProcessTable:
+    """
+    Collects ProcessSnapshots. On Linux /proc/<pid>/stat is parsed directly
+    (one read per process, no psutil Process objects or info dicts) and CPU
+    percentages come from tick deltas against the previous snapshot, with
+    psutil's semantics: per-CPU percent, 0.0 the first time a PID is seen.
+    Elsewhere psutil.process_iter is used.
+    """
+    def __init__(self):
+        self._ticks = {}
+        self._taken = None
+        self._total_mem = None
+
+    @staticmethod
+    def proc_available():
+        return os.path.exists("/proc/self/stat")
+
+    def snapshot(self):
+        if self.proc_available():
+            return self._snapshot_proc()
+        return self._snapshot_psutil()
+
+    def _snapshot_proc(self):
+        if self._total_mem is None:
+            import psutil
+            self._total_mem = psutil.virtual_memory().total
+            self._clock = os.sysconf("SC_CLK_TCK")
+            self._page = os.sysconf("SC_PAGE_SIZE")
+        snap = ProcessSnapshot()
+        now = time.monotonic()
+        elapsed = (now - self._taken) * self._clock if self._taken else None
+        previous, ticks = self._ticks, {}
+        mem_scale = self._page * 100.0 / self._total_mem
+        for entry in os.scandir("/proc"):
+            if not entry.name.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry.name}/stat", "rb") as f:
+                    data = f.read()
+            except OSError:
+                continue  # Exited between scandir and open
+            # comm may contain spaces and parentheses; it ends at the last ')'
+            start, end = data.find(b"("), data.rfind(b")")
+            fields = data[end + 2:].split()
+            pid = int(entry.name)
+            used = int(fields[11]) + int(fields[12])  # utime + stime
+            ticks[pid] = used
+            before = previous.get(pid)
+            cpu = round((used - before) * 100.0 / elapsed, 1) if before is not None and elapsed else 0.0
+            snap.append(pid, data[start + 1:end].decode(errors="replace"), cpu, int(fields[21]) * mem_scale)
+        self._ticks, self._taken = ticks, now
+        return snap
+
+    @staticmethod
+    def _snapshot_psutil():
+        import psutil
+        snap = ProcessSnapshot()
+        for proc in psutil.process_iter(["pid", "name", "cpu_percent", "memory_percent"]):
+            try:
+                info = proc.info
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+            snap.append(info["pid"], info.get("name") or "?", info.get("cpu_percent"), info.get("memory_percent"))
+        return snap
@@ -0,0 +1,216 @@
+import importlib
+from utils.perf import span
+
+RISK_ORDER = {"GREEN": 0, "YELLOW": 1, "RED": 2}
+PLUGIN_GROUPS = {"command": "netmon_ai.commands", "action": "netmon_ai.actions"}
+
+
+class UsageError(ValueError):
+    pass
+
+
+def max_risk(*levels):
+    """Returns the most severe of the given risk levels (unknown counts as RED)."""
+    return max((lvl for lvl in levels if lvl), key=lambda lvl: RISK_ORDER.get(lvl, 2), default="GREEN")
+
+
+class Arg:
+    """Positional argument. many=True swallows every remaining positional."""
+    def __init__(self, name, type=str, required=True, many=False, default=None):
+        self.name = name
+        self.type = type
+        self.required = required
+        self.many = many
+        self.default = default
+
+
+class Opt:
+    """'--flag value' option, or a switch when const is given."""
+    def __init__(self, flag, type=str, default=None, dest=None, const=None, many=False):
+        self.flag = flag
+        self.type = type
+        self.default = default
+        self.dest = dest or flag.lstrip("-").replace("-", "_")
+        self.const = const
+        self.many = many
+
+
+def parse_args(schema, args, usage):
+    """Turns raw tokens into a dict following an Arg/Opt schema."""
+    positionals = [s for s in schema if isinstance(s, Arg)]
+    options = {s.flag: s for s in schema if isinstance(s, Opt)}
+    values = {s.name: ([] if s.many else s.default) for s in positionals}
+    values.update({o.dest: ([] if o.many else o.default) for o in options.values()})
+
+    rest = []
+    it = iter(args)
+    for token in it:
+        opt = options.get(token)
+        if opt is None:
+            if token.startswith("--"):
+                raise UsageError(f"unknown option {token}. Usage: {usage}")
+            rest.append(token)
+            continue
+        if opt.const is not None:
+            value = opt.const
+        else:
+            raw = next(it, None)
+            if raw is None:
+                raise UsageError(f"{token} needs a value. Usage: {usage}")
+            try:
+                value = opt.type(raw)
+            except ValueError:
+                raise UsageError(f"invalid value for {token}: {raw}")
+        if opt.many:
+            values[opt.dest].append(value)
+        else:
+            values[opt.dest] = value
+
+    for spec in positionals:
+        if spec.many:
+            taken, rest = rest, []
+        elif rest:
+            taken, rest = [rest[0]], rest[1:]
+        else:
+            taken = []
+        if not taken:
+            if spec.required:
+                raise UsageError(f"Usage: {usage}")
+            continue
+        try:
+            converted = [spec.type(t) for t in taken]
+        except ValueError:
+            raise UsageError(f"invalid {spec.name}: {' '.join(taken)}")
+        values[spec.name] = converted if spec.many else converted[0]
+    if rest:
+        raise UsageError(f"unexpected argument {rest[0]}. Usage: {usage}")
+    return values
+
+
+class Handler:
+    """
+    Base for handler objects. collect() gathers data without printing and
+    render() presents it, so other front ends (batch, plans) can reuse collect().
+    """
+    def collect(self, shell, request):
+        return None
+
+    def render(self, shell, data):
+        pass
+
+    def __call__(self, shell, request):
+        data = self.collect(shell, request)
+        self.render(shell, data)
+        return data
+
+
+class Entry:
+    """One registered command or intent action. The handler may be a 'module:attr' string."""
+    def __init__(self, name, handler, kind="command", risk="GREEN", args=None, usage=None,
+                 help="", section="General", plugin=None, target="path"):
+        self.name = name
+        self.kind = kind
+        self.risk = risk
+        self.args = args
+        self.usage = usage or name
+        self.help = help
+        self.section = section
+        self.plugin = plugin
+        # What an intent's target means; only "path" targets go through path validation
+        self.target = target
+        self._handler = handler
+
+    @property
+    def loaded(self):
+        return not isinstance(self._handler, str)
+
+    @property
+    def handler(self):
+        if isinstance(self._handler, str):
+            module_name, _, attr = self._handler.partition(":")
+            target = importlib.import_module(module_name)
+            for part in attr.split("."):
+                target = getattr(target, part)
+            # Classes are instantiated once, so handler objects can keep state
+            self._handler = target() if isinstance(target, type) else target
+            # Plugins may declare their metadata on the handler itself
+            for field in ("risk", "usage", "help", "section", "args"):
+                declared = getattr(self._handler, field, None)
+                if declared is not None and not callable(declared):
+                    setattr(self, field, declared)
+        return self._handler
+
+    def parse(self, args):
+        """Parses raw tokens if the entry declares a schema; otherwise passes them through."""
+        handler = self.handler  # Loads plugin metadata (schema) before parsing
+        if self.args is None:
+            return args
+        return parse_args(self.args, args, self.usage)
+
+    def __call__(self, shell, request):
+        handler = self.handler
+        with span(f"{'cmd' if self.kind == 'command' else 'intent'}.{self.name}"):
+            return handler(shell, request)
+
+
+class Registry:
+    """
+    Maps shell commands and AI intent actions to handlers.
+    Handlers are imported on first dispatch; third-party packages add entries
+    through the 'netmon_ai.commands' and 'netmon_ai.actions' entry point
+    groups, whose names are the command/action and whose values point at the
+    handler ('pkg.module:handler').
+    """
+    def __init__(self):
+        self.commands = {}
+        self.actions = {}
+        self.aliases = {}
+
+    def command(self, name, handler, aliases=(), **meta):
+        entry = Entry(name, handler, kind="command", **meta)
+        self.commands[name] = entry
+        for alias in aliases:
+            self.aliases[alias] = name
+        return entry
+
+    def action(self, name, handler, **meta):
+        entry = Entry(name, handler, kind="action", **meta)
+        self.actions[name] = entry
+        return entry
+
+    def get_command(self, name):
+        name = name.lower()
+        return self.commands.get(self.aliases.get(name, name))
+
+    def get_action(self, name):
+        return self.actions.get(name)
+
+    def sections(self):
+        """Commands grouped by help section, in registration order."""
+        grouped = {}
+        for entry in self.commands.values():
+            grouped.setdefault(entry.section, []).append(entry)
+        return grouped
+
+    def load_plugins(self):
+        """Registers entry-point plugins without importing them. Returns the names added."""
+        try:
+            from importlib.metadata import entry_points
+        except ImportError:
+            return []
+        added = []
+        for kind, group in PLUGIN_GROUPS.items():
+            try:
+                points = entry_points(group=group)
+            except TypeError:  # Python < 3.10
+                points = entry_points().get(group, [])
+            for point in points:
+                table = self.commands if kind == "command" else self.actions
+                if point.name in table:
+                    continue  # Built-ins cannot be overridden by plugins
+                dist = getattr(point, "dist", None)
+                # Plugins that do not declare a risk are confirmed like changes
+                table[point.name] = Entry(point.name, point.value, kind=kind, risk="YELLOW", section="Plugins",
+                                          plugin=dist.name if dist else point.value)
+                added.append(point.name)
+        return added
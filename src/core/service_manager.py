@@ -2,10 +2,13 @@ import subprocess
 import os
 import re
 from utils.colors import Colors
+from utils import perf
+from core.journal_reader import JournalReader
 
 class ServiceManager:
     def __init__(self):
         self.os_type = os.name  # 'nt' for Windows, 'posix' for Linux/macOS
+        self.journal = JournalReader()
 
     def _validate_service_name(self, service_name):
         """Validates service name to prevent injection"""
@@ -23,7 +26,7 @@ class ServiceManager:
         """Safely runs a command without shell=True"""
         try:
             # Never use shell=True for security
-            result = subprocess.run(
+            result = perf.run(
                 cmd,
                 capture_output=True,
                 text=True,
@@ -82,30 +85,40 @@ class ServiceManager:
         else:
             print(f"{Colors.FAIL}✗ Error: {err}{Colors.RESET}")
 
-    def get_logs(self, service_name, lines=50):
-        """Fetches the last N lines of logs for a service (Linux only)."""
+    def get_logs(self, service_name, lines=50, only_new=False):
+        """
+        Fetches the last N log entries for a service (Linux only).
+        With only_new, returns just the entries written since the previous call.
+        Returns the list of entries so callers can analyze them further.
+        """
         if self.os_type != 'posix':
             print(f"{Colors.WARNING}Service logs via journalctl are only supported on Linux.{Colors.RESET}")
-            return
+            return []
         
         # Validate service name
         if not self._validate_service_name(service_name):
             print(f"{Colors.FAIL}Invalid service name{Colors.RESET}")
-            return
+            return []
         
         # Validate lines parameter
         try:
             lines = int(lines)
             if lines < 1 or lines > 1000:
                 lines = 50
-        except:
+        except (TypeError, ValueError):
             lines = 50
         
-        cmd = ['sudo', 'journalctl', '-u', service_name, '-n', str(lines), '--no-pager']
-        out, err, code = self._run_command(cmd)
+        try:
+            entries = self.journal.fetch(service_name, lines=lines, since_last=only_new)
+        except (OSError, RuntimeError) as e:
+            print(f"{Colors.FAIL}{e}{Colors.RESET}")
+            return []
         
-        print(f"\n{Colors.BOLD}--- Logs for {service_name} (last {lines} lines) ---{Colors.RESET}")
-        if code == 0:
-            print(out if out else "No logs available")
+        header = "new entries" if only_new else f"last {lines} lines"
+        print(f"\n{Colors.BOLD}--- Logs for {service_name} ({header}) ---{Colors.RESET}")
+        if entries:
+            for entry in entries:
+                print(self.journal.format_entry(entry))
         else:
-            print(f"{Colors.FAIL}{err}{Colors.RESET}")
+            print("No new logs" if only_new else "No logs available")
+        return entries
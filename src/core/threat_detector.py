@@ -0,0 +1,290 @@
+import queue
+import re
+from abc import ABC, abstractmethod
+import threading
+import time
+from collections import OrderedDict, deque
+from utils.colors import Colors
+
+_IP = r'(?P<ip>\d{1,3}(?:\.\d{1,3}){3}|[0-9a-fA-F:]*:[0-9a-fA-F:]+)'
+
+
+class SlidingWindowCounter:
+    """
+    Per-key event counter over a time window with bounded memory.
+    Keys live in an LRU capped at max_keys, and each key keeps at most
+    `threshold` timestamps, which is all that is needed to decide whether
+    the threshold was reached inside the window. After firing, a key stays
+    quiet for `cooldown` seconds so one burst raises one alert.
+    """
+    def __init__(self, window, threshold, max_keys=10000, cooldown=None):
+        self.window = window
+        self.threshold = threshold
+        self.max_keys = max_keys
+        self.cooldown = window if cooldown is None else cooldown
+        self._keys = OrderedDict()  # key -> [events, muted_until]
+
+    def add(self, key, now, evidence=None):
+        """Records an event; returns the evidence list when the window fires."""
+        state = self._keys.get(key)
+        if state is None:
+            state = [deque(maxlen=self.threshold), 0.0]
+            self._keys[key] = state
+            if len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+        else:
+            self._keys.move_to_end(key)
+
+        events = state[0]
+        events.append((now, evidence))
+        if now < state[1]:
+            return None
+        if len(events) == self.threshold and now - events[0][0] <= self.window:
+            fired = [e for _, e in events if e is not None]
+            events.clear()
+            state[1] = now + self.cooldown
+            return fired
+        return None
+
+    def __len__(self):
+        return len(self._keys)
+
+
+class Detector(ABC):
+    """Base class: a cheap substring prefilter followed by compiled regexes."""
+    name = "detector"
+    severity = "WARNING"
+    keywords = ()
+    patterns = ()
+
+    def __init__(self):
+        self._compiled = [re.compile(p) for p in self.patterns]
+
+    def match(self, line):
+        if self.keywords and not any(k in line for k in self.keywords):
+            return None
+        for regex in self._compiled:
+            m = regex.search(line)
+            if m:
+                return m
+        return None
+
+    @abstractmethod
+    def feed(self, line, now):
+        """Returns an alert dict or None."""
+
+    def _alert(self, key, message, evidence):
+        return {
+            "detector": self.name,
+            "severity": self.severity,
+            "key": key,
+            "message": message,
+            "evidence": evidence,
+        }
+
+
+class FailedLoginDetector(Detector):
+    """
+    Brute force: too many authentication failures from one source in a
+    window. One sshd attempt can log three matching lines ('Invalid user',
+    the PAM 'authentication failure' and 'Failed password'); lines sharing
+    an IP and sshd pid are one attempt until its 'Failed ...' line, so each
+    attempt counts once (and a probe that only logs 'Invalid user' still does).
+    """
+    name = "failed_login"
+    severity = "CRITICAL"
+    keywords = ("Failed password", "authentication failure", "Invalid user", "Failed publickey")
+    patterns = (
+        r'Failed (?:password|publickey) for (?:invalid user )?(?P<user>\S+) from ' + _IP,
+        r'Invalid user (?P<user>\S+) from ' + _IP,
+        r'authentication failure;.*rhost=' + _IP + r'(?:\s+user=(?P<user>\S+))?',
+    )
+
+    _PID = re.compile(r'\[(\d+)\]:')
+
+    def __init__(self, window=60, threshold=5, max_keys=10000, attempt_timeout=30):
+        super().__init__()
+        self.counter = SlidingWindowCounter(window, threshold, max_keys)
+        self.max_keys = max_keys
+        self.attempt_timeout = attempt_timeout
+        self._open = OrderedDict()  # (ip, pid) -> time the attempt in progress was first seen
+
+    def _new_attempt(self, ip, line, now, closes):
+        """False when the line belongs to an attempt already counted."""
+        pid = self._PID.search(line)
+        if pid is None:
+            return True  # Nothing to correlate it by
+        key = (ip, pid.group(1))
+        opened = self._open.pop(key, None)
+        is_new = opened is None or now - opened > self.attempt_timeout
+        if not closes:
+            self._open[key] = now if is_new else opened
+            if len(self._open) > self.max_keys:
+                self._open.popitem(last=False)
+        return is_new
+
+    def feed(self, line, now):
+        m = self.match(line)
+        if not m:
+            return None
+        ip = m.group('ip')
+        if not self._new_attempt(ip, line, now, closes=m.re is self._compiled[0]):
+            return None
+        fired = self.counter.add(ip, now, line)
+        if fired:
+            return self._alert(
+                ip,
+                f"{self.counter.threshold} failed logins from {ip} within {self.counter.window}s",
+                fired
+            )
+        return None
+
+
+class NewUserDetector(Detector):
+    """Account creation events."""
+    name = "new_user"
+    severity = "WARNING"
+    keywords = ("new user", "new group", "useradd", "adduser")
+    patterns = (
+        r'new user: name=(?P<user>[^,\s]+)',
+        r'adduser.*(?:Adding|added) user [\'`"]?(?P<user>[\w.-]+)',
+    )
+
+    def feed(self, line, now):
+        m = self.match(line)
+        if not m:
+            return None
+        user = m.group('user')
+        return self._alert(user, f"New user account created: {user}", [line])
+
+
+class SudoAnomalyDetector(Detector):
+    """Denied sudo use, repeated wrong passwords and interactive root shells."""
+    name = "sudo_anomaly"
+    severity = "WARNING"
+    keywords = ("sudo",)
+    patterns = (
+        r'sudo:\s+(?P<user>\S+) : (?P<reason>user NOT in sudoers|\d+ incorrect password attempts?|command not allowed)',
+        r'sudo:\s+(?P<user>\S+) : .*COMMAND=(?P<reason>(?:/usr)?/bin/(?:ba|z|da|k)?sh\b|(?:/usr)?/bin/su\b)',
+    )
+
+    def __init__(self, window=300, threshold=3, max_keys=1000):
+        super().__init__()
+        # Root shells are worth one alert per session burst, not per command
+        self.shells = SlidingWindowCounter(window, 1, max_keys)
+        self.denials = SlidingWindowCounter(window, threshold, max_keys)
+
+    def feed(self, line, now):
+        m = self.match(line)
+        if not m:
+            return None
+        user, reason = m.group('user'), m.group('reason')
+        if reason.startswith('/'):
+            if self.shells.add(user, now, line):
+                return self._alert(user, f"{user} opened a root shell via sudo ({reason})", [line])
+            return None
+        if reason.startswith("user NOT"):
+            return self._alert(user, f"{user} is not in sudoers but tried to use sudo", [line])
+        fired = self.denials.add(user, now, line)
+        if fired:
+            return self._alert(user, f"Repeated sudo failures for {user}", fired)
+        return None
+
+
+class ThreatDetector:
+    """
+    Streaming detection pipeline over tailed log lines.
+    Every line runs through the local detectors; only windows that fire are
+    queued for AI escalation, which a background worker sends to LogAnalyzer
+    at a bounded rate.
+    """
+    def __init__(self, detectors=None, analyzer=None, escalation_interval=10, max_alerts=200):
+        self.detectors = detectors or [
+            FailedLoginDetector(),
+            NewUserDetector(),
+            SudoAnomalyDetector(),
+        ]
+        self.analyzer = analyzer
+        self.escalation_interval = escalation_interval
+        self.alerts = deque(maxlen=max_alerts)
+        self.callbacks = []
+        self.lines_seen = 0
+        self._escalations = queue.Queue(maxsize=100)
+        self._worker = None
+        self._stop = threading.Event()
+
+    def add_callback(self, callback):
+        """Registers callback(alert) for every alert raised."""
+        self.callbacks.append(callback)
+
+    def feed(self, source, line, now=None):
+        """Runs one log line through all detectors. Usable as a LogTailer callback."""
+        self.lines_seen += 1
+        now = time.time() if now is None else now
+        for detector in self.detectors:
+            alert = detector.feed(line, now)
+            if alert:
+                alert["time"] = now
+                alert["source"] = source
+                self._raise(alert)
+
+    def _raise(self, alert):
+        self.alerts.append(alert)
+        for callback in self.callbacks:
+            callback(alert)
+        if self.analyzer is not None:
+            try:
+                self._escalations.put_nowait(alert)
+            except queue.Full:
+                pass  # Escalation is best-effort; local alerts still fired
+
+    def recent_alerts(self, limit=10):
+        return list(self.alerts)[-limit:]
+
+    # --- AI ESCALATION ---
+
+    def start(self):
+        if self.analyzer is None or self._worker:
+            return
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._escalation_loop, name="ThreatEscalation", daemon=True)
+        self._worker.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._worker:
+            self._worker.join(timeout=5)
+            self._worker = None
+
+    def _escalation_loop(self):
+        while not self._stop.is_set():
+            try:
+                first = self._escalations.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            # Batch everything that fired during the interval into one AI call
+            batch = [first]
+            deadline = time.monotonic() + self.escalation_interval
+            while time.monotonic() < deadline and not self._stop.is_set():
+                try:
+                    batch.append(self._escalations.get(timeout=0.5))
+                except queue.Empty:
+                    pass
+            self._escalate(batch)
+
+    def _escalate(self, batch):
+        text = []
+        for alert in batch:
+            text.append(f"[{alert['severity']}] {alert['detector']}: {alert['message']}")
+            text.extend(f"    {line}" for line in alert['evidence'])
+        sources = sorted({a['source'] for a in batch})
+        try:
+            self.analyzer.analyze_text("\n".join(text), ", ".join(sources))
+        except Exception as e:
+            print(f"{Colors.FAIL}Escalation failed: {e}{Colors.RESET}")
+
+    @staticmethod
+    def format_alert(alert):
+        color = Colors.FAIL if alert['severity'] == "CRITICAL" else Colors.WARNING
+        stamp = time.strftime('%H:%M:%S', time.localtime(alert['time']))
+        return f"{color}[{stamp}] {alert['severity']} {alert['detector']}: {alert['message']}{Colors.RESET}"
@@ -0,0 +1,467 @@
+"""
+Embedded on-disk time-series store for the metrics SystemMonitor collects.
+
+Layout under data/metrics, one directory per resolution and UTC day:
+
+    1s/2026-10-19/ts         float64 epoch seconds, ascending
+    1s/2026-10-19/cpu        float32, one value per timestamp
+    1m/2026-10-19/cpu.max    rollups also keep each bucket's maximum
+
+Columns are append-only fixed-width files, so row i of any column sits at
+i * width. Readers mmap the ts column, binary-search the range and slice the
+value column at the same offsets. 1s samples roll up into 1m and 1h buckets
+(avg and max); each resolution has its own retention. Only one process
+(whoever holds the writer lock) appends; everyone else just reads.
+"""
+import bisect
+import mmap
+import os
+import shutil
+import struct
+import threading
+import time
+from array import array
+from utils.perf import PERF, span
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, assume a single writer
+    fcntl = None
+
+METRICS = ("cpu", "mem", "disk", "load", "net_sent", "net_recv")
+
+# (name, seconds per row, days kept)
+RESOLUTIONS = (("1s", 1, 2), ("1m", 60, 35), ("1h", 3600, 400))
+
+
+class _Bucket:
+    """Running avg/max of one rollup period."""
+    __slots__ = ("start", "count", "sums", "maxes")
+
+    def __init__(self, start):
+        self.start = start
+        self.count = 0
+        self.sums = {}
+        self.maxes = {}
+
+    def add(self, values, maxes):
+        self.count += 1
+        for name, value in values.items():
+            self.sums[name] = self.sums.get(name, 0.0) + value
+            peak = maxes.get(name, value)
+            self.maxes[name] = max(self.maxes.get(name, peak), peak)
+
+    def averages(self):
+        return {name: total / self.count for name, total in self.sums.items()}
+
+
+class TimeSeriesStore:
+    def __init__(self, root="data/metrics", metrics=METRICS, resolutions=RESOLUTIONS):
+        self.root = os.path.abspath(root)
+        self.metrics = tuple(metrics)
+        self.resolutions = resolutions
+        self._files = {}  # (resolution, day, column) -> open append handle
+        self._last = {}  # (resolution, day) -> last timestamp written
+        self._buckets = [None] * len(resolutions)
+        self._lock_file = None
+        self._day = None
+        self.lock = threading.Lock()
+
+    # --- WRITING ---
+
+    def acquire_writer(self):
+        """Takes the single-writer lock. False if another process already records."""
+        if self._lock_file is not None:
+            return True
+        os.makedirs(self.root, exist_ok=True)
+        handle = open(os.path.join(self.root, ".writer.lock"), "a")
+        if fcntl is not None:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                handle.close()
+                return False
+        self._lock_file = handle
+        self.prune()
+        self._resume()
+        return True
+
+    @property
+    def writer(self):
+        return self._lock_file is not None
+
+    @staticmethod
+    def day_of(epoch):
+        return time.strftime("%Y-%m-%d", time.gmtime(epoch))
+
+    def _segment(self, resolution, day):
+        return os.path.join(self.root, resolution, day)
+
+    def _open_segment(self, resolution, day):
+        """Opens a day's columns for appending, trimming a torn last row left by a crash."""
+        path = self._segment(resolution, day)
+        os.makedirs(path, exist_ok=True)
+        columns = ["ts"] + list(self.metrics)
+        if resolution != self.resolutions[0][0]:
+            columns += [f"{m}.max" for m in self.metrics]
+        widths = {c: 8 if c == "ts" else 4 for c in columns}
+        sizes = {}
+        for column in columns:
+            try:
+                sizes[column] = os.path.getsize(os.path.join(path, column))
+            except OSError:
+                sizes[column] = 0
+        rows = min(sizes[c] // widths[c] for c in columns)
+        for column in columns:
+            name = os.path.join(path, column)
+            if sizes[column] != rows * widths[column]:
+                with open(name, "ab") as f:
+                    f.truncate(rows * widths[column])
+            self._files[(resolution, day, column)] = open(name, "ab", buffering=0)
+        last = None
+        if rows:
+            with open(os.path.join(path, "ts"), "rb") as f:
+                f.seek((rows - 1) * 8)
+                last = struct.unpack("<d", f.read(8))[0]
+        self._last[(resolution, day)] = last
+
+    def _write(self, resolution, epoch, values, maxes=None):
+        day = self.day_of(epoch)
+        if (resolution, day) not in self._last:
+            self._open_segment(resolution, day)
+        last = self._last[(resolution, day)]
+        if last is not None and epoch <= last:
+            return False  # Clock stepped back or a bucket was already written; keep ts ascending
+        files = self._files
+        # Values before the timestamp: a reader that sees a row always sees its values
+        for name in self.metrics:
+            files[(resolution, day, name)].write(array("f", [values.get(name, 0.0)]).tobytes())
+        if maxes is not None:
+            for name in self.metrics:
+                files[(resolution, day, f"{name}.max")].write(array("f", [maxes.get(name, 0.0)]).tobytes())
+        files[(resolution, day, "ts")].write(struct.pack("<d", epoch))
+        self._last[(resolution, day)] = epoch
+        return True
+
+    def _roll(self, level, epoch, values, maxes):
+        """Feeds a row into rollup `level`, emitting the previous bucket once its period ends."""
+        if level >= len(self.resolutions):
+            return
+        resolution, seconds, _ = self.resolutions[level]
+        start = epoch - epoch % seconds
+        bucket = self._buckets[level]
+        if bucket is not None and bucket.start != start:
+            if bucket.count:
+                averages = bucket.averages()
+                self._write(resolution, bucket.start, averages, bucket.maxes)
+                self._roll(level + 1, bucket.start, averages, bucket.maxes)
+            bucket = None
+        if bucket is None:
+            bucket = self._buckets[level] = _Bucket(start)
+        bucket.add(values, maxes)
+
+    def append(self, epoch, values):
+        """Records one sample ({metric: value}) at the finest resolution and rolls it up."""
+        if not self.writer:
+            return False
+        epoch = float(int(epoch))
+        with self.lock, span("timeseries.append"):
+            day = self.day_of(epoch)
+            if day != self._day:
+                if self._day is not None:
+                    self._close_files()
+                    self.prune(epoch)
+                self._day = day
+            if self._write(self.resolutions[0][0], epoch, values):
+                self._roll(1, epoch, values, values)
+        return True
+
+    def _resume(self):
+        """Refills the open rollup buckets from finer data, so a restart does not lose them."""
+        now = int(time.time())
+        for level in range(1, len(self.resolutions)):
+            seconds = self.resolutions[level][1]
+            source = self.resolutions[level - 1][0]
+            start = float(now - now % seconds)
+            bucket = _Bucket(start)
+            series = {m: self.query(m, start, now, resolution=source) for m in self.metrics}
+            peaks = ({m: self.query(m, start, now, resolution=source, stat="max")[1] for m in self.metrics}
+                     if level > 1 else None)
+            times = series[self.metrics[0]][0]
+            for i in range(len(times)):
+                values = {m: series[m][1][i] for m in self.metrics if i < len(series[m][1])}
+                maxes = {m: peaks[m][i] for m in self.metrics if i < len(peaks[m])} if peaks else values
+                bucket.add(values, maxes)
+            self._buckets[level] = bucket
+
+    def prune(self, now=None):
+        """Deletes day segments older than each resolution's retention."""
+        now = now or time.time()
+        for resolution, _, days in self.resolutions:
+            oldest = self.day_of(now - days * 86400)
+            try:
+                entries = os.listdir(os.path.join(self.root, resolution))
+            except FileNotFoundError:
+                continue
+            for day in entries:
+                if day < oldest:
+                    shutil.rmtree(self._segment(resolution, day), ignore_errors=True)
+
+    def _close_files(self):
+        for handle in self._files.values():
+            handle.close()
+        self._files.clear()
+        self._last.clear()
+
+    def close(self):
+        with self.lock:
+            self._close_files()
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+
+    # --- READING ---
+
+    def pick_resolution(self, start, end, max_points=4000):
+        """Finest resolution that still holds `start` and spans the range in <= max_points rows."""
+        now = time.time()
+        for resolution, seconds, days in self.resolutions:
+            if start >= now - days * 86400 and (end - start) / seconds <= max_points:
+                return resolution
+        return self.resolutions[-1][0]
+
+    def _days(self, resolution, start, end):
+        day = start - start % 86400
+        while day <= end:
+            name = self.day_of(day)
+            if os.path.isdir(self._segment(resolution, name)):
+                yield name
+            day += 86400
+
+    @staticmethod
+    def _map(path):
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _read_segment(self, path, column, start, end, times, values):
+        try:
+            ts_map = self._map(os.path.join(path, "ts"))
+            col_map = self._map(os.path.join(path, column))
+        except FileNotFoundError:
+            return
+        if ts_map is None or col_map is None:
+            return
+        try:
+            # A torn last row (short write on a full disk) is trimmed here too, not only on open
+            with memoryview(ts_map) as whole_ts, memoryview(col_map) as whole_col, \
+                    whole_ts[:len(whole_ts) - len(whole_ts) % 8] as raw_ts, \
+                    whole_col[:len(whole_col) - len(whole_col) % 4] as raw_col:
+                with raw_ts.cast("d") as stamps, raw_col.cast("f") as column_values:
+                    rows = min(len(stamps), len(column_values))
+                    lo = bisect.bisect_left(stamps, start, 0, rows)
+                    hi = bisect.bisect_right(stamps, end, lo, rows)
+                    times.extend(stamps[lo:hi].tolist())
+                    values.extend(column_values[lo:hi].tolist())
+        finally:
+            ts_map.close()
+            col_map.close()
+
+    def query(self, metric, start, end=None, resolution=None, stat="avg"):
+        """
+        (timestamps, values) for metric in [start, end], oldest first.
+        stat="max" reads the per-bucket maximum of rollup resolutions.
+        """
+        if metric not in self.metrics:
+            raise ValueError(f"unknown metric: {metric} (expected {', '.join(self.metrics)})")
+        end = time.time() if end is None else end
+        resolution = resolution or self.pick_resolution(start, end)
+        column = f"{metric}.max" if stat == "max" and resolution != self.resolutions[0][0] else metric
+        times, values = [], []
+        with span("timeseries.query"):
+            for day in self._days(resolution, start, end):
+                self._read_segment(self._segment(resolution, day), column, start, end, times, values)
+        return times, values
+
+    def summary(self, metric, start, end=None, resolution=None):
+        """min/avg/max and when the peak happened, or None if nothing was recorded."""
+        end = time.time() if end is None else end
+        resolution = resolution or self.pick_resolution(start, end)
+        times, values = self.query(metric, start, end, resolution)
+        if not values:
+            return None
+        peak_times, peaks = self.query(metric, start, end, resolution, stat="max")
+        peak = max(range(len(peaks)), key=peaks.__getitem__)
+        return {
+            "metric": metric,
+            "resolution": resolution,
+            "start": times[0],
+            "end": times[-1],
+            "points": len(values),
+            # Columns are float32; don't report digits they do not hold
+            "min": round(min(values), 3),
+            "avg": round(sum(values) / len(values), 3),
+            "max": round(peaks[peak], 3),
+            "peak_at": peak_times[peak],
+            "last": round(values[-1], 3),
+            "values": values,
+        }
+
+    @staticmethod
+    def parse_range(text, default="1h"):
+        """
+        'START[..END]' -> (start, end) epochs. Each side is '6h'/'30m'/'2d' ago,
+        epoch seconds or an ISO date/time; END defaults to now.
+        """
+        from core.audit_index import AuditIndex
+        text = (text or "").strip()
+        if not text or text.lower() == "none":
+            text = default
+        since, _, until = text.partition("..")
+        start = AuditIndex.parse_time(since)
+        end = AuditIndex.parse_time(until) if until else time.time()
+        if start > end:
+            start, end = end, start
+        return start, end
+
+
+class MetricRecorder:
+    """
+    Samples SystemMonitor once per interval into a TimeSeriesStore. Network
+    counters are stored as bytes/s rates. With a detector, every sample (plus
+    per-NIC rates, per-disk utilization and await, per-cgroup CPU, and every
+    process_every samples per-process and per-cgroup memory and per-mount
+    usage) is also fed to anomaly detection. sample() can be driven by an existing loop (the
+    daemon's CPU sampler) instead of start()'s thread.
+    """
+    def __init__(self, monitor, store, interval=1.0, detector=None, process_every=5, filesystems=None,
+                 cgroups=None):
+        self.monitor = monitor
+        self.filesystems = filesystems
+        self.cgroups = cgroups
+        self.store = store
+        self.interval = interval
+        self.detector = detector
+        self.process_every = process_every
+        self.ticks = 0
+        self.errors = 0
+        self.last_error = None
+        self._previous = None
+        self._nics = {}
+        self._processes = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sample(self):
+        now = time.time()
+        stats = self.monitor.get_metrics()
+        try:
+            load = os.getloadavg()[0]
+        except (AttributeError, OSError):
+            load = 0.0
+        sent, recv = 0.0, 0.0
+        if self._previous is not None:
+            then, old_sent, old_recv = self._previous
+            elapsed = max(now - then, 1e-6)
+            sent = max(stats["network_sent"] - old_sent, 0) / elapsed
+            recv = max(stats["network_recv"] - old_recv, 0) / elapsed
+        self._previous = (now, stats["network_sent"], stats["network_recv"])
+        values = {"cpu": stats["cpu"], "mem": stats["mem"], "disk": stats["disk"],
+                  "load": load, "net_sent": sent, "net_recv": recv}
+        if self.store.writer:
+            self.store.append(now, values)
+        self.ticks += 1
+        if self.detector is not None:
+            self._detect(now, values)
+        return values
+
+    def _detect(self, now, values):
+        import psutil
+        samples = dict(values)
+        if self.ticks == 1:
+            del samples["net_sent"], samples["net_recv"]  # No rate yet, not a real zero
+        nics = psutil.net_io_counters(pernic=True)
+        for nic, counters in nics.items():
+            before = self._nics.get(nic)
+            if before is not None:
+                elapsed = max(now - before[0], 1e-6)
+                samples[f"nic.{nic}.tx"] = max(counters.bytes_sent - before[1], 0) / elapsed
+                samples[f"nic.{nic}.rx"] = max(counters.bytes_recv - before[2], 0) / elapsed
+            self._nics[nic] = (now, counters.bytes_sent, counters.bytes_recv)
+        slow = self.process_every and self.ticks % self.process_every == 0
+        if self.filesystems is not None:
+            for d in self.filesystems.io():
+                samples[f"disk.{d.disk}.await"] = d.await_ms
+                if d.util is not None:
+                    samples[f"disk.{d.disk}.util"] = d.util
+            if slow:
+                for m in self.filesystems.usage():
+                    samples[f"fs.{m.mountpoint}.used"] = m.percent
+                    if m.inodes_percent is not None:
+                        samples[f"fs.{m.mountpoint}.inodes"] = m.inodes_percent
+        self.detector.observe(samples, now)
+
+        if self.cgroups is not None:
+            # Containers come and go like processes: no hour-of-day baselines
+            groups = {}
+            for g in self.cgroups.sample():
+                groups[f"cg.{g.name}.cpu"] = g.cpu_percent
+                if slow and g.memory is not None:
+                    groups[f"cg.{g.name}.mem"] = g.memory / 1048576
+            self.detector.observe(groups, now, seasonal=False)
+
+        if slow:
+            from core.records import ProcessTable
+            if self._processes is None:
+                self._processes = ProcessTable()  # Own tick history, not the shell's pslist one
+            snap = self._processes.snapshot()
+            names, pids, mem = snap.names, snap.pids, snap.mem
+            self.detector.observe({f"proc.{names[i]}.{pids[i]}.mem": mem[i] for i in range(len(snap))},
+                                  now, seasonal=False)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                # Take over recording if the process that held the store went away
+                if not self.store.writer and self.ticks % 60 == 0:
+                    self.store.acquire_writer()
+                self.sample()
+                if self.detector is not None and self.ticks % 600 == 0:
+                    self.detector.save()
+            except Exception as e:
+                self.failed(e)  # A failed sample (e.g. disk full) must not kill recording for the session
+
+    def failed(self, error):
+        """Counts a failed tick (also as the 'recorder.error' perf span) and keeps the latest message."""
+        self.errors += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+        PERF.record("recorder.error", 0.0)
+
+    def start(self):
+        """
+        Starts background sampling. Returns True if this process records the
+        history, False if another one already does (detection still runs here).
+        """
+        if self._thread is None:
+            self.store.acquire_writer()
+            if self.detector is not None:
+                self.detector.load()
+            elif not self.store.writer:
+                return False
+            self.monitor.get_metrics()  # CPU baseline
+            self._thread = threading.Thread(target=self._run, name="metric-recorder", daemon=True)
+            self._thread.start()
+        return self.store.writer
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        if self.detector is not None:
+            try:
+                self.detector.save()
+            except OSError:
+                pass
+        self.store.close()
@@ -1,30 +1,451 @@
-import subprocess
 import os
+import platform
+import re
+import struct
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from utils.colors import Colors
+from utils import perf
+from utils.perf import timed
+from core.records import UserAccount
+
+try:
+    import sqlite3
+except ImportError:  # Optional: lastlog2 databases are skipped
+    sqlite3 = None
+
+DAY = 86400
+
+# useradd's default NAME_REGEX (plus the trailing $ of Samba machine accounts); also keeps
+# names that start with '-' from being read as options
+_VALID_NAME = re.compile(r"^[a-z_][a-z0-9_.-]{0,31}\$?$")
+
+# struct lastlog from <lastlog.h>, one record per uid; ll_time stays 32-bit where glibc keeps the compat layout
+_LASTLOG = struct.Struct("=i32s256s" if struct.calcsize("P") == 4 or platform.machine() in
+                         ("x86_64", "AMD64", "i386", "i686", "ppc64", "ppc64le", "s390x") else "=q32s256s")
+
+# Shells that do not give an interactive login
+_NO_LOGIN = {"", "nologin", "false", "true", "sync", "halt", "shutdown"}
+
+
+def _password_state(field):
+    """Summarizes a passwd/shadow password field without keeping the hash."""
+    if field == "":
+        return "empty"
+    if field.startswith("!"):
+        return "locked"
+    if field.startswith("*"):
+        return "disabled"
+    return "set"
+
+
+def _int(value):
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+class UserSnapshot:
+    """
+    One parsed view of the account database with indexes by name, uid, group
+    and login shell, so lookups over thousands of accounts are dict reads.
+    """
+    def __init__(self, accounts, groups, uid_min, shadow_readable, lastlog_readable):
+        self.accounts = accounts
+        self.groups = groups  # group name -> {"gid", "members"}
+        self.uid_min = uid_min
+        self.shadow_readable = shadow_readable
+        self.lastlog_readable = lastlog_readable
+        self.built = time.time()
+        self.by_name = {}
+        self.by_uid = {}  # uid -> [accounts]; more than one is itself a finding
+        self.by_group = {}  # group name -> [accounts], primary or supplementary
+        self.by_shell = {}
+        for account in accounts:
+            self.by_name.setdefault(account.name, account)
+            self.by_uid.setdefault(account.uid, []).append(account)
+            self.by_shell.setdefault(account.shell, []).append(account)
+            for group in [account.group] + account.groups:
+                if group is not None:
+                    self.by_group.setdefault(group, []).append(account)
+
+    def __len__(self):
+        return len(self.accounts)
+
+    def lookup(self, key):
+        """The account named key, else the (first) one with that uid."""
+        if key in self.by_name:
+            return self.by_name[key]
+        matches = self.by_uid.get(_int(str(key)), [])
+        return matches[0] if matches else None
+
+    def filter(self, group=None, shell=None, uid=None, login=None):
+        """Accounts in a group, with a shell (path or name like 'bash'), a uid and/or an interactive shell."""
+        if uid is not None:
+            rows = self.by_uid.get(int(uid), [])
+        elif group is not None:
+            rows = self.by_group.get(group, [])
+        elif shell is not None:
+            rows = [a for path, accounts in self.by_shell.items()
+                    if shell in (path, os.path.basename(path)) for a in accounts]
+        else:
+            rows = self.accounts
+        if group is not None:
+            rows = [a for a in rows if a.group == group or group in a.groups]
+        if shell is not None:
+            rows = [a for a in rows if shell in (a.shell, os.path.basename(a.shell))]
+        if login is not None:
+            rows = [a for a in rows if a.login == login]
+        return sorted(rows, key=lambda a: (a.uid, a.name))
+
+    def audit(self, inactive_days=90, now=None):
+        """
+        Account findings, RED first: {user, uid, issue, risk, detail}. Checks
+        that need /etc/shadow or lastlog are skipped when they are unreadable.
+        """
+        now = now or time.time()
+        findings = []
+
+        def finding(account, issue, risk, detail):
+            findings.append({"user": account.name, "uid": account.uid, "issue": issue, "risk": risk, "detail": detail})
+
+        for account in self.accounts:
+            usable = account.password == "set"
+            if account.uid == 0 and account.name != "root":
+                finding(account, "uid0", "RED", "has uid 0 (root privileges)")
+            if account.password == "empty":
+                finding(account, "empty_password", "RED" if account.login else "YELLOW", "logs in without a password")
+            if len(self.by_uid[account.uid]) > 1 and account is not self.by_uid[account.uid][0]:
+                finding(account, "duplicate_uid", "YELLOW",
+                        f"shares uid {account.uid} with {self.by_uid[account.uid][0].name}")
+            if 0 < account.uid < self.uid_min and account.login and usable:
+                finding(account, "system_login", "YELLOW", f"system account with login shell {account.shell}")
+            if account.expires is not None and account.expires < now:
+                continue  # Expired accounts cannot log in; the rest does not matter
+            if usable and account.max_days and account.last_change and account.last_change + account.max_days * DAY < now:
+                finding(account, "password_expired", "YELLOW",
+                        f"password older than its {account.max_days}-day maximum")
+            if self.lastlog_readable and account.uid >= self.uid_min and account.login and usable:
+                if account.last_login is None:
+                    finding(account, "never_logged_in", "GREEN", "active account that has never logged in")
+                elif account.last_login < now - inactive_days * DAY:
+                    idle = int((now - account.last_login) // DAY)
+                    finding(account, "inactive", "YELLOW", f"no login for {idle} days")
+        order = {"RED": 0, "YELLOW": 1, "GREEN": 2}
+        return sorted(findings, key=lambda f: (order[f["risk"]], f["uid"], f["user"]))
+
+
+class UserInventory:
+    """
+    Accounts from /etc/passwd, /etc/group, /etc/shadow (when readable) and
+    lastlog, parsed in-process instead of per-call shell commands. Each
+    source is re-parsed only when its size/mtime/inode changed, and the
+    joined snapshot is rebuilt only when one of them was, so repeated
+    lookups and audits cost a few stat() calls.
+    """
+    SOURCES = ("passwd", "group", "shadow", "lastlog", "lastlog2")
+
+    def __init__(self, passwd="/etc/passwd", group="/etc/group", shadow="/etc/shadow", lastlog="/var/log/lastlog",
+                 lastlog2="/var/lib/lastlog/lastlog2.db", uid_min=None):
+        self.paths = {"passwd": passwd, "group": group, "shadow": shadow, "lastlog": lastlog, "lastlog2": lastlog2}
+        self.uid_min = uid_min or self._login_defs("UID_MIN", 1000)
+        self.available = os.name != "nt"
+        self._cache = {}  # source -> (stat key, parsed)
+        self._snapshot = None
+        self._snapshot_key = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _login_defs(name, default, path="/etc/login.defs"):
+        try:
+            with open(path) as f:
+                for line in f:
+                    fields = line.split()
+                    if len(fields) >= 2 and fields[0] == name:
+                        return _int(fields[1]) or default
+        except OSError:
+            pass
+        return default
+
+    @staticmethod
+    def _stat_key(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_size, st.st_mtime_ns, st.st_ino)
+
+    def _load(self, source, parser, *depends):
+        path = self.paths[source]
+        key = (self._stat_key(path),) + depends
+        cached = self._cache.get(source)
+        if cached is None or cached[0] != key:
+            cached = self._cache[source] = (key, parser(path, *depends))
+        return cached[1]
+
+    # --- PARSERS ---
+
+    @staticmethod
+    def _lines(path):
+        try:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                return f.read().splitlines()
+        except FileNotFoundError:
+            return []
+
+    def _parse_passwd(self, path):
+        rows = []
+        for line in self._lines(path):
+            fields = line.split(":")
+            if len(fields) < 7 or line.startswith(("#", "+", "-")):
+                continue  # NIS compat lines are resolved by nsswitch, not here
+            uid, gid = _int(fields[2]), _int(fields[3])
+            if uid is not None and gid is not None:
+                rows.append((fields[0], fields[1], uid, gid, fields[4], fields[5], fields[6]))
+        return rows
+
+    def _parse_group(self, path):
+        groups = {}
+        for line in self._lines(path):
+            fields = line.split(":")
+            if len(fields) < 4 or line.startswith(("#", "+", "-")):
+                continue
+            gid = _int(fields[2])
+            if gid is not None:
+                groups[fields[0]] = {"gid": gid, "members": [m for m in fields[3].split(",") if m]}
+        return groups
+
+    def _parse_shadow(self, path):
+        """{name: (password field, last change day, max days, expiry day)}, or None when not readable."""
+        try:
+            lines = self._lines(path)
+        except OSError:
+            return None  # Not root: password state and aging are unknown
+        if not lines and not os.path.exists(path):
+            return None
+        shadow = {}
+        for line in lines:
+            fields = line.split(":")
+            if len(fields) >= 8:
+                shadow[fields[0]] = (fields[1], _int(fields[2]), _int(fields[4]), _int(fields[7]))
+        return shadow
+
+    def _read_lastlog(self, path, passwd_key):
+        """{uid: (epoch, from)} read with one pread per account; the file is sparse and indexed by uid."""
+        logins = {}
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            return None
+        try:
+            size = os.fstat(fd).st_size
+            for uid in sorted({row[2] for row in self._cache["passwd"][1]}):
+                offset = uid * _LASTLOG.size
+                if offset + _LASTLOG.size > size:
+                    break
+                when, line, host = _LASTLOG.unpack(os.pread(fd, _LASTLOG.size, offset))
+                if when:
+                    logins[uid] = (when, (host.rstrip(b"\0") or line.rstrip(b"\0")).decode(errors="replace"))
+        finally:
+            os.close(fd)
+        return logins
+
+    @staticmethod
+    def _read_lastlog2(path):
+        """{name: (epoch, from)} from util-linux's lastlog2 database, which replaces lastlog on newer systems."""
+        if sqlite3 is None or not os.path.exists(path):
+            return None
+        try:
+            db = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            try:
+                rows = db.execute("SELECT Name, Time, TTY, RemoteHost FROM Lastlog2").fetchall()
+            finally:
+                db.close()
+        except sqlite3.Error:
+            return None
+        return {name: (when, host or tty or "") for name, when, tty, host in rows if when}
+
+    # --- SNAPSHOT ---
+
+    @timed("collector.users")
+    def snapshot(self):
+        """The current UserSnapshot, rebuilt only when a source file changed."""
+        with self._lock:
+            passwd = self._load("passwd", self._parse_passwd)
+            groups = self._load("group", self._parse_group)
+            shadow = self._load("shadow", self._parse_shadow)
+            lastlog = self._load("lastlog", self._read_lastlog, self._cache["passwd"][0])
+            lastlog2 = self._load("lastlog2", self._read_lastlog2)
+            key = tuple(self._cache[source][0] for source in self.SOURCES)
+            if self._snapshot is None or key != self._snapshot_key:
+                self._snapshot = self._build(passwd, groups, shadow, lastlog, lastlog2)
+                self._snapshot_key = key
+            return self._snapshot
+
+    def _build(self, passwd, groups, shadow, lastlog, lastlog2):
+        group_names = {info["gid"]: name for name, info in groups.items()}
+        supplementary = {}
+        for name, info in groups.items():
+            for member in info["members"]:
+                supplementary.setdefault(member, []).append(name)
+        accounts = []
+        for name, field, uid, gid, gecos, home, shell in passwd:
+            account = UserAccount(name, uid, gid, group_names.get(gid), supplementary.get(name, []), gecos, home,
+                                  shell, os.path.basename(shell) not in _NO_LOGIN)
+            if field != "x":
+                account.password = _password_state(field)  # Kept in passwd itself (no shadow entry)
+            if shadow is not None and name in shadow:
+                field, changed, max_days, expires = shadow[name]
+                account.password = _password_state(field)
+                account.last_change = changed * DAY if changed else None
+                account.max_days = max_days if max_days and max_days < 99999 else None
+                account.expires = expires * DAY if expires is not None else None
+            login = (lastlog2 or {}).get(name) or (lastlog or {}).get(uid)
+            if login:
+                account.last_login, account.last_login_from = login
+            accounts.append(account)
+        return UserSnapshot(accounts, groups, self.uid_min, shadow is not None,
+                            lastlog is not None or lastlog2 is not None)
+
 
 class UserManager:
-    def _run(self, cmd):
-        res = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-        return res.returncode == 0, res.stdout, res.stderr
+    """
+    Account inventory plus bulk add/lock. Commands run as argv lists (never
+    through a shell) on a small thread pool; each account's outcome can be
+    written to the audit log. useradd/usermod all take the same passwd lock,
+    so on POSIX they are run one at a time, with backoff when another tool
+    holds the lock. uid 0 and system accounts (below UID_MIN) are only locked
+    when forced.
+    """
+    OPERATIONS = ("add", "lock")
+
+    def __init__(self, inventory=None, workers=4, retries=8):
+        self.inventory = inventory or UserInventory()
+        self.workers = workers
+        self.retries = retries
+        self._passwd_lock = threading.Lock()
 
-    def add_user(self, username):
+    @staticmethod
+    def valid_name(name):
+        return bool(_VALID_NAME.match(name or ""))
+
+    @staticmethod
+    def _needs_sudo():
+        return os.name != "nt" and os.geteuid() != 0
+
+    def _command(self, op, name):
         if os.name == 'nt':
-            cmd = f"net user {username} /add"
-        else:
-            cmd = f"sudo useradd -m {username}"
-        
-        success, _, err = self._run(cmd)
-        if success:
+            return ["net", "user", name, "/add"] if op == "add" else ["net", "user", name, "/active:no"]
+        argv = ["useradd", "-m", name] if op == "add" else ["usermod", "-L", name]
+        # -n: a password prompt cannot be answered from a worker thread; authorize() caches it first
+        return ["sudo", "-n"] + argv if self._needs_sudo() else argv
+
+    def _run(self, argv):
+        try:
+            res = perf.run(argv, capture_output=True, text=True, timeout=60)
+        except subprocess.TimeoutExpired:
+            return False, "", "timed out"
+        except OSError as e:
+            return False, "", str(e)
+        return res.returncode == 0, res.stdout, res.stderr.strip()
+
+    def authorize(self):
+        """Asks for the sudo password once, up front, when not running as root. False if refused."""
+        if not self._needs_sudo():
+            return True
+        try:
+            return perf.run(["sudo", "-v"]).returncode == 0
+        except OSError:
+            return False
+
+    def _apply(self, op, name):
+        argv = self._command(op, name)
+        for attempt in range(self.retries):
+            if os.name == 'nt':
+                ok, _, err = self._run(argv)
+            else:
+                # Every shadow-utils command takes the passwd lock: parallel runs only collide
+                with self._passwd_lock:
+                    ok, _, err = self._run(argv)
+            # Another tool (a package script, an admin's vipw) may hold it for a while
+            if ok or "lock" not in err.lower() or "try again" not in err.lower():
+                return ok, err
+            time.sleep(min(0.25 * 2 ** attempt, 2.0))
+        return ok, err
+
+    def _precheck(self, op, name, snapshot, force=False):
+        """Reason to skip or fail an account before running anything, or None."""
+        if not self.valid_name(name):
+            return "FAILED", "invalid user name"
+        if snapshot is None:
+            if op == "lock" and name == "root" and not force:
+                return "FAILED", "refusing to lock root (use --force)"
+            return None
+        account = snapshot.by_name.get(name)
+        if op == "add" and account is not None:
+            return "SKIPPED", "already exists"
+        if op == "lock" and account is None:
+            return "FAILED", "no such user"
+        if op == "lock" and account.password == "locked":
+            return "SKIPPED", "already locked"
+        if op == "lock" and not force:
+            if account.uid == 0:
+                return "FAILED", "refusing to lock a uid-0 account (use --force)"
+            if account.uid < snapshot.uid_min:
+                return "FAILED", f"system account, uid {account.uid} < UID_MIN {snapshot.uid_min} (use --force)"
+        return None
+
+    def bulk(self, op, names, auditor=None, workers=None, force=False):
+        """
+        Adds or locks every named account. Returns one
+        {user, op, status (SUCCESS/SKIPPED/FAILED), error} per distinct name,
+        in input order. Locking uid 0 or a system account needs force.
+        """
+        if op not in self.OPERATIONS:
+            raise ValueError(f"unknown operation: {op}")
+        snapshot = self.inventory.snapshot() if self.inventory.available else None
+        results = {name: {"user": name, "op": op, "status": "SUCCESS", "error": None} for name in names}
+        pending = []
+        for name, result in results.items():
+            outcome = self._precheck(op, name, snapshot, force)
+            if outcome is None:
+                pending.append(name)
+            else:
+                result["status"], result["error"] = outcome
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=max(1, min(workers or self.workers, len(pending)))) as pool:
+                for name, (ok, err) in zip(pending, pool.map(lambda n: self._apply(op, n), pending)):
+                    if not ok:
+                        results[name].update(status="FAILED", error=err or "command failed")
+
+        if auditor is not None:
+            for result in results.values():
+                auditor.log_event("user_admin", f"USER_{op.upper()}", risk="RED", status=result["status"],
+                                  target=result["user"], error=result["error"])
+        return list(results.values())
+
+    def add_users(self, names, auditor=None):
+        return self.bulk("add", names, auditor)
+
+    def lock_users(self, names, auditor=None, force=False):
+        return self.bulk("lock", names, auditor, force=force)
+
+    def add_user(self, username, auditor=None):
+        result = self.add_users([username], auditor)[0]
+        if result["status"] == "SUCCESS":
             print(f"{Colors.GREEN}User '{username}' added.{Colors.RESET}")
         else:
-            print(f"{Colors.FAIL}Error: {err}{Colors.RESET}")
+            print(f"{Colors.FAIL}Error: {result['error']}{Colors.RESET}")
 
     def list_users(self):
         print(f"{Colors.HEADER}--- System Users ---{Colors.RESET}")
-        if os.name == 'nt':
-            _, out, _ = self._run("net user")
+        if not self.inventory.available:
+            _, out, _ = self._run(["net", "user"])
             print(out)
-        else:
-            with open('/etc/passwd', 'r') as f:
-                for line in f:
-                    print(line.split(':')[0])
\ No newline at end of file
+            return
+        for account in self.inventory.snapshot().accounts:
+            print(f"{account.name:<20} {account.uid:>6}  {account.shell}")
@@ -0,0 +1,180 @@
+import json
+import os
+import shlex
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+from batch import BatchRunner, default_socket_path
+from core.anomaly import AnomalyDetector
+from core.filesystems import FilesystemMonitor
+from core.cgroups import CgroupMonitor
+from core.integrity import IntegrityMonitor
+from core.integrity_watch import IntegrityWatcher
+from core.monitoring import SystemMonitor
+from core.timeseries import TimeSeriesStore, MetricRecorder
+from utils.colors import Colors
+from utils.helpers import json_default
+from utils.perf import PERF, span
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """One NDJSON request per line in, one JSON envelope per line out."""
+    def handle(self):
+        for raw in self.rfile:
+            if not raw.strip():
+                continue
+            try:
+                request = json.loads(raw)
+                parts = request["argv"] if "argv" in request else shlex.split(request["cmd"])
+            except (ValueError, KeyError, TypeError, AttributeError):
+                envelope = {"cmd": raw.decode(errors="replace").strip(), "ok": False, "error": "malformed request"}
+            else:
+                envelope = self.server.daemon.execute(parts)
+            try:
+                self.wfile.write(json.dumps(envelope, default=json_default).encode() + b"\n")
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                return
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class NetMonDaemon:
+    """
+    Long-lived backend for batch clients. Keeps one warm BatchRunner (imports,
+    integrity DB, PID name cache, AI client) behind a Unix socket, and samples
+    system metrics in the background: 'metrics' never reports a cold CPU 0.0,
+    and the samples are recorded into the metric history.
+    """
+    def __init__(self, socket_path=None, interval=1.0):
+        self.socket_path = socket_path or default_socket_path()
+        self.interval = interval
+        self.runner = BatchRunner(interval=min(interval, 0.1))
+        self.runner.handlers["status"] = self.status
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.started = time.time()
+        self.requests = 0
+        self.server = None
+        self.recorder = MetricRecorder(SystemMonitor(), TimeSeriesStore(), interval=interval,
+                                       detector=AnomalyDetector(interval=interval), filesystems=FilesystemMonitor(),
+                                       cgroups=CgroupMonitor())
+        self.recorder.detector.add_callback(self._log_anomaly)
+        # 'disks' reads I/O rates from the sampler's window instead of waiting for its own
+        self.runner._filesystems = self.recorder.filesystems
+        self.runner._cgroups = self.recorder.cgroups
+        self.integrity_watch = IntegrityWatcher(IntegrityMonitor())
+        self.integrity_watch.add_callback(self._log_integrity)
+        self.auditor = None
+
+    def execute(self, parts):
+        # Collectors keep caches that are not thread-safe; calls are short, so serialize them
+        with self._lock:
+            self.requests += 1
+            with span(f"daemon.{parts[0].lower() if parts else 'empty'}"):
+                return self.runner.execute(parts)
+
+    def status(self, args):
+        return {
+            "pid": os.getpid(),
+            "uptime": round(time.time() - self.started, 1),
+            "requests": self.requests,
+            "socket": self.socket_path,
+            "cwd": os.getcwd(),
+            "ai_provider": self.runner._nlp.ai.name if self.runner._nlp else None,
+            "latency": PERF.snapshot("daemon."),
+            "recording": self.recorder.store.writer,
+            "recorder_errors": self.recorder.errors,
+            "recorder_last_error": self.recorder.last_error,
+            "anomalies": [{"series": name, "value": round(value, 3), "expected": round(expected, 3), "z": round(z, 1)}
+                          for name, value, expected, z in self.recorder.detector.active()[:20]],
+            "integrity_watch": self.integrity_watch.stats(),
+        }
+
+    def _audit(self):
+        if self.auditor is None:
+            from core.auditor import AuditLogger
+            self.auditor = AuditLogger()
+        return self.auditor
+
+    def _log_integrity(self, alert):
+        if self.integrity_watch.owner:
+            self._audit().log_event("integrity", alert["path"], risk=alert["risk"], status=alert["status"],
+                                    message=alert["message"], checked=alert["checked"], reason=alert["reason"])
+
+    def _log_anomaly(self, anomaly):
+        if not self.recorder.store.writer:
+            return  # The shell that records the history audits them
+        self._audit().log_event("anomaly", anomaly["series"], risk="YELLOW", status=anomaly["direction"].upper(),
+                               message=anomaly["message"], value=anomaly["value"],
+                               expected=anomaly["expected"], z=anomaly["z"])
+
+    def _sample(self):
+        recorder = self.recorder
+        # A shell that started first keeps recording; the daemon then only samples and detects
+        recorder.store.acquire_writer()
+        recorder.detector.load()
+        try:
+            while not self._stop.wait(self.interval):
+                try:
+                    self.runner.cpu_sample = recorder.sample()["cpu"]
+                    if recorder.ticks % 600 == 0:
+                        recorder.detector.save()
+                except Exception as e:
+                    recorder.failed(e)  # e.g. disk full: keep serving
+        finally:
+            recorder.detector.save()
+            recorder.store.close()
+
+    def _claim_socket(self):
+        """Removes a stale socket file, refusing to start if another daemon answers on it."""
+        if not os.path.exists(self.socket_path):
+            os.makedirs(os.path.dirname(self.socket_path) or ".", exist_ok=True)
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.unlink(self.socket_path)
+        else:
+            raise RuntimeError(f"another daemon is already listening on {self.socket_path}")
+        finally:
+            probe.close()
+
+    def serve(self):
+        self._claim_socket()
+        # Warm everything a first request would otherwise pay for
+        self.runner.warm()
+        threading.Thread(target=self._sample, daemon=True).start()
+        self.integrity_watch.start()
+
+        old_umask = os.umask(0o177)  # Socket is owner-only
+        try:
+            self.server = _Server(self.socket_path, _RequestHandler)
+        finally:
+            os.umask(old_umask)
+        self.server.daemon = self
+
+        def on_signal(signum, frame):
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+        signal.signal(signal.SIGTERM, on_signal)
+        signal.signal(signal.SIGINT, on_signal)
+
+        print(f"{Colors.GREEN}NetMon-AI daemon listening on {self.socket_path} (pid {os.getpid()}){Colors.RESET}",
+              file=sys.stderr)
+        try:
+            self.server.serve_forever()
+        finally:
+            self._stop.set()
+            self.integrity_watch.stop()
+            self.server.server_close()
+            try:
+                os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
+            print(f"{Colors.WARNING}NetMon-AI daemon stopped.{Colors.RESET}", file=sys.stderr)
@@ -0,0 +1,142 @@
+from core.registry import Arg, Opt
+from utils.helpers import positive_int
+
+# Handlers are referenced by "module:attr" so nothing below is imported until used
+
+
+def register_builtins(registry):
+    """Declares every built-in shell command and AI intent action."""
+    cmd = registry.command
+
+    # --- AI ---
+    cmd("ask", "handlers.system:ask", section="AI Commands",
+        args=[Arg("query", many=True)], usage="ask <query>",
+        help='Ask AI for help (e.g., "ask show CPU usage")')
+
+    # --- MONITORING ---
+    section = "System Monitoring"
+    cmd("monitor", "handlers.monitoring:dashboard", section=section, args=[],
+        help="Open live system dashboard")
+    cmd("history", "handlers.monitoring:history", section=section,
+        args=[Arg("metric", required=False, default="cpu"), Opt("--since", default="1h"), Opt("--until"),
+              Opt("--resolution", dest="resolution"), Opt("--json", const=True, default=False)],
+        usage="history [cpu|mem|disk|load|net_sent|net_recv] [--since 6h] [--until T] [--resolution 1s|1m|1h] [--json]",
+        help="Recorded metric history: min/avg/max, peak time and a sparkline")
+    cmd("pslist", "handlers.monitoring:ProcessList", section=section, args=[],
+        help="List running processes")
+    cmd("cgroups", "handlers.monitoring:cgroups", section=section,
+        args=[Arg("match", required=False), Opt("--sort", default="cpu"), Opt("--limit", int, default=15),
+              Opt("--json", const=True, default=False)],
+        usage="cgroups [NAME] [--sort cpu|memory] [--limit N] [--json]",
+        help="CPU, memory and I/O per container / systemd unit (cgroup v2)")
+    cmd("pskill", "handlers.monitoring:kill", section=section, risk="RED",
+        args=[Arg("pid", int)], usage="pskill <pid>", help="Terminate a process by PID")
+    cmd("connections", "handlers.network:connections", section=section,
+        args=[Opt("--state"), Opt("--port", int), Opt("--proc"), Opt("--remote"),
+              Opt("--top", int), Opt("--page", int), Opt("--fast", const=True)],
+        usage="connections [--state S] [--port N] [--proc NAME] [--remote IP] [--top N] [--page N] [--fast]",
+        help="Show active network connections, grouped and paged")
+
+    # --- SECURITY & INTEGRITY ---
+    section = "Security & Integrity"
+    cmd("register", "handlers.security:register", section=section, risk="YELLOW",
+        args=[Arg("path")], usage="register <file>", help="Register file for integrity monitoring")
+    cmd("audit", "handlers.security:audit", section=section, args=[Opt("--quick", const=True, default=False)],
+        usage="audit [--quick]",
+        help="Check registered files for tampering (--quick skips re-hashing files whose stat and fingerprint are unchanged)")
+    cmd("integrity-watch", "handlers.security:integrity_watch", section=section,
+        args=[Arg("op", required=False, default="status"), Opt("--json", const=True, default=False)],
+        usage="integrity-watch [status|start|stop] [--json]",
+        help="Background re-verification of registered files as they change")
+    cmd("audit-query", "handlers.security:audit_query", section=section,
+        args=[Opt("--since"), Opt("--until"), Opt("--action"), Opt("--risk"), Opt("--status"),
+              Opt("--user"), Opt("--grep", dest="text"), Opt("--limit", int, default=50),
+              Opt("--json", const=True)],
+        usage="audit-query [--since 30d] [--until T] [--action A] [--risk R] [--status S] "
+              "[--user U] [--grep text] [--limit N] [--json]",
+        help="Search the AI audit trail")
+    cmd("audit-verify", "handlers.security:audit_verify", section=section,
+        args=[Opt("--workers", int)], usage="audit-verify [--workers N]",
+        help="Verify the audit hash chain and signed checkpoints")
+    cmd("analyze", "handlers.security:analyze", section=section,
+        args=[Arg("logfile")], usage="analyze <logfile>", help="AI-powered log analysis")
+    cmd("tail", "handlers.security:tail", section=section,
+        args=[Arg("files", many=True), Opt("--grep"), Opt("--regex")],
+        usage="tail <file> [file ...] [--grep <word>] [--regex <re>]", help="Follow log files live")
+    cmd("watch-threats", "handlers.security:watch_threats", section=section,
+        args=[Arg("files", required=False, many=True), Opt("--no-ai", const=True, default=False)],
+        usage="watch-threats [files] [--no-ai]", help="Live brute-force/new-user/sudo detection")
+    cmd("logstats", "handlers.security:log_stats", section=section,
+        args=[Arg("logfile"), Opt("--freq", default="1min"), Opt("--export")],
+        usage="logstats <logfile> [--freq 5min] [--export out.parquet]",
+        help="Bulk-parse a log: failures per IP per window, top programs")
+    cmd("svclogs", "handlers.security:service_logs", section=section,
+        args=[Arg("service"), Arg("lines", int, required=False, default=50),
+              Opt("--new", const=True, default=False), Opt("--analyze", const=True, default=False),
+              Opt("--reset", const=True, default=False)],
+        usage="svclogs <svc> [n] [--new] [--analyze] [--reset]",
+        help="Show service journal (--new: only since last --new, --analyze: incremental AI analysis, "
+             "--reset: forget the --new cursor)")
+
+    # --- USERS ---
+    section = "User Management"
+    cmd("users", "handlers.security:users", section=section,
+        args=[Opt("--group"), Opt("--shell"), Opt("--uid", int), Opt("--login", const=True, default=False),
+              Opt("--json", const=True, default=False)],
+        usage="users [--group G] [--shell bash] [--uid N] [--login] [--json]",
+        help="Accounts with groups, password state and last login (cached, no shell commands)")
+    cmd("users-audit", "handlers.security:users_audit", section=section,
+        args=[Opt("--inactive", int, default=90), Opt("--json", const=True, default=False)],
+        usage="users-audit [--inactive DAYS] [--json]",
+        help="Flag uid-0 accounts, empty passwords, system logins, expired passwords and idle accounts")
+    cmd("useradd", "handlers.security:user_add", section=section, risk="RED",
+        args=[Arg("names", many=True)], usage="useradd <user> [user ...]",
+        help="Create accounts (each one audited)")
+    cmd("userlock", "handlers.security:user_lock", section=section, risk="RED",
+        args=[Arg("names", many=True), Opt("--force", const=True, default=False)],
+        usage="userlock <user> [user ...] [--force]",
+        help="Lock account passwords (each one audited; root and system accounts need --force)")
+
+    # --- AUTOMATION ---
+    cmd("run-script", "handlers.system:run_script", section="Automation", risk="RED",
+        args=[Arg("path")], usage="run-script <file>", help="Execute automation playbook")
+
+    # --- NETWORK ---
+    cmd("probe", "handlers.network:probe", section="Network Tools",
+        args=[Arg("hosts", required=False, many=True), Opt("--file", many=True),
+              Opt("--count", positive_int), Opt("--port", int), Opt("--watch", float),
+              Opt("--tcp", dest="method", const="tcp"), Opt("--icmp", dest="method", const="icmp")],
+        usage="probe <host> [host ...] [--file F] [--count N] [--port P] [--tcp|--icmp] [--watch S]",
+        help="Concurrent latency/loss check")
+
+    # --- GENERAL ---
+    cmd("help", "handlers.system:show_help", args=[Arg("command", required=False)],
+        usage="help [command]", help="Show this help message")
+    cmd("perf", "handlers.system:perf_report",
+        args=[Opt("--reset", const=True, default=False), Opt("--profile", const=True, default=False),
+              Opt("--prefix"), Opt("--json", const=True, default=False)],
+        usage="perf [--prefix cmd.] [--reset] [--profile] [--json]",
+        help="Latency histograms per command/collector/AI call (--profile: cProfile the next command)")
+    cmd("clear", "handlers.system:clear", aliases=("cls",), args=[], usage="clear / cls", help="Clear screen")
+
+    # --- AI INTENT ACTIONS ---
+    act = registry.action
+    act("MONITOR_CPU", "handlers.monitoring:cpu")
+    act("MONITOR_MEM", "handlers.monitoring:memory")
+    act("MONITOR_DISK", "handlers.monitoring:disk")
+    act("MONITOR_SUMMARY", "handlers.monitoring:summary")
+    act("MONITOR_DASHBOARD", "handlers.monitoring:dashboard")
+    act("PROCESS_LIST", "handlers.monitoring:ProcessList")
+    act("CGROUP_USAGE", "handlers.monitoring:CgroupReport", target="cgroup")
+    act("METRIC_HISTORY", "handlers.monitoring:History", target="metric")
+    act("LIST_FILES", "handlers.system:list_files")
+    act("MOVE_DIR", "handlers.system:move_dir")
+    act("MOVE_AND_LIST", "handlers.system:move_and_list")
+    # Floors: the AI's own risk label can raise these but never lower them
+    act("SERVICE_OP", "handlers.system:service_op", risk="RED", target="service")
+    act("KILL_PROC", "handlers.monitoring:kill_intent", risk="RED", target="pid")
+    act("PORT_SCAN", "handlers.network:PortScan", risk="YELLOW", target="host")
+    act("PING", "handlers.network:Ping", target="host")
+    act("BANDWIDTH", "handlers.network:Bandwidth")
+    act("CONNECTIONS", "handlers.network:connections_intent")
+    act("UNKNOWN", "handlers.system:unknown")
@@ -0,0 +1,197 @@
+import json
+import time
+from utils.colors import Colors
+from utils.helpers import format_bytes, format_percent, json_default, sparkline
+from core.registry import Handler
+from core.timeseries import TimeSeriesStore
+
+
+class MetricHandler(Handler):
+    """CPU/MEM/DISK readouts; one instance per intent, all sharing the same formatting."""
+    def __init__(self, *metrics):
+        self.metrics = metrics  # (metrics key, label) pairs
+
+    def collect(self, shell, request):
+        stats = shell.prefetcher.take("metrics", shell.monitor.get_metrics)
+        return {key: stats.get(key) for key, _ in self.metrics}
+
+    def render(self, shell, data):
+        print("  |  ".join(format_percent(label, data[key]) for key, label in self.metrics))
+        for key, label in self.metrics:
+            unusual, z = shell.anomalies.status(key)
+            if unusual:
+                print(f"{Colors.WARNING}  {label} is unusual for this host ({z:+.1f} sd from its recent baseline){Colors.RESET}")
+
+
+cpu = MetricHandler(("cpu", "CPU Usage"))
+memory = MetricHandler(("mem", "Memory Usage"))
+
+
+def _percent_cell(value, width):
+    if value is None:
+        return f"{'-':>{width}}"
+    color = Colors.FAIL if value > 85 else Colors.WARNING if value > 60 else Colors.GREEN
+    return f"{color}{value:>{width - 1}.1f}%{Colors.RESET}"
+
+
+class DiskReport(MetricHandler):
+    """MONITOR_DISK: the root readout, then every mount (space and inodes) and per-disk I/O."""
+    def collect(self, shell, request):
+        data = super().collect(shell, request)
+        data.update(shell.prefetcher.take("filesystems", shell.filesystems.snapshot))
+        return data
+
+    def render(self, shell, data):
+        super().render(shell, data)
+        if data["mounts"]:
+            print(f"\n{Colors.BOLD}{'Mount':<32} {'FS':<8} {'Size':>11} {'Used':>8} {'Inodes':>8}{Colors.RESET}")
+            for m in data["mounts"]:
+                print(f"{m['mountpoint'][:32]:<32} {m['fstype'][:8]:<8} {format_bytes(m['total']):>11} "
+                      f"{_percent_cell(m['percent'], 8)} {_percent_cell(m['inodes_percent'], 8)}")
+        if data["io"]:
+            print(f"\n{Colors.BOLD}{'Disk':<12} {'r/s':>8} {'w/s':>8} {'Read/s':>12} {'Write/s':>12} "
+                  f"{'Await ms':>9} {'Util':>7}{Colors.RESET}")
+            for d in data["io"]:
+                print(f"{d['disk']:<12} {d['read_iops']:>8.1f} {d['write_iops']:>8.1f} {format_bytes(d['read_bps']):>12} "
+                      f"{format_bytes(d['write_bps']):>12} {d['await_ms']:>9.2f} {_percent_cell(d['util'], 7)}")
+
+
+disk = DiskReport(("disk", "Disk Usage"))
+summary = MetricHandler(("cpu", "CPU"), ("mem", "MEM"), ("disk", "DISK"))
+
+
+class ProcessList(Handler):
+    def collect(self, shell, request):
+        return shell.prefetcher.take("processes", shell.proc_mgr.list_processes)
+
+    def render(self, shell, procs):
+        print(f"\n{Colors.BOLD}{'PID':<10} {'Name':<25} {'CPU %':<10} {'Mem %':<10}{Colors.RESET}")
+        for p in procs:
+            print(f"{p['pid']:<10} {p['name']:<25} {p.get('cpu_percent', 0):<10} {p.get('memory_percent', 0):10.2f}")
+
+
+def _cgroups(data, match=None, sort="cpu", limit=15):
+    """Groups of a CgroupMonitor snapshot, filtered by name/path substring and ranked."""
+    rows = data["groups"]
+    if match and str(match).lower() != "none":
+        match = str(match).lower()
+        rows = [r for r in rows if match in r.path.lower() or match in r.name.lower()]
+    key = (lambda r: r.memory or 0) if sort in ("memory", "mem") else (lambda r: r.cpu_percent)
+    return sorted(rows, key=key, reverse=True)[:limit]
+
+
+def _render_cgroups(shell, data, rows):
+    if not data["available"]:
+        print(f"{Colors.WARNING}No cgroup v2 hierarchy at {data['root']} "
+              f"(set NETMON_CGROUP_ROOT to where it is mounted).{Colors.RESET}")
+        return
+    if not rows:
+        print(f"{Colors.WARNING}No matching cgroups.{Colors.RESET}")
+        return
+    print(f"\n{Colors.BOLD}{'Cgroup':<28} {'CPU %':>8} {'Memory':>11} {'Mem %':>7} {'Read/s':>11} "
+          f"{'Write/s':>11} {'PIDs':>5}  Busiest process{Colors.RESET}")
+    for r in rows:
+        top = data["top_processes"].get(r.path)
+        busiest = f"{top['name']}({top['pid']}) {top['cpu_percent']:.0f}%" if top else ""
+        throttled = f" {Colors.WARNING}throttled {r.throttled_percent:.0f}%{Colors.RESET}" if r.throttled_percent else ""
+        print(f"{r.name[:28]:<28} {r.cpu_percent:>8.1f} {format_bytes(r.memory or 0):>11} "
+              f"{_percent_cell(r.memory_percent, 7)} {format_bytes(r.read_bps):>11} {format_bytes(r.write_bps):>11} "
+              f"{r.pids if r.pids is not None else '-':>5}  {busiest}{throttled}")
+    print(f"{Colors.CYAN}CPU % is of one core; Mem % is of the group's memory.max, or of host RAM without a limit.{Colors.RESET}")
+
+
+def cgroups(shell, args):
+    data = shell.cgroups.snapshot()
+    rows = _cgroups(data, args["match"], args["sort"], args["limit"])
+    if args["json"]:
+        print(json.dumps(rows, indent=2, default=json_default))
+        return
+    _render_cgroups(shell, data, rows)
+
+
+class CgroupReport(Handler):
+    """CGROUP_USAGE: target filters by name ("nginx", "docker"), value ranks by cpu or memory."""
+    def collect(self, shell, request):
+        data = shell.prefetcher.take("cgroups", shell.cgroups.snapshot)
+        return data, _cgroups(data, request["target"], request["value"] or "cpu", 10)
+
+    def render(self, shell, data):
+        _render_cgroups(shell, *data)
+
+
+def dashboard(shell, request):
+    shell.monitor.display_dashboard(shell.history, anomalies=shell.anomalies, filesystems=shell.filesystems,
+                                    cgroups=shell.cgroups)
+
+
+# Words the AI (or a user) may use for the recorded metrics
+METRIC_ALIASES = {
+    "memory": "mem", "ram": "mem", "storage": "disk", "load average": "load",
+    "sent": "net_sent", "upload": "net_sent", "recv": "net_recv", "received": "net_recv", "download": "net_recv",
+}
+
+
+def _history(shell, metric, since, until=None, resolution=None):
+    """(metric, summary or None, error or None) for a metric over 'since[..until]'."""
+    metric = str(metric or "cpu").strip().lower()
+    metric = METRIC_ALIASES.get(metric, "cpu" if metric == "none" else metric)
+    if metric not in shell.history.metrics:
+        return metric, None, f"Unknown metric '{metric}' (recorded: {', '.join(shell.history.metrics)})"
+    if resolution and resolution not in [r[0] for r in shell.history.resolutions]:
+        return metric, None, f"Unknown resolution '{resolution}' (expected {', '.join(r[0] for r in shell.history.resolutions)})"
+    try:
+        start, end = TimeSeriesStore.parse_range(f"{since}..{until}" if until else since)
+    except ValueError as e:
+        return metric, None, f"Invalid time range: {e}"
+    return metric, shell.history.summary(metric, start, end, resolution), None
+
+
+def _render_history(metric, summary, error):
+    if error:
+        print(f"{Colors.FAIL}{error}{Colors.RESET}")
+        return
+    if summary is None:
+        print(f"{Colors.WARNING}No history recorded for {metric} in that range.{Colors.RESET}")
+        return
+    when = lambda epoch: time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(epoch))
+    unit = " B/s" if metric.startswith("net_") else "" if metric == "load" else "%"
+    print(f"\n{Colors.BOLD}{metric} history {when(summary['start'])} -> {when(summary['end'])} "
+          f"({summary['points']} x {summary['resolution']}){Colors.RESET}")
+    print(f"  min {summary['min']:.1f}{unit}  avg {summary['avg']:.1f}{unit}  "
+          f"max {summary['max']:.1f}{unit} at {when(summary['peak_at'])}  last {summary['last']:.1f}{unit}")
+    scale = {"lo": 0, "hi": 100} if unit == "%" else {"lo": 0}
+    print(f"  {Colors.CYAN}{sparkline(summary['values'], 60, **scale)}{Colors.RESET}")
+
+
+def history(shell, args):
+    metric, summary, error = _history(shell, args["metric"], args["since"], args["until"], args["resolution"])
+    if args["json"] and not error:
+        print(json.dumps(summary, indent=2))
+        return
+    _render_history(metric, summary, error)
+
+
+class History(Handler):
+    """METRIC_HISTORY: target is the metric, value the range ('6h', 'ISO..ISO')."""
+    def collect(self, shell, request):
+        return _history(shell, request["target"], request["value"] or "1h")
+
+    def render(self, shell, data):
+        _render_history(*data)
+
+
+def kill(shell, args):
+    success, msg = shell.proc_mgr.kill_process(args["pid"])
+    print(f"{Colors.GREEN if success else Colors.FAIL}{msg}{Colors.RESET}")
+
+
+def kill_intent(shell, request):
+    try:
+        pid = int(request["target"])
+    except (ValueError, TypeError):
+        print(f"{Colors.FAIL}Invalid PID: must be a number{Colors.RESET}")
+        return
+    if pid <= 0:
+        print(f"{Colors.FAIL}Invalid PID{Colors.RESET}")
+        return
+    kill(shell, {"pid": pid})
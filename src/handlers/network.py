@@ -0,0 +1,70 @@
+from utils.colors import Colors
+from core.registry import Handler
+from core.latency_prober import LatencyProber
+
+
+def connections(shell, args):
+    shell.net_tools.show_connections(**{k: v for k, v in args.items() if v is not None})
+
+
+def connections_intent(shell, request):
+    shell.net_tools.show_connections(rows=shell.prefetcher.take("connections"))
+
+
+def probe(shell, args):
+    hosts = list(args["hosts"])
+    for path in args["file"]:
+        hosts.extend(LatencyProber.load_hosts(path))
+    if not hosts:
+        print(f"{Colors.WARNING}Usage: probe <host> [host ...] [--file hosts.txt] [--count N] [--port P] [--tcp|--icmp] [--watch SECONDS]{Colors.RESET}")
+        return
+    opts = {k: args[k] for k in ("count", "port", "method", "watch") if args[k] is not None}
+    shell.net_tools.probe(hosts, **opts)
+
+
+def _ports(value):
+    """'22' or '22,80,443' from an intent value; None means the default set."""
+    if not value or str(value).lower() == "none":
+        return None
+    try:
+        return [int(p) for p in str(value).replace(" ", "").split(",") if p] or None
+    except ValueError:
+        return None
+
+
+class PortScan(Handler):
+    def collect(self, shell, request):
+        host = request["target"]
+        if not host:
+            return None
+        ports = _ports(request["value"])
+        states = shell.net_tools.scan_ports(host, ports) if ports else shell.net_tools.scan_ports(host)
+        return host, states
+
+    def render(self, shell, data):
+        if data is None:
+            print(f"{Colors.FAIL}Port scan requires a target host{Colors.RESET}")
+            return
+        host, states = data
+        shell.net_tools.port_scan(host, result=states)
+
+
+class Ping(Handler):
+    def collect(self, shell, request):
+        host = request["target"]
+        return (host, shell.net_tools.ping_output(host)) if host else None
+
+    def render(self, shell, data):
+        if data is None:
+            print(f"{Colors.FAIL}Ping requires a target host{Colors.RESET}")
+            return
+        host, result = data
+        shell.net_tools.ping(host, result=result)
+
+
+class Bandwidth(Handler):
+    def collect(self, shell, request):
+        return shell.prefetcher.take("bandwidth", shell.net_tools.measure_bandwidth)
+
+    def render(self, shell, rates):
+        shell.net_tools.get_bandwidth(rates)
@@ -0,0 +1,264 @@
+import json
+import os
+import time
+from utils.colors import Colors
+from core.audit_chain import AuditChainVerifier
+from core.audit_index import AuditIndex
+
+
+def register(shell, args):
+    shell.integrity.register_file(args["path"])
+
+
+def audit(shell, args):
+    shell.integrity.check_integrity(quick=args["quick"])
+
+
+def integrity_watch(shell, args):
+    watch = shell.integrity_watch
+    op = args["op"].lower()
+    if op == "start":
+        watch.start()
+    elif op == "stop":
+        watch.stop()
+    elif op != "status":
+        print(f"{Colors.FAIL}Unknown operation '{op}'. Usage: integrity-watch [status|start|stop] [--json]{Colors.RESET}")
+        return
+    stats = watch.stats()
+    if args["json"]:
+        print(json.dumps(dict(stats, alerts=list(watch.alerts)), indent=2))
+        return
+    if not stats["running"]:
+        print(f"{Colors.WARNING}Integrity watch is stopped ('integrity-watch start' resumes it).{Colors.RESET}")
+        return
+    mode = "inotify" if stats["inotify"] else f"stat polling every {watch.poll_interval:.0f}s"
+    since = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stats["started"]))
+    print(f"{Colors.GREEN}Integrity watch running since {since} ({mode}){Colors.RESET}"
+          + ("" if stats["owner"] else f" {Colors.CYAN}- alerts are audited by another NetMon-AI process{Colors.RESET}"))
+    print(f"  {stats['files']} file(s) watched, {stats['dirty']} pending, {stats['events']} event(s), "
+          f"{stats['verified']} re-verified ({stats['bytes_hashed'] / 2**20:.1f} MB hashed)")
+    for path, status in stats["problems"].items():
+        print(f"  {Colors.FAIL}{status}:{Colors.RESET} {path}")
+    if stats["suppressed"]:
+        print(f"  {Colors.WARNING}{stats['suppressed']} alert(s) deferred by the rate limit, "
+              f"{stats['deferred']} still queued; they are reported in order as it allows{Colors.RESET}")
+
+
+def audit_query(shell, args):
+    """Answers questions like 'who authorized RED actions last month' from the audit index."""
+    filters = {k: args[k] for k in ("since", "until", "action", "risk", "status", "user", "text", "limit")}
+
+    shell.auditor.flush()
+    if shell.audit_index is None:
+        index_path = os.path.join(os.path.dirname(shell.auditor.log_file), "ai_audit.idx.json")
+        shell.audit_index = AuditIndex(shell.auditor.log_file, index_path)
+    shell.audit_index.refresh()
+    try:
+        records = shell.audit_index.query(**filters)
+    except ValueError as e:
+        print(f"{Colors.FAIL}Invalid time: {e}{Colors.RESET}")
+        return
+
+    if args["json"]:
+        for rec in records:
+            print(json.dumps(rec))
+        return
+    print(f"\n{Colors.BOLD}{'Time':<20} {'User':<12} {'Risk':<7} {'Status':<11} {'Action':<18} Query{Colors.RESET}")
+    for rec in records:
+        stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(rec['epoch']))
+        color = Colors.FAIL if rec['risk'] == "RED" else Colors.WARNING if rec['risk'] == "YELLOW" else ""
+        print(f"{color}{stamp:<20} {str(rec['user'])[:12]:<12} {str(rec['risk']):<7} {str(rec['status']):<11} "
+              f"{str(rec['action'])[:18]:<18} {rec['query'] or rec['target'] or ''}{Colors.RESET}")
+    print(f"{Colors.CYAN}{len(records)} record(s).{Colors.RESET}")
+
+
+def audit_verify(shell, args):
+    """Walks the hash chain over all rotated files and checks the signed checkpoints."""
+    shell.auditor.flush()
+    verifier = AuditChainVerifier(shell.auditor.log_file, shell.auditor.checkpoint_file, shell.auditor.key_path)
+    print(f"{Colors.CYAN}Verifying audit chain...{Colors.RESET}")
+    report = verifier.verify(workers=args["workers"])
+
+    print(f"  Records:      {report['records']} (seq {report['first_seq']} .. {report['last_seq']})"
+          f" in {report['files']} file(s), {report['segments']} segment(s)")
+    print(f"  Checkpoints:  {report['checkpoints_verified']} verified, "
+          f"{report['unsigned_tail']} record(s) since the last one")
+    if report['legacy_records']:
+        print(f"  {Colors.WARNING}{report['legacy_records']} record(s) predate chaining and cannot be verified{Colors.RESET}")
+    if report['ok']:
+        print(f"{Colors.GREEN}[OK] Audit trail intact ({report['elapsed']}s){Colors.RESET}")
+        return
+    print(f"{Colors.FAIL}[TAMPERED] {len(report['errors'])} problem(s) found:{Colors.RESET}")
+    for err in report['errors'][:20]:
+        print(f"{Colors.FAIL}  - {err}{Colors.RESET}")
+    if len(report['errors']) > 20:
+        print(f"{Colors.FAIL}  ... and {len(report['errors']) - 20} more{Colors.RESET}")
+    shell.auditor.log_event("audit_verify", "AUDIT_VERIFY", risk="RED", status="TAMPERED",
+                            errors=report['errors'][:20])
+
+
+def analyze(shell, args):
+    shell.ai_logs.analyze_file(args["logfile"])
+
+
+def tail(shell, args):
+    shell.log_view.tail_logs(args["files"], keyword=args["grep"], pattern=args["regex"])
+
+
+def watch_threats(shell, args):
+    """Streams auth/syslog lines through the local threat detectors until Ctrl+C."""
+    from core.log_tailer import LogTailer
+    from core.threat_detector import ThreatDetector
+
+    files = args["files"]
+    if not files:
+        candidates = ["/var/log/auth.log", "/var/log/secure", "/var/log/syslog", "/var/log/messages"]
+        files = [f for f in candidates if os.path.exists(f)]
+    if not files:
+        print(f"{Colors.FAIL}No log files to watch. Usage: watch-threats [logfile ...] [--no-ai]{Colors.RESET}")
+        return
+
+    detector = ThreatDetector(analyzer=None if args["no_ai"] else shell.ai_logs)
+    detector.add_callback(lambda alert: print(ThreatDetector.format_alert(alert)))
+    detector.add_callback(lambda alert: shell.auditor.log_event(
+        "threat", alert["detector"], risk="RED" if alert["severity"] == "CRITICAL" else "YELLOW",
+        status="ALERT", message=alert["message"], key=alert["key"], source=alert.get("source")))
+    tailer = LogTailer(files)
+    tailer.add_callback(detector.feed)
+
+    print(f"{Colors.CYAN}Watching {', '.join(files)} for threats. Press Ctrl+C to stop...{Colors.RESET}")
+    detector.start()
+    try:
+        tailer.follow()
+    except KeyboardInterrupt:
+        print(f"\n{Colors.WARNING}Stopped threat watch. {detector.lines_seen} lines scanned, "
+              f"{len(detector.alerts)} alerts.{Colors.RESET}")
+    finally:
+        tailer.close()
+        detector.stop()
+
+
+def log_stats(shell, args):
+    """Parses a whole log file into a columnar frame and prints aggregates."""
+    from core.log_frame import LogFrameParser
+
+    path, freq, export_path = args["logfile"], args["freq"], args["export"]
+    parser = LogFrameParser()
+    try:
+        start = time.time()
+        frame = parser.parse_file(path)
+        elapsed = time.time() - start
+    except (ImportError, OSError) as e:
+        print(f"{Colors.FAIL}Error: {e}{Colors.RESET}")
+        return
+
+    print(f"\n{Colors.BOLD}{path}: {len(frame)} lines parsed in {elapsed:.2f}s, "
+          f"{int(frame['failure'].sum())} auth failures{Colors.RESET}")
+    print(f"\n{Colors.CYAN}Top programs:{Colors.RESET}")
+    print(parser.top(frame, "program").to_string())
+    print(f"\n{Colors.CYAN}Top failing source IPs:{Colors.RESET}")
+    print(parser.top(frame, "ip", failures_only=True).to_string())
+    peaks = parser.failures_per_ip(frame, freq=freq).nlargest(10, "failures")
+    print(f"\n{Colors.CYAN}Busiest {freq} windows (failures per IP):{Colors.RESET}")
+    print(peaks.to_string(index=False) if len(peaks) else "none")
+
+    if export_path:
+        try:
+            parser.export(frame, export_path)
+            print(f"{Colors.GREEN}Exported frame to {export_path}{Colors.RESET}")
+        except (ImportError, ValueError, OSError) as e:
+            print(f"{Colors.FAIL}Export failed: {e}{Colors.RESET}")
+
+
+def service_logs(shell, args):
+    if args["reset"]:
+        shell.svc_mgr.journal.reset(args["service"])
+        print(f"{Colors.CYAN}Cursor for {args['service']} cleared; the next --new read starts from the recent tail.{Colors.RESET}")
+    entries = shell.svc_mgr.get_logs(args["service"], args["lines"], only_new=args["new"])
+    if args["analyze"] and entries:
+        shell.ai_logs.analyze_stream(
+            entries, f"journal:{args['service']}",
+            formatter=shell.svc_mgr.journal.format_entry
+        )
+
+
+def _login_cell(account):
+    if account.last_login is None:
+        return "never"
+    stamp = time.strftime('%Y-%m-%d %H:%M', time.localtime(account.last_login))
+    return f"{stamp} from {account.last_login_from}" if account.last_login_from else stamp
+
+
+def users(shell, args):
+    inventory = shell.user_mgr.inventory
+    if not inventory.available:
+        shell.user_mgr.list_users()
+        return
+    snapshot = inventory.snapshot()
+    rows = snapshot.filter(group=args["group"], shell=args["shell"], uid=args["uid"],
+                           login=True if args["login"] else None)
+    if args["json"]:
+        print(json.dumps([row.to_dict() for row in rows], indent=2))
+        return
+    print(f"\n{Colors.BOLD}{'User':<20} {'UID':>6} {'Group':<14} {'Shell':<18} {'Password':<9} Last login{Colors.RESET}")
+    for a in rows:
+        color = Colors.FAIL if a.password == "empty" or (a.uid == 0 and a.name != "root") else ""
+        print(f"{color}{a.name[:20]:<20} {a.uid:>6} {str(a.group)[:14]:<14} {a.shell[:18]:<18} "
+              f"{a.password or '?':<9} {_login_cell(a)}{Colors.RESET}")
+    print(f"{Colors.CYAN}{len(rows)} of {len(snapshot)} account(s)."
+          + ("" if snapshot.shadow_readable else " Password state needs root (/etc/shadow is not readable).")
+          + Colors.RESET)
+
+
+def users_audit(shell, args):
+    inventory = shell.user_mgr.inventory
+    if not inventory.available:
+        print(f"{Colors.FAIL}Account audits read /etc/passwd and are not available on Windows.{Colors.RESET}")
+        return
+    snapshot = inventory.snapshot()
+    findings = snapshot.audit(inactive_days=args["inactive"])
+    if args["json"]:
+        print(json.dumps(findings, indent=2))
+        return
+    print(f"{Colors.HEADER}--- Account Audit ({len(snapshot)} accounts) ---{Colors.RESET}")
+    informational = {}
+    for f in findings:
+        if f["risk"] == "GREEN":
+            informational[f["issue"]] = informational.get(f["issue"], 0) + 1
+            continue
+        color = Colors.FAIL if f["risk"] == "RED" else Colors.WARNING
+        print(f"{color}{f['issue'].upper():<17}{Colors.RESET} {f['user']} (uid {f['uid']}): {f['detail']}")
+    for issue, count in informational.items():
+        print(f"{Colors.CYAN}{issue.upper():<17}{Colors.RESET} {count} account(s) (--json lists them)")
+    if not findings:
+        print(f"{Colors.GREEN}[OK] No account problems found.{Colors.RESET}")
+    skipped = [name for name, readable in (("/etc/shadow", snapshot.shadow_readable),
+                                           ("lastlog", snapshot.lastlog_readable)) if not readable]
+    if skipped:
+        print(f"{Colors.WARNING}{' and '.join(skipped)} not readable: password and login checks skipped.{Colors.RESET}")
+
+
+def _user_bulk(shell, op, names, force=False):
+    mgr = shell.user_mgr
+    if not mgr.authorize():
+        print(f"{Colors.FAIL}sudo authorization failed; nothing was changed.{Colors.RESET}")
+        return
+    results = mgr.bulk(op, names, auditor=shell.auditor, force=force)
+    done = {"add": "added", "lock": "locked"}[op]
+    for r in results:
+        if r["status"] == "SUCCESS":
+            print(f"{Colors.GREEN}{r['user']}: {done}{Colors.RESET}")
+        elif r["status"] == "SKIPPED":
+            print(f"{Colors.CYAN}{r['user']}: skipped ({r['error']}){Colors.RESET}")
+        else:
+            print(f"{Colors.FAIL}{r['user']}: {r['error']}{Colors.RESET}")
+    ok = sum(r["status"] == "SUCCESS" for r in results)
+    print(f"{Colors.BOLD}{ok}/{len(results)} account(s) {done}.{Colors.RESET}")
+
+
+def user_add(shell, args):
+    _user_bulk(shell, "add", args["names"])
+
+
+def user_lock(shell, args):
+    _user_bulk(shell, "lock", args["names"], force=args["force"])
@@ -0,0 +1,88 @@
+import os
+import json
+from utils import perf
+from utils.colors import Colors
+
+
+def ask(shell, args):
+    query = " ".join(args["query"])
+    intent = shell.ai_nlp.process_query(query, prefetch=shell.prefetcher.start,
+                                          context=shell.context.build)
+    shell.route_ai_intent(query, intent)
+
+
+def show_help(shell, args):
+    shell.show_help(args["command"])
+
+
+def clear(shell, args):
+    os.system('cls' if os.name == 'nt' else 'clear')
+
+
+def perf_report(shell, args):
+    if args["profile"]:
+        shell.profile_next = True
+        print(f"{Colors.CYAN}The next command will run under cProfile.{Colors.RESET}")
+        return
+    stats = perf.PERF.snapshot(args["prefix"])
+    if args["json"]:
+        print(json.dumps(stats, indent=2))
+    elif not stats:
+        print(f"{Colors.WARNING}No timings recorded yet.{Colors.RESET}")
+    else:
+        print(f"\n{Colors.BOLD}{'Span':<32} {'Count':>7} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} "
+              f"{'Max ms':>10} {'Total ms':>11}{Colors.RESET}")
+        # Where the session's time went, largest first
+        for name, s in sorted(stats.items(), key=lambda item: item[1]["total_ms"], reverse=True):
+            print(f"{name:<32} {s['count']:>7} {s['p50_ms']:>10.2f} {s['p95_ms']:>10.2f} {s['p99_ms']:>10.2f} "
+                  f"{s['max_ms']:>10.2f} {s['total_ms']:>11.1f}")
+    if args["reset"]:
+        perf.PERF.reset()
+        print(f"{Colors.GREEN}Timings reset.{Colors.RESET}")
+
+
+def run_script(shell, args):
+    shell.playbook.run_playbook(args["path"])
+
+
+def _list_dir(path=None):
+    # Safe subprocess instead of os.system
+    if os.name == 'nt':
+        perf.run(['dir'] + ([path] if path else []), shell=False)
+    else:
+        perf.run(['ls', '-la'] + ([path] if path else []), shell=False)
+
+
+def list_files(shell, request):
+    _list_dir(request["target"] or ".")
+
+
+def move_dir(shell, request):
+    target = request["target"]
+    if target and os.path.exists(target):
+        os.chdir(target)
+        print(f"{Colors.GREEN}Directory Changed: {os.getcwd()}{Colors.RESET}")
+        return True
+    print(f"{Colors.FAIL}Directory does not exist: {target}{Colors.RESET}")
+    return False
+
+
+def move_and_list(shell, request):
+    target = request["target"]
+    if target and os.path.exists(target):
+        os.chdir(target)
+        print(f"{Colors.GREEN}Moved to: {os.getcwd()}{Colors.RESET}")
+        _list_dir()
+    else:
+        print(f"{Colors.FAIL}Directory does not exist: {target}{Colors.RESET}")
+
+
+def service_op(shell, request):
+    if request["target"] and request["value"]:
+        shell.svc_mgr.manage_service(request["target"], request["value"])
+    else:
+        print(f"{Colors.FAIL}Service operation requires service name and action{Colors.RESET}")
+
+
+def unknown(shell, request):
+    print(f"{Colors.WARNING}AI Analysis: {request['intent'].get('message', 'Unable to understand query')}{Colors.RESET}")
@@ -1,9 +1,15 @@
 #!/usr/bin/env python3
+import sys
+
+# Batch/daemon mode (-c, --batch, --daemon) must not pay for Rich, the AI
+# layer or even the shell's own imports: scripts call it thousands of times
+if __name__ == "__main__" and len(sys.argv) > 1:
+    from batch import main
+    sys.exit(main(sys.argv[1:]))
+
 import os
 import shlex
-import sys
 import time
-import subprocess
 from pathlib import Path
 
 # --- EXTERNAL LIBRARIES ---
@@ -17,17 +23,29 @@ except ImportError:
 
 # --- CUSTOM MODULES ---
 from utils.colors import Colors
+from utils import perf
+from utils.helpers import validate_host
 from core.monitoring import SystemMonitor
+from core.filesystems import FilesystemMonitor
+from core.cgroups import CgroupMonitor
 from core.process_manager import ProcessManager
 from core.service_manager import ServiceManager
 from core.network_tools import NetworkTools
 from core.user_manager import UserManager
 from core.log_viewer import LogViewer
 from core.integrity import IntegrityMonitor
+from core.integrity_watch import IntegrityWatcher
 from core.automation import PlaybookEngine
 from core.auditor import AuditLogger      
+from core.registry import UsageError, max_risk, Registry
+from core.planner import PlanExecutor
+from core.prefetch import Prefetcher
+from core.timeseries import TimeSeriesStore, MetricRecorder
+from core.anomaly import AnomalyDetector
 from ai.nlp_interface import NLPInterface
 from ai.log_analyzer import LogAnalyzer
+from ai.context_builder import ContextBuilder
+from handlers.builtin import register_builtins
 
 console = Console()
 
@@ -35,6 +53,12 @@ class NetMonShell:
     def __init__(self):
         # Core Infrastructure
         self.monitor = SystemMonitor()
+        self.filesystems = FilesystemMonitor()
+        self.cgroups = CgroupMonitor()
+        self.history = TimeSeriesStore()
+        self.anomalies = AnomalyDetector()
+        self.recorder = MetricRecorder(self.monitor, self.history, detector=self.anomalies,
+                                       filesystems=self.filesystems, cgroups=self.cgroups)
         self.proc_mgr = ProcessManager()
         self.svc_mgr = ServiceManager()
         self.net_tools = NetworkTools()
@@ -43,13 +67,29 @@ class NetMonShell:
         
         # Security & Compliance
         self.integrity = IntegrityMonitor()
+        self.integrity_watch = IntegrityWatcher(self.integrity)
         self.playbook = PlaybookEngine()
         self.auditor = AuditLogger()      
+        self.audit_index = None  # Built on first audit-query
         
         # Intelligence Layer
         self.ai_nlp = NLPInterface()
         self.ai_logs = LogAnalyzer()
         
+        # Command & intent dispatch (plugins register lazily via entry points)
+        self.registry = Registry()
+        register_builtins(self.registry)
+        self.registry.load_plugins()
+        self.ai_nlp.ALLOWED_ACTIONS.update(self.registry.actions)
+        self.planner = PlanExecutor(self)
+        self.prefetcher = Prefetcher(self)
+        self.context = ContextBuilder(self.prefetcher, self.auditor, self.history, self.anomalies,
+                                      self.filesystems, self.cgroups)
+        self.anomalies.add_callback(self._log_anomaly)
+        self.integrity_watch.add_callback(self._integrity_alert)
+        self.profile_next = False
+        self.profile_dir = os.path.abspath("data/profiles")
+        
         # Security Configuration
         self._setup_security_rules()
         
@@ -118,6 +158,42 @@ class NetMonShell:
         
         return True, abs_path, None
 
+    def _resolve_target(self, entry, target):
+        """
+        Returns (clean_target, error). Hosts, PIDs and service names are not
+        paths; hosts must be an IP or hostname (they end up in a ping argv,
+        where '-f' would be an option), every other target is validated as a path.
+        """
+        if not target or str(target).lower() == "none":
+            return None, None
+        if entry is not None and entry.target == "host":
+            host = str(target).strip()
+            return (host, None) if validate_host(host) else (None, f"Invalid host: {host}")
+        if entry is not None and entry.target != "path":
+            return str(target).strip(), None
+        is_safe, clean_target, error = self._sanitize_and_validate_path(target)
+        return (clean_target, None) if is_safe else (None, error)
+
+    def _log_anomaly(self, anomaly):
+        # Only the process recording the history audits anomalies, so a shell
+        # running next to the daemon does not log every one twice
+        if self.history.writer:
+            self.auditor.log_event("anomaly", anomaly["series"], risk="YELLOW", status=anomaly["direction"].upper(),
+                                   message=anomaly["message"], value=anomaly["value"],
+                                   expected=anomaly["expected"], z=anomaly["z"])
+
+    def _integrity_alert(self, alert):
+        # Printed as it happens, over the prompt if need be: tampering should not wait for the next command
+        color = Colors.GREEN if alert["status"] == "SAFE" else Colors.FAIL if alert["risk"] == "RED" else Colors.WARNING
+        print(f"\n{color}[integrity] {alert['status']}: {alert['message']}{Colors.RESET}")
+        # Like anomalies: only the process holding the watch lock audits them
+        if self.integrity_watch.owner:
+            self.auditor.log_event("integrity", alert["path"], risk=alert["risk"], status=alert["status"],
+                                   message=alert["message"], checked=alert["checked"], reason=alert["reason"])
+
+    def confirm(self, question):
+        return Confirm.ask(f"[bold yellow]{question}[/]")
+
     def welcome_banner(self):
         banner = Panel.fit(
             "[bold cyan]NetMon-AI: Intelligent Network Monitoring Platform[/]\n"
@@ -128,42 +204,36 @@ class NetMonShell:
         print(f"Type {Colors.GREEN}'ask <query>'{Colors.RESET} for AI help or use native commands.")
         print(f"Type {Colors.GREEN}'help'{Colors.RESET} for available commands.\n")
 
-    def show_help(self):
-        """Display available commands"""
-        help_text = f"""
-{Colors.BOLD}{Colors.HEADER}=== NetMon-AI Command Reference ==={Colors.RESET}
-
-{Colors.CYAN}AI Commands:{Colors.RESET}
-  ask <query>              Ask AI for help (e.g., "ask show CPU usage")
-
-{Colors.CYAN}System Monitoring:{Colors.RESET}
-  monitor                  Open live system dashboard
-  pslist                   List running processes
-  pskill <pid>             Terminate a process by PID
-  connections              Show active network connections
-
-{Colors.CYAN}Security & Integrity:{Colors.RESET}
-  register <file>          Register file for integrity monitoring
-  audit                    Check registered files for tampering
-  analyze <logfile>        AI-powered log analysis
-
-{Colors.CYAN}Automation:{Colors.RESET}
-  run-script <file>        Execute automation playbook
-
-{Colors.CYAN}Network Tools:{Colors.RESET}
-  (Use 'ask' for network operations like ping, port scan)
-
-{Colors.CYAN}General:{Colors.RESET}
-  help                     Show this help message
-  clear / cls              Clear screen
-  exit / quit              Exit NetMon-AI
+    def show_help(self, command=None):
+        """Display available commands (generated from the registry)"""
+        if command:
+            entry = self.registry.get_command(command)
+            if entry is None:
+                print(f"{Colors.WARNING}Unknown command: {command}{Colors.RESET}")
+                return
+            entry.handler  # Loads plugin metadata
+            print(f"{Colors.BOLD}{entry.usage}{Colors.RESET}\n  {entry.help}\n  Risk: {entry.risk}"
+                  + (f"  (plugin: {entry.plugin})" if entry.plugin else ""))
+            return
 
-{Colors.WARNING}Note: Many destructive operations require confirmation for safety.{Colors.RESET}
-"""
-        print(help_text)
+        lines = [f"\n{Colors.BOLD}{Colors.HEADER}=== NetMon-AI Command Reference ==={Colors.RESET}"]
+        for section, entries in self.registry.sections().items():
+            lines.append(f"\n{Colors.CYAN}{section}:{Colors.RESET}")
+            for entry in entries:
+                if len(entry.usage) < 25:
+                    lines.append(f"  {entry.usage:<24} {entry.help}")
+                else:
+                    lines.append(f"  {entry.usage}\n  {'':<24} {entry.help}")
+        lines.append(f"  {'exit / quit':<24} Exit NetMon-AI")
+        lines.append(f"\n{Colors.WARNING}Note: YELLOW/RED commands ask for confirmation and are audited.{Colors.RESET}\n")
+        print("\n".join(lines))
 
     def run(self):
         self.welcome_banner()
+        # Record metric history (unless another shell or the daemon already does) and watch for anomalies
+        self.recorder.start()
+        # Re-verify registered files as they change, instead of only on 'audit'
+        self.integrity_watch.start()
         
         while True:
             try:
@@ -182,244 +252,90 @@ class NetMonShell:
                 cmd = parts[0].lower()
 
                 # --- COMMAND ROUTING ---
-
-                if cmd == "help":
-                    self.show_help()
-                
-                elif cmd == "ask":
-                    if len(parts) < 2:
-                        print(f"{Colors.WARNING}Usage: ask <your question>{Colors.RESET}")
-                        continue
-                    query = " ".join(parts[1:])
-                    intent = self.ai_nlp.process_query(query)
-                    self.route_ai_intent(query, intent)
-                
-                elif cmd == "monitor":
-                    self.monitor.display_dashboard()
-                
-                elif cmd == "pslist":
-                    procs = self.proc_mgr.list_processes()
-                    print(f"\n{Colors.BOLD}{'PID':<10} {'Name':<25} {'CPU %':<10} {'Mem %':<10}{Colors.RESET}")
-                    for p in procs:
-                        print(f"{p['pid']:<10} {p['name']:<25} {p.get('cpu_percent', 0):<10} {p.get('memory_percent', 0):10.2f}")
-                
-                elif cmd == "pskill":
-                    if len(parts) < 2:
-                        print(f"{Colors.WARNING}Usage: pskill <pid>{Colors.RESET}")
-                        continue
-                    try:
-                        pid = int(parts[1])
-                        success, msg = self.proc_mgr.kill_process(pid)
-                        print(f"{Colors.GREEN if success else Colors.FAIL}{msg}{Colors.RESET}")
-                    except ValueError:
-                        print(f"{Colors.FAIL}Error: PID must be a number{Colors.RESET}")
-
-                elif cmd == "connections":
-                    self.net_tools.show_connections()
-                
-                elif cmd == "register":
-                    if len(parts) < 2:
-                        print(f"{Colors.WARNING}Usage: register <filepath>{Colors.RESET}")
-                        continue
-                    self.integrity.register_file(parts[1])
-                
-                elif cmd == "audit":
-                    self.integrity.check_integrity()
-                
-                elif cmd == "run-script":
-                    if len(parts) < 2:
-                        print(f"{Colors.WARNING}Usage: run-script <playbook_path>{Colors.RESET}")
-                        continue
-                    self.playbook.run_playbook(parts[1])
-                
-                elif cmd == "analyze":
-                    if len(parts) < 2:
-                        print(f"{Colors.WARNING}Usage: analyze <logfile>{Colors.RESET}")
-                        continue
-                    self.ai_logs.analyze_file(parts[1])
-                
-                elif cmd in ["clear", "cls"]:
-                    os.system('cls' if os.name == 'nt' else 'clear')
-
+                entry = self.registry.get_command(cmd)
+                if entry is not None:
+                    self.dispatch(entry, parts[1:], cmd_input)
+                elif cmd in self.SAFE_NATIVE_COMMANDS:
+                    os.system(cmd_input)
                 else:
-                    # Check if command is in safe list
-                    if cmd in self.SAFE_NATIVE_COMMANDS:
-                        os.system(cmd_input)
-                    else:
-                        print(f"{Colors.WARNING}Command '{cmd}' not recognized.{Colors.RESET}")
-                        print(f"Use {Colors.GREEN}'ask <query>'{Colors.RESET} for AI assistance")
-                        print(f"or try: {Colors.CYAN}'help'{Colors.RESET} for available commands")
+                    print(f"{Colors.WARNING}Command '{cmd}' not recognized.{Colors.RESET}")
+                    print(f"Use {Colors.GREEN}'ask <query>'{Colors.RESET} for AI assistance")
+                    print(f"or try: {Colors.CYAN}'help'{Colors.RESET} for available commands")
 
             except KeyboardInterrupt:
                 print(f"\n{Colors.WARNING}Use 'exit' to quit.{Colors.RESET}")
             except Exception as e:
                 console.print(f"[bold red]Shell Error:[/] {e}")
+        self.integrity_watch.stop()
+        self.recorder.stop()
+
+    def dispatch(self, entry, args, cmd_input=None):
+        """Runs a registered command: parse, gate by declared risk, audit, execute."""
+        try:
+            request = entry.parse(args)
+        except UsageError as e:
+            print(f"{Colors.WARNING}{e}{Colors.RESET}")
+            return
+        if entry.risk in ["YELLOW", "RED"]:
+            print(f"\n{Colors.WARNING}⚠️  {entry.risk} RISK COMMAND: {cmd_input or entry.name}{Colors.RESET}")
+            authorized = self.confirm("Do you authorize this command?")
+            self.auditor.log_event("command", entry.name, risk=entry.risk,
+                                   status="AUTHORIZED" if authorized else "REJECTED", query=cmd_input)
+            if not authorized:
+                print(f"{Colors.FAIL}Command Rejected.{Colors.RESET}")
+                return
+        if self.profile_next:
+            # Armed by 'perf --profile'
+            self.profile_next = False
+            result, report, path = perf.profile(entry, self, request, out_dir=self.profile_dir, label=entry.name)
+            print(report)
+            print(f"{Colors.CYAN}Profile saved to {path}{Colors.RESET}")
+            return result
+        return entry(self, request)
 
     def route_ai_intent(self, query, intent):
         """
         Secure Intent Router with Path Sanitization and Audit Trail.
         """
+        if intent.get("action") == "PLAN":
+            return self.planner.run(query, intent)
+
         action = intent.get("action")
         target = intent.get("target")
         value = intent.get("value")
-        risk = intent.get("risk_level", "GREEN")
+        entry = self.registry.get_action(action)
+        # A handler's declared risk is a floor the AI cannot talk its way under
+        risk = max_risk(intent.get("risk_level", "GREEN"), entry.risk if entry else None)
 
         # --- PATH VALIDATION ---
-        if target and target.lower() != "none":
-            is_safe, clean_target, error = self._sanitize_and_validate_path(target)
-            if not is_safe:
-                print(f"{Colors.FAIL}Security Violation: {error}{Colors.RESET}")
-                self.auditor.log_intent(query, intent, False)
-                return
-        else:
-            clean_target = None
+        clean_target, error = self._resolve_target(entry, target)
+        if error:
+            print(f"{Colors.FAIL}Security Violation: {error}{Colors.RESET}")
+            self.auditor.log_intent(query, intent, False)
+            return
 
         # --- THE SECURITY GATE ---
         authorized = True
         if risk in ["YELLOW", "RED"]:
             print(f"\n{Colors.WARNING}⚠️  SECURITY ALERT: {risk} RISK ACTION DETECTED{Colors.RESET}")
             print(f"Proposed Action: {action} on {target}")
-            authorized = Confirm.ask(f"[bold yellow]Do you authorize this system change?[/]")
+            authorized = self.confirm("Do you authorize this system change?")
             
             if not authorized:
                 print(f"{Colors.FAIL}Action Rejected.{Colors.RESET}")
 
         # --- THE AUDIT TRAIL ---
-        self.auditor.log_intent(query, intent, authorized)
+        self.auditor.log_intent(query, dict(intent, risk_level=risk), authorized)
 
         if not authorized:
             return
 
         # --- EXECUTION ENGINE ---
+        if entry is None:
+            print(f"{Colors.WARNING}Action '{action}' is not implemented yet.{Colors.RESET}")
+            return
         try:
-            if action == "MONITOR_MEM":
-                stats = self.monitor.get_metrics()
-                mem = stats.get('mem')
-                try:
-                    mem_val = float(mem)
-                except Exception:
-                    mem_val = mem
-                if isinstance(mem_val, (int, float)):
-                    color = Colors.FAIL if mem_val > 85 else Colors.WARNING if mem_val > 60 else Colors.GREEN
-                    print(f"{Colors.BOLD}Memory Usage:{Colors.RESET} {color}{mem_val}%{Colors.RESET}")
-                else:
-                    print(f"Memory Usage: {mem}")
-
-            elif action == "MONITOR_CPU":
-                stats = self.monitor.get_metrics()
-                cpu = stats.get('cpu')
-                try:
-                    cpu_val = float(cpu)
-                except Exception:
-                    cpu_val = cpu
-                if isinstance(cpu_val, (int, float)):
-                    color = Colors.FAIL if cpu_val > 85 else Colors.WARNING if cpu_val > 60 else Colors.GREEN
-                    print(f"{Colors.BOLD}CPU Usage:{Colors.RESET} {color}{cpu_val}%{Colors.RESET}")
-                else:
-                    print(f"CPU Usage: {cpu}")
-
-            elif action == "MONITOR_DISK":
-                stats = self.monitor.get_metrics()
-                disk = stats.get('disk')
-                try:
-                    disk_val = float(disk)
-                except Exception:
-                    disk_val = disk
-                if isinstance(disk_val, (int, float)):
-                    color = Colors.FAIL if disk_val > 85 else Colors.WARNING if disk_val > 60 else Colors.GREEN
-                    print(f"{Colors.BOLD}Disk Usage:{Colors.RESET} {color}{disk_val}%{Colors.RESET}")
-                else:
-                    print(f"Disk Usage: {disk}")
-
-            elif action == "MONITOR_DASHBOARD":
-                # AI requested the full live dashboard
-                self.monitor.display_dashboard()
-
-            elif action == "LIST_FILES":
-                search_term = clean_target if clean_target else "."
-                # Use safe subprocess instead of os.system
-                if os.name == 'nt':
-                    subprocess.run(['dir', search_term], shell=False)
-                else:
-                    subprocess.run(['ls', '-la', search_term], shell=False)
-
-            elif action == "MOVE_DIR":
-                if clean_target and os.path.exists(clean_target):
-                    os.chdir(clean_target)
-                    print(f"{Colors.GREEN}Directory Changed: {os.getcwd()}{Colors.RESET}")
-                else:
-                    print(f"{Colors.FAIL}Directory does not exist: {clean_target}{Colors.RESET}")
-
-            elif action == "MOVE_AND_LIST":
-                if clean_target and os.path.exists(clean_target):
-                    os.chdir(clean_target)
-                    print(f"{Colors.GREEN}Moved to: {os.getcwd()}{Colors.RESET}")
-                    if os.name == 'nt':
-                        subprocess.run(['dir'], shell=False)
-                    else:
-                        subprocess.run(['ls', '-la'], shell=False)
-                else:
-                    print(f"{Colors.FAIL}Directory does not exist: {clean_target}{Colors.RESET}")
-
-            elif action == "SERVICE_OP":
-                if clean_target and value:
-                    self.svc_mgr.manage_service(clean_target, value)
-                else:
-                    print(f"{Colors.FAIL}Service operation requires service name and action{Colors.RESET}")
-
-            elif action == "KILL_PROC":
-                try:
-                    pid = int(clean_target)
-                    if pid <= 0:
-                        print(f"{Colors.FAIL}Invalid PID{Colors.RESET}")
-                    else:
-                        success, msg = self.proc_mgr.kill_process(pid)
-                        print(f"{Colors.GREEN if success else Colors.FAIL}{msg}{Colors.RESET}")
-                except (ValueError, TypeError):
-                    print(f"{Colors.FAIL}Invalid PID: must be a number{Colors.RESET}")
-
-            elif action == "PORT_SCAN":
-                if clean_target:
-                    # Add basic validation to prevent scanning arbitrary hosts
-                    print(f"{Colors.CYAN}Scanning {clean_target}...{Colors.RESET}")
-                    self.net_tools.port_scan(clean_target)
-                else:
-                    print(f"{Colors.FAIL}Port scan requires a target host{Colors.RESET}")
-
-            elif action == "PING":
-                if clean_target:
-                    self.net_tools.ping(clean_target)
-                else:
-                    print(f"{Colors.FAIL}Ping requires a target host{Colors.RESET}")
-
-            elif action == "BANDWIDTH":
-                self.net_tools.get_bandwidth()
-
-            elif action == "CONNECTIONS":
-                self.net_tools.show_connections()
-
-            elif action == "MONITOR_SUMMARY":
-                stats = self.monitor.get_metrics()
-                # Format CPU / MEM / DISK in one concise block
-                cpu = stats.get('cpu')
-                mem = stats.get('mem')
-                disk = stats.get('disk')
-                def fmt(label, val):
-                    try:
-                        v = float(val)
-                        color = Colors.FAIL if v > 85 else Colors.WARNING if v > 60 else Colors.GREEN
-                        return f"{label}: {color}{v}%{Colors.RESET}"
-                    except Exception:
-                        return f"{label}: {val}"
-
-                print(fmt('CPU', cpu) + '  |  ' + fmt('MEM', mem) + '  |  ' + fmt('DISK', disk))
-
-            elif action == "UNKNOWN":
-                print(f"{Colors.WARNING}AI Analysis: {intent.get('message', 'Unable to understand query')}{Colors.RESET}")
-
-            else:
-                print(f"{Colors.WARNING}Action '{action}' is not implemented yet.{Colors.RESET}")
-
+            return entry(self, {"query": query, "intent": intent, "target": clean_target, "value": value})
         except Exception as e:
             print(f"{Colors.FAIL}Execution Error: {e}{Colors.RESET}")
 
@@ -1,3 +1,40 @@
+import ipaddress
+import re
+import time
+from utils.colors import Colors
+
+# RFC 1123 labels (plus '_', seen in internal names); never starts with '-', so it cannot pass as an option
+_HOSTNAME = re.compile(r"^(?=.{1,253}$)[A-Za-z0-9_][A-Za-z0-9_-]{0,62}(?:\.[A-Za-z0-9_][A-Za-z0-9_-]{0,62})*\.?$")
+
+
+class RateLimiter:
+    """
+    Caps alert fan-out: at most per_minute events per one-minute window
+    (opened by the first event after the previous one closed). Counts the
+    events it refused.
+    """
+    def __init__(self, per_minute):
+        self.per_minute = per_minute
+        self.suppressed = 0
+        self._window = (0.0, 0)  # (window start, events allowed in it)
+
+    def allow(self, now=None):
+        now = time.time() if now is None else now
+        start, sent = self._window
+        if now - start >= 60:
+            start, sent = now, 0
+        if sent >= self.per_minute:
+            self.suppressed += 1
+            return False
+        self._window = (start, sent + 1)
+        return True
+
+    def retry_in(self, now=None):
+        """Seconds until the current window closes and events are allowed again."""
+        now = time.time() if now is None else now
+        return max(0.0, self._window[0] + 60 - now)
+
+
 def format_bytes(size):
     """Converts bytes to human-readable format (MB, GB)."""
     for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
@@ -7,4 +44,48 @@ def format_bytes(size):
 
 def validate_pid(pid_str):
     """Ensures input is a valid process ID."""
-    return pid_str.isdigit() and int(pid_str) > 0
\ No newline at end of file
+    return pid_str.isdigit() and int(pid_str) > 0
+
+def positive_int(value):
+    """int() that also rejects zero and negatives (for counts given on the command line)."""
+    number = int(value)
+    if number < 1:
+        raise ValueError(f"expected a positive integer, got {value}")
+    return number
+
+def validate_host(host):
+    """Ensures input is an IP address or a hostname (safe to pass as a command argument)."""
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return bool(_HOSTNAME.match(host))
+
+def json_default(obj):
+    """json.dumps default: snapshot records serialize as dicts, anything else as str."""
+    to_dict = getattr(obj, "to_dict", None)
+    return to_dict() if to_dict else str(obj)
+
+def format_percent(label, value):
+    """'Label: 42.0%' colored green/yellow/red by the 60/85 thresholds used across the UI."""
+    try:
+        v = float(value)
+    except (TypeError, ValueError):
+        return f"{label}: {value}"
+    color = Colors.FAIL if v > 85 else Colors.WARNING if v > 60 else Colors.GREEN
+    return f"{Colors.BOLD}{label}:{Colors.RESET} {color}{v}%{Colors.RESET}"
+
+_SPARKS = "▁▂▃▄▅▆▇█"
+
+def sparkline(values, width=30, lo=None, hi=None):
+    """Unicode block sparkline of values, averaged down to at most width characters."""
+    if not values:
+        return ""
+    if len(values) > width:
+        step = len(values) / width
+        values = [sum(chunk) / len(chunk) for chunk in
+                  (values[int(i * step):int((i + 1) * step)] for i in range(width)) if chunk]
+    lo = min(values) if lo is None else lo
+    hi = max(values) if hi is None else hi
+    span = (hi - lo) or 1.0
+    return "".join(_SPARKS[min(len(_SPARKS) - 1, max(0, int((v - lo) / span * len(_SPARKS))))] for v in values)
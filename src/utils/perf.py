@@ -0,0 +1,148 @@
+"""
+Lightweight hot-path instrumentation. Spans record their wall time into
+per-name log-bucketed histograms (fixed memory, O(1) per sample, ~2.5%
+relative error), so they can stay on in production. Names are dotted by
+layer: cmd.*, intent.*, collector.*, ai.*, subprocess.*, render.*, daemon.*
+"""
+import functools
+import math
+import os
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+
+_SCALE = 1 / math.log(1.05)  # Buckets grow by 5%
+_BUCKETS = 512  # Covers 1us .. ~70 hours
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts = [0] * _BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+
+    def record(self, seconds):
+        us = seconds * 1e6
+        index = int(math.log(us) * _SCALE) if us > 1 else 0
+        self.counts[min(index, _BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def percentile(self, pct):
+        """Approximate percentile in seconds (bucket midpoint, clamped to min/max)."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(pct / 100 * self.count))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                value = math.exp((index + 0.5) / _SCALE) / 1e6
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 3),
+            "p50_ms": round(self.percentile(50) * 1000, 3),
+            "p95_ms": round(self.percentile(95) * 1000, 3),
+            "p99_ms": round(self.percentile(99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class Recorder:
+    def __init__(self):
+        self.histograms = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.record(seconds)
+
+    def snapshot(self, prefix=None):
+        """{name: summary} for every span name (optionally only those under prefix)."""
+        with self._lock:
+            return {name: h.summary() for name, h in sorted(self.histograms.items())
+                    if prefix is None or name.startswith(prefix)}
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.started = time.time()
+
+
+PERF = Recorder()
+
+
+@contextmanager
+def span(name):
+    """Times the enclosed block under name (failures are timed too)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        PERF.record(name, time.perf_counter() - started)
+
+
+def timed(name):
+    """Decorator form of span()."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                PERF.record(name, time.perf_counter() - started)
+        return inner
+    return wrap
+
+
+def run(args, **kwargs):
+    """subprocess.run, timed as subprocess.<program>."""
+    with span(f"subprocess.{os.path.basename(str(args[0]))}"):
+        return subprocess.run(args, **kwargs)
+
+
+def check_output(args, **kwargs):
+    """subprocess.check_output, timed as subprocess.<program>."""
+    with span(f"subprocess.{os.path.basename(str(args[0]))}"):
+        return subprocess.check_output(args, **kwargs)
+
+
+def profile(fn, *args, out_dir=None, label="command", limit=25, **kwargs):
+    """
+    Runs fn under cProfile. Returns (result, report text, .prof path or None);
+    the .prof file can be opened with snakeviz or pstats.
+    """
+    import cProfile
+    import io
+    import pstats
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        result = fn(*args, **kwargs)
+    finally:
+        profiler.disable()
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats("cumulative").print_stats(limit)
+    path = None
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+        path = os.path.join(out_dir, f"{label}-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+        stats.dump_stats(path)
+    return result, stream.getvalue(), path